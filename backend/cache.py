@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """검색어를 캐시 키로 쓰기 위해 정규화합니다 (유니코드 NFC, 공백 정리, 소문자)."""
+    return " ".join(unicodedata.normalize("NFC", query).split()).lower()
+
+
+class TTLCache:
+    """만료 시간(TTL)과 최대 크기(LRU)가 있는 인메모리 캐시.
+
+    path가 주어지면 load()/save()로 디스크에 저장해 재시작 후에도 유지할 수 있습니다.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        # key -> (만료 시각(epoch 초), 값)
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.time() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def load(self):
+        """디스크에 저장된 캐시를 읽어옵니다. 만료된 항목은 버립니다."""
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"캐시 파일을 읽을 수 없습니다 ({self.path}): {e}")
+            return
+
+        now = time.time()
+        for key, expires_at, value in entries:
+            if expires_at > now:
+                self._data[key] = (expires_at, value)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def save(self):
+        """캐시를 디스크에 저장합니다 (임시 파일에 쓴 뒤 교체)."""
+        if not self.path:
+            return
+
+        now = time.time()
+        entries = [
+            [key, expires_at, value]
+            for key, (expires_at, value) in self._data.items()
+            if expires_at > now
+        ]
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"캐시 파일을 저장할 수 없습니다 ({self.path}): {e}")
+
+
+class SingleFlight:
+    """같은 키에 대한 동시 호출을 하나의 실행으로 합칩니다.
+
+    먼저 들어온 호출만 실제로 실행하고, 실행 중에 들어온 호출은 같은 결과(또는 예외)를 받습니다.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # 한 요청이 취소(연결 종료)되어도 다른 대기자를 위해 실행은 계속
+        return await asyncio.shield(task)
+
+
+class _Broadcast:
+    """비동기 제너레이터를 한 번 실행하며 나온 항목을 모든 구독자에게 전달합니다."""
+
+    def __init__(self, items: AsyncIterator[Any]):
+        self.items: List[Any] = []
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._run(items))
+        self.task.add_done_callback(self._finish)
+
+    async def _run(self, items: AsyncIterator[Any]):
+        async for item in items:
+            self.items.append(item)
+            # 기다리던 구독자를 깨우고 다음 항목용 이벤트로 교체
+            self._changed.set()
+            self._changed = asyncio.Event()
+
+    def _finish(self, task: asyncio.Future):
+        if not task.cancelled():
+            task.exception()  # 구독자가 모두 떠난 뒤 실패해도 "never retrieved" 경고가 나지 않게
+        self._changed.set()
+
+    async def follow(self) -> AsyncIterator[Any]:
+        """지금까지 나온 항목부터 끝까지 차례로 돌려줍니다. 실행이 실패하면 같은 예외를 냅니다."""
+        position = 0
+        while True:
+            while position < len(self.items):
+                yield self.items[position]
+                position += 1
+            if self.task.done():
+                self.task.result()
+                return
+            await self._changed.wait()
+
+
+class StreamFlight:
+    """SingleFlight 의 스트리밍 버전: 같은 키에 대한 동시 호출이 하나의 비동기 제너레이터 실행을 공유합니다.
+
+    나중에 합류한 호출은 이미 나온 항목을 먼저 받고 이어서 새 항목을 받습니다.
+    구독자가 모두 떠나도(연결 종료) 실행은 끝까지 계속됩니다.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, _Broadcast] = {}
+
+    def join(self, key: str, func: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        broadcast = self._inflight.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast(func())
+            self._inflight[key] = broadcast
+            broadcast.task.add_done_callback(lambda _: self._forget(key, broadcast))
+        return broadcast.follow()
+
+    def _forget(self, key: str, broadcast: _Broadcast):
+        if self._inflight.get(key) is broadcast:
+            del self._inflight[key]
@@ -0,0 +1,82 @@
+"""pytest 공용 설정과 fixture
+
+테스트는 임시 디렉터리의 SQLite DB 로 실행합니다. main 을 import 하기 전에 환경 변수를 정하고
+작업 디렉터리를 옮겨 static/, data/ 같은 상대 경로 파일이 저장소에 생기지 않게 합니다.
+
+    def test_update_ingredient_query_count(client, query_budget):
+        with query_budget(3, max_repeats=1):
+            client.put("/api/ingredients/1", json={"name": "대파"})
+"""
+import itertools
+import os
+import tempfile
+
+import pytest
+
+_TEST_DIR = tempfile.mkdtemp(prefix="backend-test-")
+# 실제 DB 를 가리키는 환경 변수가 있어도 테스트는 항상 임시 SQLite 를 사용
+os.environ["DATABASE_URL"] = f"sqlite:///{_TEST_DIR}/test.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+for _name, _value in {
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "OPENAI_API_KEY": "sk-test",
+    "YOUTUBE_API_KEY": "test",
+}.items():
+    os.environ.setdefault(_name, _value)
+os.chdir(_TEST_DIR)
+
+from query_guard import count_queries, query_budget as _query_budget  # noqa: E402
+
+_kakao_ids = itertools.count(1000)
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    """시작/종료 이벤트를 실행한 TestClient (세션 동안 하나)."""
+    from fastapi.testclient import TestClient
+
+    from main import app
+    from popularity import star_counter
+
+    with TestClient(app) as client:
+        # 좋아요 수 반영 작업이 테스트 도중 SQL 을 실행하지 않도록 멈춤 (종료 시 다시 호출해도 됨)
+        client.portal.call(star_counter.stop)
+        yield client
+
+
+@pytest.fixture
+def user():
+    """테스트마다 새 사용자를 만들고 kakao_id 를 반환합니다."""
+    from database import SessionLocal
+    from models import User
+
+    kakao_id = next(_kakao_ids)
+    with SessionLocal() as db:
+        db.add(User(kakao_id=kakao_id, nickname=f"user{kakao_id}", profile_image=""))
+        db.commit()
+    return kakao_id
+
+
+@pytest.fixture
+def client(app_client, user):
+    """user 로 로그인한(token 쿠키) TestClient."""
+    from main import create_jwt_token
+
+    app_client.cookies.set("token", create_jwt_token({"sub": str(user)}))
+    yield app_client
+    app_client.cookies.clear()
+
+
+@pytest.fixture
+def query_counter():
+    """테스트 동안 실행된 SQL 문 (끝난 뒤 query_counter.report() 로 확인)."""
+    with count_queries() as counter:
+        yield counter
+
+
+@pytest.fixture
+def query_budget():
+    """query_guard.query_budget 컨텍스트 매니저 (블록 단위로 SQL 문 수 제한)."""
+    return _query_budget
@@ -1,10 +1,14 @@
 import os
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from metrics import instrument_engine
+
 load_dotenv()
 
 DB_USERNAME = os.getenv("DB_USERNAME")
@@ -13,19 +17,76 @@ DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 DB_DATABASE = os.getenv("DB_DATABASE")
 
-DATABASE_URL = f"mysql+pymysql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_DATABASE}"
+# DATABASE_URL 이 주어지면 그대로 사용 (예: 테스트용 "sqlite:///./test.db")
+DATABASE_URL = os.getenv("DATABASE_URL") or (
+    f"mysql+pymysql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_DATABASE}"
+)
+
+
+def to_async_url(url: str) -> str:
+    """동기 드라이버 URL을 대응하는 비동기 드라이버 URL로 변환합니다."""
+    if url.startswith("mysql+pymysql://"):
+        return "mysql+aiomysql://" + url[len("mysql+pymysql://"):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
 
 # 엔진 생성 (pool_recycle=3600: 1시간마다 연결 재생성)
 engine = create_engine(
     DATABASE_URL,
     pool_recycle=3600,
-    pool_pre_ping=True,  # 연결 상태 확인
-    echo=True  # SQL 쿼리 로깅
+    pool_pre_ping=True  # 연결 상태 확인
 )
 
+# 비동기 엔진 생성 (요청 처리용, 이벤트 루프를 막지 않음)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_recycle=3600,
+    pool_pre_ping=True
+)
+
+# SQL 로그는 전부 남기지 않고 느린 문장만 샘플링해 기록 (metrics.SLOW_QUERY_SECONDS)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+
+# MySQL 교착 상태(1213)/잠금 대기 시간 초과(1205): InnoDB 가 트랜잭션을 되돌렸으므로 처음부터 다시 실행하면 됨
+RETRYABLE_MYSQL_ERRORS = (1213, 1205)
+TRANSACTION_RETRIES = 3
+
+
+def is_retryable_error(error: OperationalError) -> bool:
+    """트랜잭션을 다시 실행하면 성공할 수 있는 DB 오류인지 확인합니다."""
+    args = getattr(error.orig, "args", ())
+    return bool(args) and args[0] in RETRYABLE_MYSQL_ERRORS
+
+
+# SQLite 는 연결마다 외래키 검사를 켜야 함 (MySQL InnoDB 와 같은 동작)
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _enable_sqlite_foreign_keys)
+if async_engine.dialect.name == "sqlite":
+    event.listen(async_engine.sync_engine, "connect", _enable_sqlite_foreign_keys)
+
 # 세션 생성
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 비동기 세션 생성 (commit 후 속성 접근 시 추가 쿼리가 나가지 않도록 expire_on_commit=False)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base 클래스 생성
 Base = declarative_base()
 
@@ -36,3 +97,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
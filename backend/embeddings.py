@@ -0,0 +1,59 @@
+"""레시피 의미 검색용 문장 임베딩
+
+EMBEDDING_MODEL 에 sentence-transformers 모델(예: "jhgan/ko-sroberta-multitask")을 지정하고
+`pip install -r requirements-semantic.txt` 로 설치했을 때만 의미 검색(/api/recipes/search?mode=semantic)을 켭니다.
+설정하지 않으면 글자 bigram 키워드 검색(text_index.py)만 사용합니다.
+"""
+import logging
+import os
+from typing import Optional, Sequence
+
+import numpy as np
+import torch
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # 미설치 시 의미 검색 비활성화
+    SentenceTransformer = None
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")  # 예: "jhgan/ko-sroberta-multitask"
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "2"))
+EMBEDDING_BATCH_SIZE = 64
+
+
+class TransformerEncoder:
+    """sentence-transformers 모델을 CPU 에서 배치로 실행하는 인코더."""
+
+    def __init__(self, model_name: str):
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"st:{model_name}"
+
+    def encode(self, texts: Sequence[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> np.ndarray:
+        with torch.inference_mode():
+            vectors = self.model.encode(
+                list(texts),
+                batch_size=batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True
+            )
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+
+
+def get_encoder() -> Optional[TransformerEncoder]:
+    """EMBEDDING_MODEL 이 설정되어 있고 sentence-transformers 가 있으면 그 모델, 아니면 None (의미 검색 끔)."""
+    if not EMBEDDING_MODEL:
+        return None
+    if SentenceTransformer is None:
+        logger.warning("sentence-transformers 가 설치되어 있지 않아 EMBEDDING_MODEL 을 무시합니다")
+        return None
+    # 웹 요청 처리와 CPU 를 나눠 쓰도록 torch 스레드 수 제한
+    torch.set_num_threads(EMBEDDING_THREADS)
+    return TransformerEncoder(EMBEDDING_MODEL)
+
+
+def recipe_text(title: str, subtitle: str | None, steps: Sequence[str] | None) -> str:
+    """레시피 검색용 문장. 제목이 결과에 더 큰 영향을 주도록 두 번 넣습니다."""
+    return "\n".join([title, title, subtitle or "", " ".join(steps or ())])
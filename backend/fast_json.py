@@ -0,0 +1,86 @@
+"""orjson 기반 JSON 응답
+
+- FastJSONResponse: 앱 기본 응답 클래스. orjson 으로 직렬화하고, 미설치 시 표준 json 으로 대체합니다.
+- 목록 API 는 DB 행/색인 항목을 바로 dict 로 만들어 FastJSONResponse 로 반환합니다. 엔드포인트가
+  Response 를 반환하면 FastAPI 가 response_model 재검증과 jsonable_encoder 를 건너뛰므로,
+  Pydantic 모델은 OpenAPI 문서에만 쓰입니다.
+
+벤치마크: python fast_json.py
+"""
+import datetime
+import json
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson 미설치 시 표준 json 사용
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"JSON 으로 변환할 수 없는 값입니다: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """content 를 UTF-8 JSON bytes 로 직렬화합니다 (datetime 은 isoformat 과 같은 형식)."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _benchmark(n_items: int = 1000, repeat: int = 20):
+    """재료 목록 응답의 항목당 직렬화 비용: Pydantic 모델 -> FastAPI 직렬화 -> json vs dict -> orjson."""
+    import asyncio
+    import time
+
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+
+    from schemas import IngredientResponse, IngredientsResponse
+
+    now = datetime.datetime(2026, 1, 1, 12, 30)
+    rows = [
+        dict(
+            id=i,
+            name=f"재료{i}",
+            category="채소",
+            added_date=now,
+            limit_date=now + datetime.timedelta(days=i % 14),
+            is_expired=False,
+            days_until_expiry=i % 14,
+            image_url=f"/static/icons/carrot.svg#{i}"
+        )
+        for i in range(n_items)
+    ]
+    field = create_model_field("Response_bench", IngredientsResponse, mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def pydantic_path() -> bytes:
+        model = IngredientsResponse(ingredients=[IngredientResponse(**row) for row in rows], next_cursor=None)
+        content = loop.run_until_complete(serialize_response(field=field, response_content=model))
+        return JSONResponse(content).body
+
+    def direct_path() -> bytes:
+        return FastJSONResponse({"ingredients": [dict(row) for row in rows], "next_cursor": None}).body
+
+    assert json.loads(pydantic_path()) == json.loads(direct_path())
+    for name, run in (("pydantic + json", pydantic_path), ("dict + orjson" if orjson else "dict + json", direct_path)):
+        run()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"{name:16s} {elapsed * 1e6 / n_items:7.2f} us/item  ({elapsed * 1000:.2f} ms / {n_items} items)")
+
+
+if __name__ == "__main__":
+    _benchmark()
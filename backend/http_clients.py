@@ -0,0 +1,69 @@
+import os
+
+import httpx
+from dotenv import load_dotenv
+
+from metrics import upstream_event_hooks
+
+load_dotenv()
+
+# 외부 API 이름
+KAKAO = "kakao"
+YOUTUBE = "youtube"
+OPENAI = "openai"
+
+# 카카오 API 호스트 (로컬 테스트 서버로 바꿔 실행할 수 있음)
+KAKAO_AUTH_HOST = os.getenv("KAKAO_AUTH_HOST", "https://kauth.kakao.com")
+KAKAO_API_HOST = os.getenv("KAKAO_API_HOST", "https://kapi.kakao.com")
+
+# 연결/읽기 타임아웃 (초)
+CONNECT_TIMEOUT = 3.0
+READ_TIMEOUT = 10.0
+OPENAI_READ_TIMEOUT = 60.0  # GPT 응답은 수 초 ~ 수십 초가 걸림
+
+# 업스트림별 연결 풀 설정 (클라이언트 하나가 한 업스트림만 담당하므로 곧 호스트별 제한)
+POOL_LIMITS = {
+    KAKAO: httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=30.0),
+    YOUTUBE: httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=30.0),
+    OPENAI: httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0),
+}
+
+READ_TIMEOUTS = {
+    KAKAO: READ_TIMEOUT,
+    YOUTUBE: READ_TIMEOUT,
+    OPENAI: OPENAI_READ_TIMEOUT,
+}
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def _build_async_client(name: str) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(READ_TIMEOUTS[name], connect=CONNECT_TIMEOUT),
+        limits=POOL_LIMITS[name],
+        event_hooks=upstream_event_hooks(name)
+    )
+
+
+async def init_http_clients():
+    """앱 시작 시 업스트림별 공유 클라이언트를 생성합니다."""
+    for name in (KAKAO, YOUTUBE, OPENAI):
+        if name not in _clients or _clients[name].is_closed:
+            _clients[name] = _build_async_client(name)
+
+
+async def close_http_clients():
+    """앱 종료 시 공유 클라이언트의 연결을 정리합니다."""
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """업스트림 이름에 해당하는 공유 클라이언트를 반환합니다."""
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        # startup 훅 밖(스크립트 등)에서 호출된 경우 지연 생성
+        client = _clients[name] = _build_async_client(name)
+    return client
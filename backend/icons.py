@@ -0,0 +1,297 @@
+import functools
+import unicodedata
+from typing import Optional
+
+# 한글 재료명 -> 아이콘 파일명 (static/icons 아래)
+HAN_TO_ENG_ICON_MAP = {
+    "계란": "egg.svg",
+    "메추리알": "egg.svg",
+    "감자": "potato.svg",
+    "고구마": "sweet_potato.svg",
+    "누룽지": "rice_bowl.svg",
+    "밀가루": "flour.svg",
+    "빵가루": "flour.svg",
+    "쌀": "rice_bowl.svg",
+    "옥수수콘": "corn.svg",
+    "오트밀": "oats.svg",
+    "찹쌀가루": "flour.svg",
+    "감": "persimmon.svg",
+    "건포도": "raisin.svg",
+    "귤": "tangerine.svg",
+    "딸기": "strawberry.svg",
+    "라임": "lime.svg",
+    "레몬": "lemon.svg",
+    "망고": "mango.svg",
+    "멜론": "melon.svg",
+    "바나나": "banana.svg",
+    "배": "pear.svg",
+    "복숭아": "peach.svg",
+    "블루베리": "blueberry.svg",
+    "사과": "apple.svg",
+    "수박": "watermelon.svg",
+    "아보카도": "avocado.svg",
+    "오렌지": "tangerine.svg",
+    "자두": "plum.svg",
+    "자몽": "grapefruit.svg",
+    "체리": "cherry.svg",
+    "키위": "kiwi.svg",
+    "파인애플": "pineapple.svg",
+    "포도": "grape.svg",
+    "가지": "eggplant.svg",
+    "고추": "chili.svg",
+    "깻잎": "leaf.svg",
+    "당근": "carrot.svg",
+    "대파": "green_onion.svg",
+    "마늘": "garlic.svg",
+    "무": "radish.svg",
+    "열무": "radish.svg",
+    "바질": "basil.svg",
+    "배추": "cabbage.svg",
+    "브로콜리": "broccoli.svg",
+    "비트": "beet.svg",
+    "시금치": "spinach.svg",
+    "아스파라거스": "asparagus.svg",
+    "상추": "leaf.svg",
+    "샐러리": "green_onion.svg",
+    "애호박": "zucchini.svg",
+    "양배추": "cabbage.svg",
+    "양송이버섯": "mushroom.svg",
+    "팽이버섯": "mushroom.svg",
+    "표고버섯": "mushroom.svg",
+    "양파": "onion.svg",
+    "오이": "cucumber.svg",
+    "콩나물": "bean_sprout.svg",
+    "토마토": "tomato.svg",
+    "파프리카": "bell_pepper.svg",
+    "호박": "pumpkin.svg",
+    "가래떡": "rice_cake.svg",
+    "떡국떡": "rice_cake.svg",
+    "바게트": "baguette.svg",
+    "베이글": "bagel.svg",
+    "식빵": "bread.svg",
+    "당면": "noodle.svg",
+    "라면": "ramen.svg",
+    "소면": "noodle.svg",
+    "수제비": "ramens.svg",
+    "우동": "ramens.svg",
+    "중화면": "ramens.svg",
+    "칼국수": "ramens.svg",
+    "파스타": "pasta.svg",
+    "버터": "butter.svg",
+    "생크림": "whipping_cream.svg",
+    "요거트": "yogurt.svg",
+    "우유": "milk.svg",
+    "치즈": "cheese.svg",
+    "닭고기": "chicken.svg",
+    "돼지고기": "pig.svg",
+    "소고기": "cow.svg",
+    "양고기": "lamb.svg",
+    "오리고기": "lamb.svg",
+    "검은콩": "black_bean.svg",
+    "땅콩": "nut_mix.svg",
+    "병아리": "pea.svg",
+    "아몬드": "nut_mix.svg",
+    "완두": "pea.svg",
+    "팥": "red_bean.svg",
+    "피스타치오": "nut_mix.svg",
+    "호두": "nut_mix.svg",
+    "낙지젓": "octopus.svg",
+    "명란젓": "roe_box.svg",
+    "새우젓": "shrimp.svg",
+    "오징어젓": "squid.svg",
+    "간장": "sauce_bottle.svg",
+    "굴소스": "sauce_bottle.svg",
+    "고추장": "gochujang.svg",
+    "고춧가루": "gochujang.svg",
+    "깨": "seasoning_pack.svg",
+    "꿀": "honey.svg",
+    "까나리액젓": "sauce_bottle.svg",
+    "초고추장": "gochujang.svg",
+    "데리야끼": "black_source.svg",
+    "돈까스소스": "black_source.svg",
+    "된장": "sauce_bowl.svg",
+    "다진마늘": "garlic.svg",
+    "드레싱": "seasoning_pack.svg",
+    "머스타드": "yellow_bottle.svg",
+    "마요네즈": "yellow_bottle.svg",
+    "미원": "seasoning_pack.svg",
+    "물엿": "seasoning_pack.svg",
+    "맛술": "seasoning_pack.svg",
+    "멸치액젓": "seasoning_pack.svg",
+    "쇠고기다시다": "powder_can.svg",
+    "쌈장": "sauce_bowl.svg",
+    "식초": "seasoning_pack.svg",
+    "소금": "salt.svg",
+    "굵은소금": "salt.svg",
+    "가는소금": "salt.svg",
+    "올리브유": "olive_oil.svg",
+    "알룰로스": "seasoning_pack.svg",
+    "올리고당": "seasoning_pack.svg",
+    "쯔유": "sauce_bottle.svg",
+    "청국장": "sauce_bowl.svg",
+    "춘장": "sauce_bowl.svg",
+    "칠리소스": "hot_sauce.svg",
+    "참치액젓": "seasoning_pack.svg",
+    "참기름": "seasoning_pack.svg",
+    "카레가루": "powder_can.svg",
+    "케찹": "ketchup.svg",
+    "토마토페이스트": "tomato_paste.svg",
+    "파슬리": "seasoning_pack.svg",
+    "파마산": "seasoning_pack.svg",
+    "후추": "salt.svg",
+    "핫소스": "hot_sauce.svg",
+    "훠궈소스": "hot_sauce.svg",
+    "갈치": "fish.svg",
+    "고등어": "fish.svg",
+    "꽁치": "fish.svg",
+    "건새우": "shrimp.svg",
+    "게맛살": "crab.svg",
+    "굴": "clam.svg",
+    "골뱅이": "shell.svg",
+    "꽃게": "crab.svg",
+    "꼬막": "scallop.svg",
+    "낙지": "octopus.svg",
+    "동태": "fish.svg",
+    "대합": "scallop.svg",
+    "다시마": "seaweed.svg",
+    "도다리": "fish.svg",
+    "명태": "fish.svg",
+    "멸치": "fish.svg",
+    "미역": "seaweed.svg",
+    "문어": "octopus.svg",
+    "바지락": "scallop.svg",
+    "새우": "shrimp.svg",
+    "소라": "shell.svg",
+    "아귀": "fish.svg",
+    "연어": "fish.svg",
+    "오징어": "squid.svg",
+    "조기": "fish.svg",
+    "전어": "fish.svg",
+    "조개": "scallop.svg",
+    "쭈꾸미": "octopus.svg",
+    "전복": "scallop.svg",
+    "홍합": "mussel.svg",
+    "김치": "kimchi.svg",
+    "두부": "tofu.svg",
+    "베이컨": "bacon.svg",
+    "소세지": "bacon.svg",
+    "어묵": "fishcake.svg",
+    "유부": "fishcake.svg",
+    "진미채": "seasoning_wheel.svg",
+    "참치캔": "tuna_can.svg",
+    "스팸": "tuna_can.svg",
+    "감자튀김": "fries.svg",
+    "냉동만두": "dumpling.svg",
+    "냉동치킨너겟": "chicken_bucket.svg",
+    "돈까스": "cutlet.svg",
+    "해물믹스": "seafood_mix.svg"
+}
+
+
+ICONS_DIR = "static/icons"
+SPRITES_DIR = "static/sprites"
+
+
+def icon_url(file_name: str) -> str:
+    return f"/static/icons/{file_name}"
+
+
+# 개별 아이콘 URL -> 스프라이트 조각 URL (스프라이트를 만들면 채워짐)
+_sprite_icon_urls: dict[str, str] = {}
+
+
+def set_icon_sprite(sprite_icons: dict[str, str]):
+    """build_icon_sprite 결과(아이콘 파일명 -> 스프라이트 조각 URL)를 등록합니다."""
+    _sprite_icon_urls.clear()
+    _sprite_icon_urls.update({icon_url(file_name): url for file_name, url in sprite_icons.items()})
+
+
+def sprite_icon_url(image_url: Optional[str]) -> Optional[str]:
+    """아이콘 URL을 스프라이트 조각 URL로 바꿉니다. 스프라이트에 없으면 그대로 반환합니다."""
+    if not image_url:
+        return image_url
+    return _sprite_icon_urls.get(image_url, image_url)
+
+
+def normalize_ingredient_name(name: str) -> str:
+    """재료명을 비교용으로 정규화합니다 (유니코드 NFKC, 공백 제거, 소문자)."""
+    return "".join(unicodedata.normalize("NFKC", name).split()).lower()
+
+
+class IconIndex:
+    """재료명으로 아이콘 카탈로그 항목을 찾는 불변 인메모리 인덱스.
+
+    정규화한 이름이 정확히 일치하지 않으면 카탈로그 이름 중 재료명에 포함된 가장 긴 것을 찾습니다
+    ("국산 감자" -> "감자", "다진 마늘" -> "다진마늘"). 길이가 같으면 뒤쪽 일치를 우선합니다
+    (한국어 합성어는 뒤가 중심어: "배추김치" -> "김치"). 한 글자 이름("무", "배")은 오탐을 막기 위해
+    공백으로 나뉜 단어 전체가 일치할 때만 사용합니다.
+    """
+
+    _END = ""
+
+    def __init__(self, catalog: dict[str, str]):
+        # catalog: 이미지 이름(images.name) -> 이미지 URL
+        self._urls = dict(catalog)
+        self._names = {}
+        self._trie: dict = {}
+        for name in self._urls:
+            key = normalize_ingredient_name(name)
+            if not key or key in self._names:
+                continue
+            self._names[key] = name
+            node = self._trie
+            for c in key:
+                node = node.setdefault(c, {})
+            node[self._END] = name
+        self.match = functools.lru_cache(maxsize=4096)(self._match)
+
+    def __contains__(self, image_name: str) -> bool:
+        return image_name in self._urls
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def url(self, image_name: Optional[str]) -> Optional[str]:
+        return sprite_icon_url(self._urls.get(image_name)) if image_name else None
+
+    def _match(self, ingredient_name: str) -> Optional[str]:
+        """재료명에 해당하는 이미지 이름을 반환합니다. 없으면 None."""
+        key = normalize_ingredient_name(ingredient_name)
+        if key in self._names:
+            return self._names[key]
+
+        # 공백으로 나뉜 단어가 통째로 일치하면 한 글자 이름도 허용
+        words = {normalize_ingredient_name(word) for word in ingredient_name.split()}
+
+        best, best_len, best_start = None, 0, -1
+        for start in range(len(key)):
+            node = self._trie
+            for end in range(start, len(key)):
+                node = node.get(key[end])
+                if node is None:
+                    break
+                name = node.get(self._END)
+                length = end - start + 1
+                if name is None or (length < 2 and key[start:end + 1] not in words):
+                    continue
+                if length > best_len or (length == best_len and start > best_start):
+                    best, best_len, best_start = name, length, start
+        return best
+
+
+# 앱 시작 시 images 테이블에서 한 번 읽어 교체 (set_icon_index)
+_icon_index = IconIndex({})
+
+
+def get_icon_index() -> IconIndex:
+    return _icon_index
+
+
+def set_icon_index(index: IconIndex):
+    global _icon_index
+    _icon_index = index
+
+
+def catalog_icon_index() -> IconIndex:
+    """DB 없이 기본 아이콘 카탈로그(HAN_TO_ENG_ICON_MAP)로 인덱스를 만듭니다."""
+    return IconIndex({name: icon_url(file_name) for name, file_name in HAN_TO_ENG_ICON_MAP.items()})
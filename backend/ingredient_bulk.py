@@ -0,0 +1,153 @@
+"""장보기 목록 같은 여러 재료를 한 번에 추가
+
+아이콘은 메모리의 IconIndex 로 찾고, 모든 행을 한 트랜잭션의 executemany INSERT 한 번으로 넣습니다.
+RETURNING 을 지원하는 DB(SQLite, MariaDB)는 INSERT ... RETURNING 으로 새 id 를 얻습니다.
+MySQL 은 다중 행 INSERT 한 번 뒤 같은 트랜잭션에서 id >= 첫 AUTO_INCREMENT 값인 행을 다시 조회합니다
+(auto_increment_increment > 1 이나 innodb_autoinc_lock_mode=2 에서는 id 가 연속이라는 보장이 없음).
+
+벤치마크: python ingredient_bulk.py
+"""
+import datetime
+from typing import List, Sequence
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from icons import IconIndex
+from models import DEFAULT_SHELF_LIFE, Ingredient
+from schemas import IngredientCreate
+
+# 다시 조회한 행을 입력 행과 맞출 때 비교할 컬럼 (DATETIME 은 소수점 초가 잘려 저장되므로 제외)
+MATCH_COLUMNS = ("name", "category", "image_name")
+
+
+async def insert_ingredients(
+        db: AsyncSession,
+        kakao_id: int,
+        items: Sequence[IngredientCreate],
+        icon_index: IconIndex
+) -> List[dict]:
+    """재료들을 한 번에 추가하고 응답용 dict 목록을 입력 순서대로 반환합니다 (commit 포함)."""
+    rows = []
+    for item in items:
+        rows.append({
+            "name": item.name,
+            "category": item.category,
+            "added_date": item.added_date,
+            "limit_date": item.added_date + DEFAULT_SHELF_LIFE,
+            "kakao_id": kakao_id,
+            "image_name": icon_index.match(item.name)
+        })
+
+    table = Ingredient.__table__
+    if db.bind.dialect.insert_executemany_returning:
+        result = await db.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows)
+        ids = list(result.scalars())
+    else:
+        result = await db.execute(insert(table).values(rows))
+        ids = await _inserted_ids(db, kakao_id, rows, result.lastrowid)
+    await db.commit()
+
+    now = datetime.datetime.now()
+    return [
+        {
+            "id": ingredient_id,
+            "name": row["name"],
+            "category": row["category"],
+            "added_date": row["added_date"],
+            "limit_date": row["limit_date"],
+            "is_expired": row["limit_date"] < now,
+            "days_until_expiry": (row["limit_date"] - now).days,
+            "image_url": icon_index.url(row["image_name"])
+        }
+        for ingredient_id, row in zip(ids, rows)
+    ]
+
+
+async def _inserted_ids(db: AsyncSession, kakao_id: int, rows: List[dict], first_id: int) -> List[int]:
+    """MySQL 다중 행 INSERT 로 넣은 행들의 id 를 입력 순서대로 찾습니다 (INSERT 와 같은 트랜잭션에서 호출).
+
+    한 문장 안의 AUTO_INCREMENT 값은 행 순서대로 커지지만 중간에 다른 문장의 값이 끼거나 간격이 있을 수 있으므로,
+    lastrowid(첫 id) 이후의 같은 사용자 행을 id 순으로 읽어 입력 행과 차례로 맞춥니다.
+    """
+    table = Ingredient.__table__
+    result = await db.execute(
+        select(table.c.id, *(table.c[name] for name in MATCH_COLUMNS))
+        .where(table.c.kakao_id == kakao_id, table.c.id >= first_id)
+        .order_by(table.c.id)
+    )
+    ids = []
+    for row in result:
+        if len(ids) == len(rows):
+            break
+        expected = rows[len(ids)]
+        # 동시에 같은 사용자가 추가한 다른 행은 건너뜀
+        if all(getattr(row, name) == expected[name] for name in MATCH_COLUMNS):
+            ids.append(row.id)
+    if len(ids) != len(rows):
+        raise RuntimeError(f"추가한 재료 {len(rows)}개 중 {len(ids)}개만 다시 찾았습니다")
+    return ids
+
+
+def _benchmark(n_items: int = 300, repeat: int = 5):
+    """재료 n_items 개 추가: 한 개씩(Ingredient.create, 항목마다 commit) vs insert_ingredients (임시 SQLite)."""
+    import asyncio
+    import os
+    import tempfile
+    import time
+
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from icons import HAN_TO_ENG_ICON_MAP, catalog_icon_index, icon_url
+    from models import Base, Image, User
+
+    icon_index = catalog_icon_index()
+    names = list(HAN_TO_ENG_ICON_MAP)
+    now = datetime.datetime.now()
+    items = [
+        IngredientCreate(name=f"국산 {names[i % len(names)]}", category="채소", added_date=now)
+        for i in range(n_items)
+    ]
+
+    async def run():
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}")
+            sessions = async_sessionmaker(engine, expire_on_commit=False)
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(insert(Image), [
+                    {"name": name, "image_url": icon_url(file_name)} for name, file_name in HAN_TO_ENG_ICON_MAP.items()
+                ])
+                await conn.execute(insert(User), [{"kakao_id": 1, "nickname": "bench", "profile_image": ""}])
+
+            async def per_item():
+                async with sessions() as db:
+                    for item in items:
+                        await Ingredient.create(
+                            db=db,
+                            name=item.name,
+                            category=item.category,
+                            added_date=item.added_date,
+                            kakao_id=1,
+                            image_name=icon_index.match(item.name)
+                        )
+
+            async def bulk():
+                async with sessions() as db:
+                    created = await insert_ingredients(db, 1, items, icon_index)
+                    assert len(created) == n_items and created[0]["image_url"]
+
+            for name, run_once in (("per-item", per_item), ("bulk", bulk)):
+                await run_once()
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    await run_once()
+                elapsed = (time.perf_counter() - start) / repeat
+                print(f"{name:9s} {elapsed * 1000:8.2f} ms / {n_items} items ({elapsed * 1e6 / n_items:.1f} us/item)")
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -1,29 +1,60 @@
+import asyncio
+import base64
 import datetime
 import functools
+import hashlib
 import json
 import os
-from typing import List, Any
+import time
+from typing import List, Any, AsyncIterator, Literal, Optional
 
-import httpx
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Request, BackgroundTasks, Query, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
-from openai import OpenAI
+from openai import AsyncOpenAI
 from openai.types.chat import (
     ChatCompletionSystemMessageParam,
     ChatCompletionUserMessageParam,
     ChatCompletionMessageParam
 )
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session,joinedload
+from sqlalchemy import DateTime, and_, delete, func, insert, or_, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 from starlette import status
-from starlette.responses import RedirectResponse, JSONResponse
-
-from database import engine, get_db
-from models import Base as SQLBase, Recipe, Ingredient, User, Star, Image
+from starlette.responses import RedirectResponse, JSONResponse, PlainTextResponse, StreamingResponse
+
+from cache import TTLCache, StreamFlight, normalize_query
+from database import TRANSACTION_RETRIES, engine, get_async_db, is_retryable_error, AsyncSessionLocal
+from embeddings import get_encoder, recipe_text
+from fast_json import FastJSONResponse
+from ingredient_bulk import insert_ingredients
+from icons import ICONS_DIR, SPRITES_DIR, IconIndex, get_icon_index, set_icon_index, set_icon_sprite
+from http_clients import (
+    KAKAO,
+    YOUTUBE,
+    OPENAI,
+    init_http_clients,
+    close_http_clients,
+    get_http_client,
+    KAKAO_API_HOST,
+    KAKAO_AUTH_HOST
+)
+from metrics import MetricsMiddleware, render_metrics
+from models import Base as SQLBase, Recipe, Ingredient, User, Star, Image, days_between
+from photo_recognition import (
+    PHOTO_MAX_BYTES,
+    PHOTO_MIN_CONFIDENCE,
+    Image as PILImage,
+    PhotoRecognizer,
+    load_classifier
+)
+from popularity import POPULAR_CAPACITY, star_counter
+from recipe_stream import RecipeStreamParser
+from recipe_matrix import RecipeScorer, pantry_weight
+from recommend import explain, ingredient_key, recipe_index
 from schemas import (
     MessageResponse,
     UserResponse,
@@ -31,9 +62,20 @@ from schemas import (
     RecipeResponse,
     IngredientResponse,
     IngredientCreate,
+    IngredientBulkCreate,
+    PhotoIngredientsResponse,
     IngredientUpdate,
-    StarResponse
+    StarResponse,
+    RecommendationsResponse,
+    RecipeSearchResponse,
+    PopularRecipesResponse,
+    StarredRecipesResponse
 )
+from sprites import build_icon_sprite
+from static_files import CachedStaticFiles
+from text_index import BigramIndex
+from youtube_urls import extract_video_id
+from vector_index import RECIPE_VECTORS_DIR, VectorIndex
 
 import logging
 logging.basicConfig(level=logging.INFO)
@@ -42,233 +84,159 @@ logger = logging.getLogger(__name__)
 SQLBase.metadata.create_all(bind=engine)
 
 load_dotenv()
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 #static/icons 디렉토리가 없으면 생성
-os.makedirs("static/icons", exist_ok=True)
+os.makedirs(ICONS_DIR, exist_ok=True)
 
-#정적 파일 경로 등록
-app.mount("/static", StaticFiles(directory="static"), name="static")
+#정적 파일 경로 등록 (캐시 헤더 + 사전 압축본 제공)
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 #__________________________________________________________
-# 이미지 초기화
-HAN_TO_ENG_ICON_MAP ={
-    "계란": "egg.svg",
-    "메추리알": "egg.svg",
-    "감자": "potato.svg",
-    "고구마": "sweet_potato.svg",
-    "누룽지": "rice_bowl.svg",
-    "밀가루": "flour.svg",
-    "빵가루": "flour.svg",
-    "쌀": "rice_bowl.svg",
-    "옥수수콘": "corn.svg",
-    "오트밀": "oats.svg",
-    "찹쌀가루": "flour.svg",
-    "감": "persimmon.svg",
-    "건포도": "raisin.svg",
-    "귤": "tangerine.svg",
-    "딸기": "strawberry.svg",
-    "라임": "lime.svg",
-    "레몬": "lemon.svg",
-    "망고": "mango.svg",
-    "멜론": "melon.svg",
-    "바나나": "banana.svg",
-    "배": "pear.svg",
-    "복숭아": "peach.svg",
-    "블루베리": "blueberry.svg",
-    "사과": "apple.svg",
-    "수박": "watermelon.svg",
-    "아보카도": "avocado.svg",
-    "오렌지": "tangerine.svg",
-    "자두": "plum.svg",
-    "자몽": "grapefruit.svg",
-    "체리": "cherry.svg",
-    "키위": "kiwi.svg",
-    "파인애플": "pineapple.svg",
-    "포도": "grape.svg",
-    "가지": "eggplant.svg",
-    "고추": "chili.svg",
-    "깻잎": "leaf.svg",
-    "당근": "carrot.svg",
-    "대파": "green_onion.svg",
-    "마늘": "garlic.svg",
-    "무": "radish.svg",
-    "열무": "radish.svg",
-    "바질": "basil.svg",
-    "배추": "cabbage.svg",
-    "브로콜리": "broccoli.svg",
-    "비트": "beet.svg",
-    "시금치": "spinach.svg",
-    "아스파라거스": "asparagus.svg",
-    "상추": "leaf.svg",
-    "샐러리": "green_onion.svg",
-    "애호박": "zucchini.svg",
-    "양배추": "cabbage.svg",
-    "양송이버섯": "mushroom.svg",
-    "팽이버섯": "mushroom.svg",
-    "표고버섯": "mushroom.svg",
-    "양파": "onion.svg",
-    "오이": "cucumber.svg",
-    "콩나물": "bean_sprout.svg",
-    "토마토": "tomato.svg",
-    "파프리카": "bell_pepper.svg",
-    "호박": "pumpkin.svg",
-    "가래떡": "rice_cake.svg",
-    "떡국떡": "rice_cake.svg",
-    "바게트": "baguette.svg",
-    "베이글": "bagel.svg",
-    "식빵": "bread.svg",
-    "당면": "noodle.svg",
-    "라면": "ramen.svg",
-    "소면": "noodle.svg",
-    "수제비": "ramens.svg",
-    "우동": "ramens.svg",
-    "중화면": "ramens.svg",
-    "칼국수": "ramens.svg",
-    "파스타": "pasta.svg",
-    "버터": "butter.svg",
-    "생크림": "whipping_cream.svg",
-    "요거트": "yogurt.svg",
-    "우유": "milk.svg",
-    "치즈": "cheese.svg",
-    "닭고기": "chicken.svg",
-    "돼지고기": "pig.svg",
-    "소고기": "cow.svg",
-    "양고기": "lamb.svg",
-    "오리고기": "lamb.svg",
-    "검은콩": "black_bean.svg",
-    "땅콩": "nut_mix.svg",
-    "병아리": "pea.svg",
-    "아몬드": "nut_mix.svg",
-    "완두": "pea.svg",
-    "팥": "red_bean.svg",
-    "피스타치오": "nut_mix.svg",
-    "호두": "nut_mix.svg",
-    "낙지젓": "octopus.svg",
-    "명란젓": "roe_box.svg",
-    "새우젓": "shrimp.svg",
-    "오징어젓": "squid.svg",
-    "간장": "sauce_bottle.svg",
-    "굴소스": "sauce_bottle.svg",
-    "고추장": "gochujang.svg",
-    "고춧가루": "gochujang.svg",
-    "깨": "seasoning_pack.svg",
-    "꿀": "honey.svg",
-    "까나리액젓": "sauce_bottle.svg",
-    "초고추장": "gochujang.svg",
-    "데리야끼": "black_source.svg",
-    "돈까스소스": "black_source.svg",
-    "된장": "sauce_bowl.svg",
-    "다진마늘": "garlic.svg",
-    "드레싱": "seasoning_pack.svg",
-    "머스타드": "yellow_bottle.svg",
-    "마요네즈": "yellow_bottle.svg",
-    "미원": "seasoning_pack.svg",
-    "물엿": "seasoning_pack.svg",
-    "맛술": "seasoning_pack.svg",
-    "멸치액젓": "seasoning_pack.svg",
-    "쇠고기다시다": "powder_can.svg",
-    "쌈장": "sauce_bowl.svg",
-    "식초": "seasoning_pack.svg",
-    "소금": "salt.svg",
-    "굵은소금": "salt.svg",
-    "가는소금": "salt.svg",
-    "올리브유": "olive_oil.svg",
-    "알룰로스": "seasoning_pack.svg",
-    "올리고당": "seasoning_pack.svg",
-    "쯔유": "sauce_bottle.svg",
-    "청국장": "sauce_bowl.svg",
-    "춘장": "sauce_bowl.svg",
-    "칠리소스": "hot_sauce.svg",
-    "참치액젓": "seasoning_pack.svg",
-    "참기름": "seasoning_pack.svg",
-    "카레가루": "powder_can.svg",
-    "케찹": "ketchup.svg",
-    "토마토페이스트": "tomato_paste.svg",
-    "파슬리": "seasoning_pack.svg",
-    "파마산": "seasoning_pack.svg",
-    "후추": "salt.svg",
-    "핫소스": "hot_sauce.svg",
-    "훠궈소스": "hot_sauce.svg",
-    "갈치": "fish.svg",
-    "고등어": "fish.svg",
-    "꽁치": "fish.svg",
-    "건새우": "shrimp.svg",
-    "게맛살": "crab.svg",
-    "굴": "clam.svg",
-    "골뱅이": "shell.svg",
-    "꽃게": "crab.svg",
-    "꼬막": "scallop.svg",
-    "낙지": "octopus.svg",
-    "동태": "fish.svg",
-    "대합": "scallop.svg",
-    "다시마": "seaweed.svg",
-    "도다리": "fish.svg",
-    "명태": "fish.svg",
-    "멸치": "fish.svg",
-    "미역": "seaweed.svg",
-    "문어": "octopus.svg",
-    "바지락": "scallop.svg",
-    "새우": "shrimp.svg",
-    "소라": "shell.svg",
-    "아귀": "fish.svg",
-    "연어": "fish.svg",
-    "오징어": "squid.svg",
-    "조기": "fish.svg",
-    "전어": "fish.svg",
-    "조개": "scallop.svg",
-    "쭈꾸미": "octopus.svg",
-    "전복": "scallop.svg",
-    "홍합": "mussel.svg",
-    "김치": "kimchi.svg",
-    "두부": "tofu.svg",
-    "베이컨": "bacon.svg",
-    "소세지": "bacon.svg",
-    "어묵": "fishcake.svg",
-    "유부": "fishcake.svg",
-    "진미채": "seasoning_wheel.svg",
-    "참치캔": "tuna_can.svg",
-    "스팸": "tuna_can.svg",
-    "감자튀김": "fries.svg",
-    "냉동만두": "dumpling.svg",
-    "냉동치킨너겟": "chicken_bucket.svg",
-    "돈까스": "cutlet.svg",
-    "해물믹스": "seafood_mix.svg"
-}
-def init_images(db: Session):
-    """이미지 정보를 초기화합니다."""
-    images = [
-        {"name": han, "image_url": f"/static/icons/{eng}"}
-        for han, eng in HAN_TO_ENG_ICON_MAP.items()
-
-    ]
-
-    for img_data in images:
-        existing_image = db.query(Image).filter(Image.name == img_data["name"]).first()
-        if not existing_image:
-            image = Image(**img_data)
-            db.add(image)
-
-    db.commit()
-
-def update_ingredient_images(db: Session):
-    """기존 재료의 이미지 정보를 업데이트합니다."""
-    ingredients = db.query(Ingredient).all()
-    for ingredient in ingredients:
-        if not ingredient.image_name:
-            image = db.query(Image).filter(Image.name == ingredient.name).first()
-            if image:
-                ingredient.image_name = image.name
-                db.add(ingredient)
-
-    db.commit()
-
-# 앱 시작 시 이미지 초기화
+# 앱 시작/종료 시 외부 연결 및 캐시 관리
+# (이미지 카탈로그 초기화는 `python maintenance.py images` 로 배포 시 한 번 실행)
 @app.on_event("startup")
 async def startup_event():
-    db = next(get_db())
-    init_images(db)
-    update_ingredient_images(db)
+    await init_http_clients()
+    youtube_search_cache.load()
+    await load_icon_sprite()
+    await load_icon_index()
+    await load_recipe_search()
+    await load_photo_recognizer()
+    # 재료 키가 아이콘 인덱스를 사용하므로 아이콘 인덱스 다음에 로드
+    async with AsyncSessionLocal() as db:
+        await sync_recipe_index(db)
+    await recipe_scorer.compact_async()
+    await star_counter.load_totals()
+    star_counter.start()
+
+
+async def load_icon_sprite():
+    """아이콘 스프라이트를 만들고(내용이 같으면 기존 파일 재사용) 조각 URL을 등록합니다."""
+    sprite = await asyncio.to_thread(build_icon_sprite, ICONS_DIR, SPRITES_DIR, "/static/sprites")
+    if sprite:
+        set_icon_sprite(sprite["icons"])
+
+
+async def load_icon_index():
+    """이미지 카탈로그를 한 번 읽어 재료명 -> 아이콘 인덱스를 만듭니다."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Image.name, Image.image_url))
+        set_icon_index(IconIndex(dict(result.all())))
+
+
+async def load_recipe_search():
+    """레시피 의미 검색용 인코더와 디스크 벡터 색인을 엽니다 (EMBEDDING_MODEL 이 없으면 의미 검색을 끔)."""
+    global recipe_encoder, recipe_vectors
+
+    def load():
+        encoder = get_encoder()
+        if encoder is None:
+            return None, None
+        return encoder, VectorIndex(RECIPE_VECTORS_DIR, encoder.dim, encoder.name)
+
+    recipe_encoder, recipe_vectors = await asyncio.to_thread(load)
+    if recipe_vectors is None:
+        logger.info("EMBEDDING_MODEL 이 설정되지 않아 레시피 의미 검색을 사용하지 않습니다")
+    else:
+        logger.info(f"레시피 벡터 색인: {len(recipe_vectors)}개 ({recipe_encoder.name})")
+
+
+async def load_photo_recognizer():
+    """사진 재료 인식 모델을 한 번 읽고 미리 실행해 둔 뒤 마이크로 배치 작업을 시작합니다.
+
+    모델 파일이 없으면 사진 인식을 끕니다 (503).
+    """
+    global photo_recognizer
+    if PILImage is None:
+        logger.warning("pillow 가 설치되어 있지 않아 사진 재료 인식을 사용하지 않습니다")
+        return
+
+    try:
+        classifier = await asyncio.to_thread(load_classifier)
+    except Exception as e:
+        # 모델 문제로 앱 전체가 뜨지 않는 일이 없도록 사진 인식만 비활성화
+        logger.warning(f"사진 재료 인식 모델을 불러오지 못했습니다: {e}")
+        return
+    recognizer = PhotoRecognizer(classifier)
+    await recognizer.warmup()
+    photo_recognizer = recognizer
+    photo_recognizer.start()
+    logger.info(f"사진 재료 인식 모델: {classifier.name} (라벨 {len(classifier.labels)}개)")
+
+
+async def index_recipes_for_search(recipes: List[Any]):
+    """아직 벡터 색인에 없는 레시피를 CPU 에서 배치로 임베딩해 추가합니다."""
+    if recipe_vectors is None:
+        return
+
+    try:
+        # 다른 워커가 이미 추가한 레시피는 다시 계산하지 않음
+        await asyncio.to_thread(recipe_vectors.refresh)
+        pending = [recipe for recipe in recipes if recipe.id not in recipe_vectors]
+        if not pending:
+            return
+
+        texts = [recipe_text(recipe.title, recipe.subtitle, recipe.steps) for recipe in pending]
+        vectors = await asyncio.to_thread(recipe_encoder.encode, texts)
+        await asyncio.to_thread(recipe_vectors.add, [recipe.id for recipe in pending], vectors)
+    except Exception as e:
+        # 검색 색인 실패가 레시피 저장/추천을 막지 않도록 로그만 남김
+        logger.warning(f"레시피 벡터 색인 갱신 실패: {e}")
+
+
+async def sync_recipe_index(db: AsyncSession):
+    """마지막으로 동기화한 id 보다 큰 레시피만 읽어 색인에 추가합니다.
+
+    다른 워커 프로세스가 저장한 레시피도 다음 추천/검색 요청 때 반영됩니다 (PK 범위 조회 한 번).
+    이 워커가 저장하며 이미 색인한 레시피는 건너뜁니다.
+    """
+    result = await db.execute(
+        select(
+            Recipe.id,
+            Recipe.title,
+            Recipe.subtitle,
+            Recipe.youtube_link,
+            Recipe.video_id,
+            Recipe.ingredients,
+            Recipe.seasonings,
+            Recipe.steps
+        ).filter(Recipe.id > recipe_index.synced_id).order_by(Recipe.id)
+    )
+    rows = result.all()
+    if rows:
+        recipe_index.synced_id = max(recipe_index.synced_id, rows[-1].id)
+    rows = [row for row in rows if row.id not in recipe_index]
+    for row in rows:
+        recipe_index.add_recipe(row)
+        recipe_scorer.add_recipe(row)
+        recipe_text_index.add_recipe(row)
+    if rows:
+        recipe_scorer.schedule_compaction()
+        await index_recipes_for_search(rows)
+
+
+# 유통기한 가중 추천용 레시피 x 재료 행렬 (recipe_index 와 함께 갱신)
+recipe_scorer = RecipeScorer()
+
+# 키워드 검색용 글자 bigram 역색인 (recipe_index 와 함께 갱신)
+recipe_text_index = BigramIndex()
+
+# 레시피 의미 검색 (앱 시작 시 load_recipe_search 로 설정)
+recipe_encoder = None
+recipe_vectors: Optional[VectorIndex] = None
+
+# 사진 재료 인식 (앱 시작 시 load_photo_recognizer 로 설정)
+photo_recognizer: Optional[PhotoRecognizer] = None
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await star_counter.stop()
+    if photo_recognizer is not None:
+        await photo_recognizer.stop()
+    await close_http_clients()
+    youtube_search_cache.save()
 #__________________________________________________________
 
 # cors 설정
@@ -287,6 +255,14 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"]
 )
+# 라우트별 응답 시간, 요청당 SQL 수/시간 (GET /metrics)
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    """Prometheus 텍스트 형식 지표 (워커 프로세스별)."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 KAKAO_CLIENT_ID = os.getenv("KAKAO_CLIENT_ID")
 KAKAO_CLIENT_SECRET = os.getenv("KAKAO_CLIENT_SECRET")
@@ -295,13 +271,30 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-kauth_host = "https://kauth.kakao.com"
-kapi_host = "https://kapi.kakao.com"
+kauth_host = KAKAO_AUTH_HOST
+kapi_host = KAKAO_API_HOST
 openai_host = "https://api.openai.com/v1"
 message_template = '{"object_type":"text","text":"Hello, world!","link":{"web_url":"https://developers.kakao.com","mobile_web_url":"https://developers.kakao.com"}}'
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 
+# YouTube 검색 결과 캐시 (검색 1회당 쿼터 100 소모)
+youtube_search_cache = TTLCache(
+    maxsize=int(os.getenv("YOUTUBE_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("YOUTUBE_CACHE_TTL", str(6 * 60 * 60))),
+    path=os.getenv("YOUTUBE_CACHE_PATH")  # 지정 시 재시작 후에도 유지
+)
+
+# 영상 메타데이터 캐시 (영상 ID 기준, videos.list 한 번에 최대 50개 조회)
+video_metadata_cache = TTLCache(
+    maxsize=int(os.getenv("YOUTUBE_METADATA_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("YOUTUBE_METADATA_CACHE_TTL", str(24 * 60 * 60)))
+)
+YOUTUBE_VIDEOS_BATCH_SIZE = 50
+
+# 레시피 추천 시 동시에 보낼 YouTube 검색 수와 반환할 영상 수
+YOUTUBE_SEARCH_CONCURRENCY = int(os.getenv("YOUTUBE_SEARCH_CONCURRENCY", "3"))
+MAX_RECIPE_VIDEOS = 5
+
 
 def create_jwt_token(data: dict, expires_delta: datetime.timedelta | None = None):
     to_encode = data.copy()
@@ -414,38 +407,70 @@ async def validate_jwt_token(jwt_token: str) -> dict:
 #         raise create_error_response("Invalid token", status.HTTP_401_UNAUTHORIZED)
 
 
+# 인증 컨텍스트 캐시: 토큰 해시 -> kakao_id, kakao_id -> UserResponse
+# (프로세스별 캐시이므로 다른 워커의 변경은 TTL 이내로만 늦게 반영됨)
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+auth_token_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+user_context_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def invalidate_user_context(kakao_id: int | None = None, token: str | None = None):
+    """프로필 변경, 로그아웃, 연결 끊기 시 인증 컨텍스트 캐시를 비웁니다."""
+    if token:
+        auth_token_cache.delete(hash_token(token))
+    if kakao_id is not None:
+        user_context_cache.delete(kakao_id)
+
+
 async def get_current_user(request: Request,           # ↓ HTTPBearer 대신 Request 사용
-                           db: Session = Depends(get_db)) -> UserResponse:
+                           db: AsyncSession = Depends(get_async_db)) -> UserResponse:
     token = request.cookies.get("token")                  # 쿠키에서 꺼내기
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        kakao_id = int(payload["sub"].strip("'"))
-        user = db.query(User).filter(User.kakao_id == kakao_id).first()
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        return UserResponse(
-            kakao_id=user.kakao_id,
-            nickname=user.nickname,
-            profile_image=user.profile_image,
-            created_at=user.created_at
-        )
+        token_key = hash_token(token)
+        kakao_id = auth_token_cache.get(token_key)
+        if kakao_id is None:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            kakao_id = int(payload["sub"].strip("'"))
+            # 토큰 만료 시각을 넘겨서 캐시하지 않음
+            ttl = min(AUTH_CACHE_TTL, payload.get("exp", 0) - time.time())
+            if ttl > 0:
+                auth_token_cache.set(token_key, kakao_id, ttl=ttl)
+
+        current_user = user_context_cache.get(kakao_id)
+        if current_user is None:
+            user = await db.get(User, kakao_id)
+            if not user:
+                raise HTTPException(status_code=401, detail="User not found")
+            current_user = UserResponse(
+                kakao_id=user.kakao_id,
+                nickname=user.nickname,
+                profile_image=user.profile_image,
+                created_at=user.created_at
+            )
+            user_context_cache.set(kakao_id, current_user)
+        return current_user
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 async def call_kakao_api(endpoint: str, method: str = "POST", data: dict = None) -> dict:
     """카카오 API를 호출합니다."""
     try:
-        async with httpx.AsyncClient() as ac:
-            response = await ac.request(
-                method=method,
-                url=f"{kapi_host}{endpoint}",
-                headers={"Authorization": f"Bearer {data.get('kakao_access_token')}"},
-                data=data
-            )
-            response.raise_for_status()
-            return response.json()
+        ac = get_http_client(KAKAO)
+        response = await ac.request(
+            method=method,
+            url=f"{kapi_host}{endpoint}",
+            headers={"Authorization": f"Bearer {data.get('kakao_access_token')}"},
+            data=data
+        )
+        response.raise_for_status()
+        return response.json()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -481,7 +506,7 @@ async def authorize(request: Request) -> RedirectResponse:
 
 @app.get("/api/redirect")
 @handle_db_operation("로그인")
-async def redirect(request: Request, db: Session = Depends(get_db)) -> JSONResponse:
+async def redirect(request: Request, db: AsyncSession = Depends(get_async_db)) -> JSONResponse:
     """카카오 로그인 콜백 처리"""
     code = request.query_params.get("code")
     if not code:
@@ -500,69 +525,76 @@ async def redirect(request: Request, db: Session = Depends(get_db)) -> JSONRespo
         "code": code,
     }
 
-    async with httpx.AsyncClient() as ac:
-        token_resp = await ac.post(token_url, data=data)
-        token_json = token_resp.json()
-        access_token = token_json.get("access_token")
-
-        if not access_token:
-            logger.error(f"Failed to get access token: {token_json}")
-            return JSONResponse({"error": "Failed to get access token", "detail": token_json}, status_code=400)
-
-        headers = {'Authorization': f'Bearer {access_token}'}
-        profile_resp = await ac.get(f"{kapi_host}/v2/user/me", headers=headers)
-        if profile_resp.status_code != 200:
-            logger.error(f"Failed to get user profile: {profile_resp.status_code} {profile_resp.text}")
-            return JSONResponse({"error": "Failed to get user profile"}, status_code=400)
-
-        profile_data = profile_resp.json()
-        kakao_id = profile_data["id"]
-        nickname = profile_data.get("properties", {}).get("nickname", "")
-        profile_image = profile_data.get("properties", {}).get("profile_image", "")
-
-        # 사용자 정보 저장 또는 업데이트
-        user = db.query(User).filter(User.kakao_id == kakao_id).first()
-        if user:
-            # 기존 사용자의 경우 닉네임과 프로필 이미지만 업데이트
-            user.nickname = nickname
-            user.profile_image = profile_image
-        else:
-            # 새로운 사용자의 경우 created_at 포함하여 생성
-            user = User(
-                kakao_id=kakao_id,
-                nickname=nickname,
-                profile_image=profile_image,
-                created_at=datetime.datetime.now()
-            )
-            db.add(user)
-            logger.info(f"New user added: {user}")
-        db.commit()
+    ac = get_http_client(KAKAO)
+    token_resp = await ac.post(token_url, data=data)
+    token_json = token_resp.json()
+    access_token = token_json.get("access_token")
+    refresh_token = token_json.get("refresh_token")
+
+    if not access_token:
+        logger.error(f"Failed to get access token: {token_json}")
+        return JSONResponse({"error": "Failed to get access token", "detail": token_json}, status_code=400)
+
+    headers = {'Authorization': f'Bearer {access_token}'}
+    profile_resp = await ac.get(f"{kapi_host}/v2/user/me", headers=headers)
+    if profile_resp.status_code != 200:
+        logger.error(f"Failed to get user profile: {profile_resp.status_code} {profile_resp.text}")
+        return JSONResponse({"error": "Failed to get user profile"}, status_code=400)
+
+    profile_data = profile_resp.json()
+    kakao_id = profile_data["id"]
+    nickname = profile_data.get("properties", {}).get("nickname", "")
+    profile_image = profile_data.get("properties", {}).get("profile_image", "")
+
+    # 사용자 정보 저장 또는 업데이트
+    user = await db.get(User, kakao_id)
+    if user:
+        # 기존 사용자의 경우 닉네임과 프로필 이미지만 업데이트
+        user.nickname = nickname
+        user.profile_image = profile_image
+        user.kakao_access_token = access_token
+        if refresh_token:
+            user.kakao_refresh_token = refresh_token
+    else:
+        # 새로운 사용자의 경우 created_at 포함하여 생성
+        user = User(
+            kakao_id=kakao_id,
+            nickname=nickname,
+            profile_image=profile_image,
+            kakao_access_token=access_token,
+            kakao_refresh_token=refresh_token,
+            created_at=datetime.datetime.now()
+        )
+        db.add(user)
+        logger.info(f"New user added: {user}")
+    await db.commit()
+    invalidate_user_context(kakao_id)
 
-        #response = RedirectResponse(url=state)
+    #response = RedirectResponse(url=state)
 
-        jwt_token = create_jwt_token({
-            "sub": repr(kakao_id),
-            "kakao_access_token": access_token,
-            "nickname": nickname,
-            "profile_image": profile_image
-        })
-        logger.info(f"JWT token created: {jwt_token}")
+    jwt_token = create_jwt_token({
+        "sub": repr(kakao_id),
+        "kakao_access_token": access_token,
+        "nickname": nickname,
+        "profile_image": profile_image
+    })
+    logger.info(f"JWT token created: {jwt_token}")
 
-        # return JSONResponse({"token": jwt_token}, status_code=200)
-        # 쿠키저장에 jwt json
+    # return JSONResponse({"token": jwt_token}, status_code=200)
+    # 쿠키저장에 jwt json
 
 
-        response = RedirectResponse(url="https://areono.store/home")
-        response.set_cookie(
-            key="token",
-            value=jwt_token,
-            httponly=True,
-            secure=True,            # JavaScript에서 접근 못 함
-            samesite="None",
-            max_age=60 * 60 * 24 * 1,   # 7일
-            path="/"
-        )
-        return response
+    response = RedirectResponse(url="https://areono.store/home")
+    response.set_cookie(
+        key="token",
+        value=jwt_token,
+        httponly=True,
+        secure=True,            # JavaScript에서 접근 못 함
+        samesite="None",
+        max_age=60 * 60 * 24 * 1,   # 7일
+        path="/"
+    )
+    return response
 
 
 @app.get("/api/profile", response_model=UserResponse)
@@ -578,13 +610,15 @@ async def logout(request: Request):
     data = {'kakao_access_token': payload.get('kakao_access_token')}
 
     await call_kakao_api("/v1/user/logout", data=data)
+    invalidate_user_context(int(payload["sub"].strip("'")), jwt_token)
+    invalidate_user_context(token=request.cookies.get("token"))
 
     response = create_json_response({"message": "Logged out successfully"})
     return delete_jwt_cookie(response)
 
 
 @app.post("/unlink", response_model=MessageResponse)
-async def unlink(request: Request, db: Session = Depends(get_db)):
+async def unlink(request: Request, db: AsyncSession = Depends(get_async_db)):
     jwt_token = await get_jwt_token(request)
     payload = await validate_jwt_token(jwt_token)
     data = {'kakao_access_token': payload.get('kakao_access_token')}
@@ -592,60 +626,146 @@ async def unlink(request: Request, db: Session = Depends(get_db)):
     await call_kakao_api("/v1/user/unlink", data=data)
 
     # 사용자 데이터 삭제
-    user = db.query(User).filter(User.kakao_id == int(payload["sub"].strip("'"))).first()
+    # 삭제 시 연관 객체 처리를 위해 관계를 미리 로드 (비동기 세션에서는 지연 로딩 불가)
+    result = await db.execute(
+        select(User).options(
+            selectinload(User.ingredients),
+            selectinload(User.stars)
+        ).filter(User.kakao_id == int(payload["sub"].strip("'")))
+    )
+    user = result.scalars().first()
     if user:
-        db.delete(user)
-        db.commit()
+        await db.delete(user)
+        await db.commit()
+    invalidate_user_context(int(payload["sub"].strip("'")), jwt_token)
+    invalidate_user_context(token=request.cookies.get("token"))
 
     response = create_json_response({"message": "Account unlinked successfully"})
     return delete_jwt_cookie(response)
 
 
+# 재료 목록 정렬 옵션: 이름 -> (정렬 식, 내림차순 여부). 같은 값은 id 로 순서를 고정
+# 정렬 식은 NULL 이 아니어야 함 (NULL 은 cursor 비교 "> 값" 에 걸리지 않아 페이지에서 빠지거나 목록이 끊김)
+INGREDIENT_SORTS = {
+    "expiring": (Ingredient.limit_date, False),  # 유통기한 임박순 (kakao_id, limit_date 인덱스 사용)
+    "latest": (Ingredient.added_date, True),  # 최근 추가순 (added_date <= now 조건으로 NULL 제외)
+    "name": (func.coalesce(Ingredient.name, ""), False),  # 이름순 (이름이 없는 재료는 맨 앞)
+}
+INGREDIENT_PAGE_SIZE = 100
+INGREDIENT_MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(value: Any, last_id: int) -> str:
+    if isinstance(value, datetime.datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, last_id], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str, column) -> tuple[Any, int]:
+    try:
+        value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if isinstance(column.type, DateTime):
+            value = datetime.datetime.fromisoformat(value)
+        return value, int(last_id)
+    except (ValueError, TypeError):
+        raise create_error_response("잘못된 cursor 입니다", status.HTTP_400_BAD_REQUEST)
+
+
 @app.get("/api/user-ingredients", response_model=IngredientsResponse)
 @handle_db_operation("재료 조회")
 async def get_user_ingredients(
+        sort: Literal["expiring", "latest", "name"] = "expiring",
+        cursor: Optional[str] = None,
+        limit: int = Query(INGREDIENT_PAGE_SIZE, ge=1, le=INGREDIENT_MAX_PAGE_SIZE),
         current_user: UserResponse = Depends(get_current_user),
-        db: Session = Depends(get_db)
-) -> IngredientsResponse:
-    """사용자의 재료 목록을 조회합니다."""
-    ingredients = db.query(Ingredient).options(
-        joinedload(Ingredient.image)
+        db: AsyncSession = Depends(get_async_db)
+) -> FastJSONResponse:
+    """사용자의 재료 목록을 조회합니다 (cursor 기반 페이지네이션, 유통기한 관련 값은 SQL에서 계산).
+
+    행을 바로 dict 로 만들어 orjson 으로 직렬화합니다 (IngredientsResponse 재검증 생략).
+    """
+    now = datetime.datetime.now()
+    sort_column, descending = INGREDIENT_SORTS[sort]
+
+    query = select(
+        Ingredient.id,
+        Ingredient.name,
+        Ingredient.category,
+        Ingredient.added_date,
+        Ingredient.limit_date,
+        Ingredient.image_name,
+        (Ingredient.limit_date < now).label("is_expired"),
+        days_between(now, Ingredient.limit_date).label("days_until_expiry"),
+        sort_column.label("sort_key")
     ).filter(
         Ingredient.kakao_id == current_user.kakao_id,
-        Ingredient.added_date <= datetime.datetime.now(),
-        Ingredient.limit_date >= datetime.datetime.now()
-    ).all()
-
-    return IngredientsResponse(
-        ingredients=[ingredient.to_dict() for ingredient in ingredients]
+        Ingredient.added_date <= now,
+        Ingredient.limit_date >= now
     )
 
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_column)
+        if descending:
+            query = query.filter(or_(sort_column < value, and_(sort_column == value, Ingredient.id < last_id)))
+        else:
+            query = query.filter(or_(sort_column > value, and_(sort_column == value, Ingredient.id > last_id)))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), Ingredient.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Ingredient.id.asc())
+
+    # 다음 페이지 존재 여부 확인을 위해 하나 더 조회
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.sort_key, last.id)
+
+    icon_index = get_icon_index()
+    return FastJSONResponse({
+        "ingredients": [
+            {
+                "id": row.id,
+                "name": row.name,
+                "category": row.category,
+                "added_date": row.added_date,
+                "limit_date": row.limit_date,
+                "is_expired": bool(row.is_expired),
+                "days_until_expiry": int(row.days_until_expiry),
+                "image_url": icon_index.url(row.image_name)
+            }
+            for row in rows
+        ],
+        "next_cursor": next_cursor
+    })
+
 
 @app.post("/api/ingredients", response_model=IngredientResponse)
 @handle_db_operation("재료 추가")
 async def add_ingredient(
         ingredient: IngredientCreate,
         current_user: UserResponse = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ) -> IngredientResponse:
     """새로운 재료를 추가합니다."""
     try:
-        # 재료 이름으로 이미지 찾기
-        image = db.query(Image).filter(Image.name == ingredient.name).first()
+        # 재료 이름으로 이미지 찾기 (인메모리 인덱스, DB 조회 없음)
+        icon_index = get_icon_index()
+        image_name = icon_index.match(ingredient.name)
+        image_url = icon_index.url(image_name)
 
-        image_name = HAN_TO_ENG_ICON_MAP.get(ingredient.name)
-        image_url = f"/static/icons/{image_name}" if image_name else None
-
-        new_ingredient = Ingredient.create(
+        # create 안에서 commit/refresh 까지 처리
+        new_ingredient = await Ingredient.create(
             db=db,
             name=ingredient.name,
             category=ingredient.category,
             added_date=ingredient.added_date,
             kakao_id=current_user.kakao_id,
-            image_name=image.name if image else None
+            image_name=image_name
         )
-        db.commit()
-        db.refresh(new_ingredient)
 
         return IngredientResponse(
             id=int(getattr(new_ingredient, "id")),
@@ -658,42 +778,107 @@ async def add_ingredient(
             image_url=image_url
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise create_error_response(
             f"재료 추가 중 오류가 발생했습니다: {str(e)}",
             status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
 
+@app.post("/api/ingredients/bulk", response_model=IngredientsResponse)
+@handle_db_operation("재료 일괄 추가")
+async def add_ingredients_bulk(
+        payload: IngredientBulkCreate,
+        current_user: UserResponse = Depends(get_current_user),
+        db: AsyncSession = Depends(get_async_db)
+) -> FastJSONResponse:
+    """여러 재료(장보기 목록)를 한 트랜잭션으로 추가하고, 추가된 재료를 입력 순서대로 반환합니다."""
+    created = await insert_ingredients(db, current_user.kakao_id, payload.ingredients, get_icon_index())
+    return FastJSONResponse({"ingredients": created, "next_cursor": None})
+
+
+@app.post("/api/ingredients/from-photo", response_model=PhotoIngredientsResponse)
+@handle_db_operation("사진 재료 인식")
+async def add_ingredients_from_photo(
+        photo: UploadFile = File(...),
+        save: bool = False,
+        category: str = Query("기타", max_length=50),
+        limit: int = Query(10, ge=1, le=30),
+        min_confidence: float = Query(PHOTO_MIN_CONFIDENCE, ge=0, le=1),
+        current_user: UserResponse = Depends(get_current_user),
+        db: AsyncSession = Depends(get_async_db)
+) -> FastJSONResponse:
+    """냉장고/장보기 사진에서 재료를 인식합니다 (로컬 CPU 모델, 동시 요청은 한 번의 forward 로 묶어 처리).
+
+    save 이면 인식한 재료를 일괄 추가 경로(insert_ingredients)로 바로 추가합니다.
+    """
+    if photo_recognizer is None:
+        raise create_error_response("사진 재료 인식을 사용할 수 없습니다", status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    data = await photo.read(PHOTO_MAX_BYTES + 1)
+    if len(data) > PHOTO_MAX_BYTES:
+        raise create_error_response("사진 파일이 너무 큽니다", status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    try:
+        found = await photo_recognizer.recognize(data, limit, min_confidence)
+    except ValueError as e:
+        raise create_error_response(str(e), status.HTTP_400_BAD_REQUEST)
+
+    icon_index = get_icon_index()
+    created = []
+    if save and found:
+        now = datetime.datetime.now()
+        items = [IngredientCreate(name=name, category=category, added_date=now) for name, _, _ in found]
+        created = await insert_ingredients(db, current_user.kakao_id, items, icon_index)
+
+    return FastJSONResponse({
+        "recognized": [
+            {
+                "name": name,
+                "label": label,
+                "confidence": round(confidence, 4),
+                "image_url": icon_index.url(icon_index.match(name))
+            }
+            for name, label, confidence in found
+        ],
+        "ingredients": created
+    })
+
+
 @app.put("/api/ingredients/{ingredient_id}", response_model=IngredientResponse)
 @handle_db_operation("재료 수정")
 async def update_ingredient(
         ingredient_id: int,
         ingredient: IngredientUpdate,
         current_user: UserResponse = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ) -> IngredientResponse:
     """재료 정보를 수정합니다."""
-    db_ingredient = db.query(Ingredient).filter(
-        Ingredient.id == ingredient_id,
-        Ingredient.kakao_id == current_user.kakao_id
-    ).first()
+    result = await db.execute(
+        select(Ingredient).filter(
+            Ingredient.id == ingredient_id,
+            Ingredient.kakao_id == current_user.kakao_id
+        )
+    )
+    db_ingredient = result.scalars().first()
 
     if not db_ingredient:
         raise create_error_response("재료를 찾을 수 없습니다", status.HTTP_404_NOT_FOUND)
 
+    icon_index = get_icon_index()
+
+    if ingredient.name is not None:
+        db_ingredient.name = ingredient.name
+        # 이름이 바뀌면 아이콘도 다시 찾음 (아래에서 이미지 이름을 직접 지정하면 그쪽이 우선)
+        db_ingredient.image_name = icon_index.match(ingredient.name)
+
     # 이미지 이름이 제공된 경우 해당 이미지가 존재하는지 확인
     if ingredient.image_name is not None:
-        image = db.query(Image).filter(Image.name == ingredient.image_name).first()
-        if not image:
+        if ingredient.image_name not in icon_index:
             raise create_error_response(
                 f"이미지 '{ingredient.image_name}'을 찾을 수 없습니다",
                 status.HTTP_400_BAD_REQUEST
             )
         db_ingredient.image_name = ingredient.image_name
-
-    if ingredient.name is not None:
-        db_ingredient.name = ingredient.name
     if ingredient.category is not None:
         db_ingredient.category = ingredient.category
     if ingredient.limit_date is not None:
@@ -701,8 +886,8 @@ async def update_ingredient(
     if ingredient.added_date is not None:
         db_ingredient.added_date = ingredient.added_date
 
-    db.commit()
-    db.refresh(db_ingredient)
+    # 값은 모두 위에서 넣은 것이고 expire_on_commit=False 라 다시 조회(refresh)하지 않음
+    await db.commit()
 
     return IngredientResponse(
         id=ingredient_id,
@@ -712,7 +897,7 @@ async def update_ingredient(
         limit_date=db_ingredient.limit_date,
         is_expired=db_ingredient.is_expired,
         days_until_expiry=db_ingredient.days_until_expiry,
-        image_url=db_ingredient.image.image_url if db_ingredient.image else None
+        image_url=icon_index.url(db_ingredient.image_name)
     )
 
 
@@ -721,55 +906,227 @@ async def update_ingredient(
 async def delete_ingredient(
         ingredient_id: int,
         current_user: UserResponse = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ) -> MessageResponse:
     """재료를 삭제합니다."""
-    db_ingredient = db.query(Ingredient).filter(
-        Ingredient.id == ingredient_id,
-        Ingredient.kakao_id == current_user.kakao_id
-    ).first()
+    result = await db.execute(
+        select(Ingredient).filter(
+            Ingredient.id == ingredient_id,
+            Ingredient.kakao_id == current_user.kakao_id
+        )
+    )
+    db_ingredient = result.scalars().first()
 
     if not db_ingredient:
         raise create_error_response("재료를 찾을 수 없습니다", status.HTTP_404_NOT_FOUND)
 
-    db.delete(db_ingredient)
-    db.commit()
+    await db.delete(db_ingredient)
+    await db.commit()
 
     return MessageResponse(message="재료가 삭제되었습니다")
 
 
-@app.get("/api/recipes", response_model=List[RecipeResponse])
+STARRED_PAGE_SIZE = 30
+STARRED_MAX_PAGE_SIZE = 100
+
+
+def youtube_thumbnail_url(video_id: Optional[str]) -> Optional[str]:
+    """영상 ID로 만든 YouTube 썸네일 주소 (검색 결과의 high 썸네일과 같은 크기)."""
+    if not video_id:
+        return None
+    return f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+
+
+@app.get("/api/recipes", response_model=StarredRecipesResponse)
 @handle_db_operation("레시피 조회")
 async def get_recipes(
+        cursor: Optional[str] = None,
+        limit: int = Query(STARRED_PAGE_SIZE, ge=1, le=STARRED_MAX_PAGE_SIZE),
         current_user: UserResponse = Depends(get_current_user),
-        db: Session = Depends(get_db)
-) -> List[RecipeResponse]:
-    """사용자가 좋아요를 누른 레시피 목록을 조회합니다."""
-    recipes = db.query(Recipe).join(Star).filter(
+        db: AsyncSession = Depends(get_async_db)
+) -> FastJSONResponse:
+    """사용자가 좋아요를 누른 레시피 목록을 최근 좋아요 순으로 조회합니다.
+
+    목록에 필요한 컬럼만 조회하고 (steps/ingredients/seasonings JSON 은 읽지 않음) Star.created_at 기준
+    cursor 로 페이지를 나눕니다. 상세 내용은 /api/recipes/{recipe_id} 에서 조회합니다.
+    """
+    query = select(
+        Recipe.id,
+        Recipe.title,
+        Recipe.subtitle,
+        Recipe.video_id,
+        Star.id.label("star_id"),
+        Star.created_at.label("starred_at")
+    ).join(Star, Star.recipe_id == Recipe.id).filter(
         Star.kakao_id == current_user.kakao_id
-    ).all()
-
-    recipe_list = [
-        RecipeResponse(
-            id=int(getattr(recipe, "id")),
-            title=str(getattr(recipe, "title")),
-            subtitle=str(getattr(recipe, "subtitle")),
-            youtube_link=str(getattr(recipe, "youtube_link")),
-            steps=getattr(recipe, "steps"),
-            ingredients=getattr(recipe, "ingredients"),
-            seasonings=getattr(recipe, "seasonings"),
-            created_at=getattr(recipe, "created_at")
+    )
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, Star.created_at)
+        query = query.filter(or_(Star.created_at < value, and_(Star.created_at == value, Star.id < last_id)))
+
+    # 다음 페이지 존재 여부 확인을 위해 하나 더 조회 ((kakao_id, created_at) 인덱스 사용)
+    query = query.order_by(Star.created_at.desc(), Star.id.desc()).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].starred_at, rows[-1].star_id)
+
+    return FastJSONResponse({
+        "recipes": [
+            {
+                "id": row.id,
+                "title": row.title,
+                "subtitle": row.subtitle,
+                "video_id": row.video_id,
+                "thumbnail_url": youtube_thumbnail_url(row.video_id),
+                "starred_at": row.starred_at
+            }
+            for row in rows
+        ],
+        "next_cursor": next_cursor
+    })
+
+
+RECOMMEND_MAX_LIMIT = 50
+
+
+@app.get("/api/recipes/recommend", response_model=RecommendationsResponse)
+@handle_db_operation("레시피 추천")
+async def recommend_recipes(
+        limit: int = Query(10, ge=1, le=RECOMMEND_MAX_LIMIT),
+        prefer_expiring: bool = False,
+        current_user: UserResponse = Depends(get_current_user),
+        db: AsyncSession = Depends(get_async_db)
+) -> FastJSONResponse:
+    """보유 재료로 만들 수 있는 저장된 레시피를 추천합니다 (외부 검색 없이 인메모리 색인 사용).
+
+    prefer_expiring 이면 유통기한이 임박한 재료에 가중치를 준 점수(양념 포함)로 순위를 매깁니다.
+    """
+    now = datetime.datetime.now()
+    result = await db.execute(
+        select(
+            Ingredient.name,
+            Ingredient.image_name,
+            days_between(now, Ingredient.limit_date).label("days_until_expiry")
+        ).filter(
+            Ingredient.kakao_id == current_user.kakao_id,
+            Ingredient.added_date <= now,
+            Ingredient.limit_date >= now
         )
-        for recipe in recipes
-    ]
-    return recipe_list
+    )
+    # 아이콘이 연결된 재료는 카탈로그 이름이 곧 비교용 키
+    weights = {}
+    for row in result.all():
+        key = row.image_name or ingredient_key(row.name)
+        if key:
+            weights[key] = max(weights.get(key, 0.0), pantry_weight(row.days_until_expiry))
+
+    await sync_recipe_index(db)
+    if prefer_expiring:
+        recommendations = [
+            explain(recipe_index.get(recipe_id), set(weights), score)
+            for recipe_id, score in recipe_scorer.top_k(weights, limit)
+            if recipe_index.get(recipe_id)
+        ]
+    else:
+        recommendations = recipe_index.recommend(weights, limit)
+
+    return FastJSONResponse({
+        "recipes": [
+            {
+                "id": rec.recipe.id,
+                "title": rec.recipe.title,
+                "subtitle": rec.recipe.subtitle,
+                "youtube_link": rec.recipe.youtube_link,
+                "video_id": rec.recipe.video_id,
+                "score": round(float(rec.score), 4),
+                "matched_ingredients": rec.matched,
+                "missing_ingredients": rec.missing
+            }
+            for rec in recommendations
+        ]
+    })
+
+
+RECIPE_SEARCH_MAX_LIMIT = 50
+
+
+@app.get("/api/recipes/search", response_model=RecipeSearchResponse)
+@handle_db_operation("레시피 검색")
+async def search_recipes(
+        q: str = Query(..., min_length=1, max_length=100),
+        mode: Literal["keyword", "semantic"] = "keyword",
+        limit: int = Query(10, ge=1, le=RECIPE_SEARCH_MAX_LIMIT),
+        db: AsyncSession = Depends(get_async_db)
+) -> FastJSONResponse:
+    """저장된 레시피를 검색합니다 (외부 API 호출 없음).
+
+    - keyword: 제목/부제/재료/양념/조리 과정의 글자 bigram 색인으로 검색, 접두어 일치 지원 (score: BM25)
+    - semantic: 자유 문장("매콤한 국물 요리")을 문장 임베딩 모델(EMBEDDING_MODEL)로 검색 (score: 코사인 유사도).
+      모델이 설정되지 않은 서버에서는 503
+    """
+    if mode == "semantic" and recipe_vectors is None:
+        raise create_error_response("의미 검색을 사용할 수 없습니다", status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    await sync_recipe_index(db)
+    if mode == "keyword":
+        hits = recipe_text_index.search(q, limit)
+    else:
+        query_vector = (await asyncio.to_thread(recipe_encoder.encode, [q]))[0]
+        hits = await asyncio.to_thread(recipe_vectors.search, query_vector, limit)
+
+    results = []
+    for recipe_id, score in hits:
+        recipe = recipe_index.get(recipe_id)
+        if recipe:
+            results.append({
+                "id": recipe.id,
+                "title": recipe.title,
+                "subtitle": recipe.subtitle,
+                "youtube_link": recipe.youtube_link,
+                "video_id": recipe.video_id,
+                "score": round(score, 4)
+            })
+    return FastJSONResponse({"recipes": results})
+
+
+@app.get("/api/recipes/popular", response_model=PopularRecipesResponse)
+@handle_db_operation("인기 레시피 조회")
+async def popular_recipes(
+        window: Literal["all", "24h", "7d"] = "all",
+        limit: int = Query(10, ge=1, le=POPULAR_CAPACITY),
+        db: AsyncSession = Depends(get_async_db)
+) -> FastJSONResponse:
+    """좋아요가 많은 레시피 순위 (window: 전체, 최근 24시간, 최근 7일).
+
+    요청마다 stars 를 집계하지 않고 메모리의 상위 K 순위를 사용합니다 (popularity.py).
+    """
+    await sync_recipe_index(db)
+    recipes = []
+    # 순위에는 있지만 색인에 없는(삭제된) 레시피는 건너뜀
+    for recipe_id, stars in await star_counter.top(window, POPULAR_CAPACITY):
+        recipe = recipe_index.get(recipe_id)
+        if recipe:
+            recipes.append({
+                "id": recipe.id,
+                "title": recipe.title,
+                "subtitle": recipe.subtitle,
+                "youtube_link": recipe.youtube_link,
+                "video_id": recipe.video_id,
+                "star_count": stars
+            })
+            if len(recipes) == limit:
+                break
+    return FastJSONResponse({"window": window, "recipes": recipes})
 
 
 @app.get("/api/recipes/{recipe_id}", response_model=RecipeResponse)
 @handle_db_operation("레시피 조회")
-async def get_recipe_detail(recipe_id: int, db: Session = Depends(get_db)) -> RecipeResponse:
+async def get_recipe_detail(recipe_id: int, db: AsyncSession = Depends(get_async_db)) -> RecipeResponse:
     """특정 레시피의 상세 정보를 조회합니다."""
-    recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
+    recipe = await db.get(Recipe, recipe_id)
     if not recipe:
         raise create_error_response("레시피를 찾을 수 없습니다", status.HTTP_404_NOT_FOUND)
 
@@ -790,55 +1147,49 @@ async def get_recipe_detail(recipe_id: int, db: Session = Depends(get_db)) -> Re
 async def toggle_star(
         recipe_id: int,
         current_user: UserResponse = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ) -> StarResponse:
-    """레시피에 좋아요를 토글합니다."""
+    """레시피에 좋아요를 토글합니다.
+
+    (recipe_id, kakao_id) 키로 먼저 삭제하고, 지운 행이 없으면 추가합니다. 레시피 존재 여부는 별도로
+    조회하지 않고 외래키 제약으로 확인하며, 동시에 눌린 요청이 먼저 추가한 경우에는 좋아요 상태로 응답합니다.
+    MySQL 에서 없는 행을 지우면 갭 잠금이 걸려 동시에 누른 두 요청이 교착 상태가 될 수 있으므로,
+    교착 상태로 되돌려진 트랜잭션은 다시 실행합니다.
+    """
+    for attempt in range(TRANSACTION_RETRIES):
+        try:
+            return await _toggle_star(db, recipe_id, current_user.kakao_id)
+        except OperationalError as e:
+            await db.rollback()
+            if attempt == TRANSACTION_RETRIES - 1 or not is_retryable_error(e):
+                raise
+            logger.info(f"좋아요 처리 교착 상태, 다시 시도 ({attempt + 1}/{TRANSACTION_RETRIES}): recipe_id={recipe_id}")
+
+
+async def _toggle_star(db: AsyncSession, recipe_id: int, kakao_id: int) -> StarResponse:
+    deleted = await db.execute(
+        delete(Star).where(Star.recipe_id == recipe_id, Star.kakao_id == kakao_id)
+    )
+    if deleted.rowcount:
+        await db.commit()
+        star_counter.record(recipe_id, -1)
+        return StarResponse(recipe_id=recipe_id, kakao_id=kakao_id, starred=False)
+
+    created_at = datetime.datetime.now()
     try:
-        # 레시피가 존재하는지 확인
-        recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
-        if not recipe:
+        await db.execute(insert(Star).values(recipe_id=recipe_id, kakao_id=kakao_id, created_at=created_at))
+        await db.commit()
+        star_counter.record(recipe_id, 1)
+    except IntegrityError:
+        await db.rollback()
+        # 외래키 위반(레시피 없음)과 중복(동시 요청이 먼저 추가)을 구분
+        if await db.get(Recipe, recipe_id) is None:
             raise create_error_response("레시피를 찾을 수 없습니다", status.HTTP_404_NOT_FOUND)
-
-        # 이미 좋아요를 눌렀는지 확인
-        existing_star = db.query(Star).filter(
-            Star.recipe_id == recipe.id,
-            Star.kakao_id == current_user.kakao_id
-        ).first()
-
-        if existing_star:
-            # 좋아요 취소
-            star_data = StarResponse(
-                recipe_id=int(getattr(existing_star, "recipe_id")),
-                kakao_id=int(getattr(existing_star, "kakao_id")),
-                created_at=getattr(existing_star, "created_at")
-            )
-            db.delete(existing_star)
-            db.commit()
-            return star_data
-        else:
-            # 좋아요 추가
-            new_star = Star(
-                recipe_id=int(getattr(recipe, "id")),
-                kakao_id=current_user.kakao_id,
-                created_at=datetime.datetime.now()
-            )
-            db.add(new_star)
-            try:
-                db.commit()
-                db.refresh(new_star)
-                return StarResponse(
-                    recipe_id=int(getattr(new_star, "recipe_id")),
-                    kakao_id=int(getattr(new_star, "kakao_id")),
-                    created_at=getattr(new_star, "created_at")
-                )
-            except IntegrityError:
-                db.rollback()
-                raise create_error_response("이미 좋아요를 누른 레시피입니다", status.HTTP_400_BAD_REQUEST)
-    except HTTPException:
-        raise
-    except Exception as e:
-        db.rollback()
-        raise create_error_response(f"좋아요 처리 중 오류가 발생했습니다: {str(e)}", status.HTTP_500_INTERNAL_SERVER_ERROR)
+        result = await db.execute(
+            select(Star.created_at).where(Star.recipe_id == recipe_id, Star.kakao_id == kakao_id)
+        )
+        created_at = result.scalar_one_or_none() or created_at
+    return StarResponse(recipe_id=recipe_id, kakao_id=kakao_id, starred=True, created_at=created_at)
 
 
 async def search_youtube_video(query: str) -> List[dict]:
@@ -860,121 +1211,212 @@ async def search_youtube_video(query: str) -> List[dict]:
             "order": "relevance"  # 관련성 순으로 정렬
         }
 
-        async with httpx.AsyncClient() as ac:
-            response = await ac.get(url, params=params)
-            response.raise_for_status()
+        # 정규화한 검색어와 검색 조건으로 캐시 조회 (API 키는 제외)
+        cache_key = json.dumps(
+            {**{k: v for k, v in params.items() if k != "key"}, "q": normalize_query(query)},
+            ensure_ascii=False,
+            sort_keys=True
+        )
+        cached = youtube_search_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
+        ac = get_http_client(YOUTUBE)
+        response = await ac.get(url, params=params)
+        response.raise_for_status()
 
+        try:
+            data = response.json()
+        except json.JSONDecodeError as e:
+            raise ValueError(f"YouTube API 응답을 파싱할 수 없습니다: {str(e)}")
+
+        if "error" in data:
+            error_message = data["error"].get("message", "Unknown error")
+            raise ValueError(f"YouTube API 오류: {error_message}")
+
+        if "items" not in data or not data["items"]:
+            youtube_search_cache.set(cache_key, [])
+            return []
+
+        results = []
+        for item in data["items"]:
             try:
-                data = response.json()
-            except json.JSONDecodeError as e:
-                raise ValueError(f"YouTube API 응답을 파싱할 수 없습니다: {str(e)}")
-
-            if "error" in data:
-                error_message = data["error"].get("message", "Unknown error")
-                raise ValueError(f"YouTube API 오류: {error_message}")
-
-            if "items" not in data or not data["items"]:
-                return []
-
-            results = []
-            for item in data["items"]:
-                try:
-                    if not isinstance(item, dict):
-                        continue
-
-                    video_id = item.get("id", {}).get("videoId")
-                    snippet = item.get("snippet", {})
-                    thumbnails = snippet.get("thumbnails", {})
-                    high_thumbnail = thumbnails.get("high", {})
-
-                    if not all([video_id, snippet, high_thumbnail]):
-                        continue
-
-                    video_data = {
-                        "video_id": video_id,
-                        "title": snippet.get("title", ""),
-                        "thumbnail": high_thumbnail.get("url", ""),
-                        "url": f"https://www.youtube.com/watch?v={video_id}",
-                    }
-
-                    # 필수 필드가 모두 있는지 확인
-                    if all(video_data.values()):
-                        results.append(video_data)
-                except Exception as e:
+                if not isinstance(item, dict):
                     continue
 
-            return results
+                video_id = item.get("id", {}).get("videoId")
+                snippet = item.get("snippet", {})
+                thumbnails = snippet.get("thumbnails", {})
+                high_thumbnail = thumbnails.get("high", {})
+
+                if not all([video_id, snippet, high_thumbnail]):
+                    continue
+
+                video_data = {
+                    "video_id": video_id,
+                    "title": snippet.get("title", ""),
+                    "thumbnail": high_thumbnail.get("url", ""),
+                    "url": f"https://www.youtube.com/watch?v={video_id}",
+                }
+
+                # 필수 필드가 모두 있는지 확인
+                if all(video_data.values()):
+                    results.append(video_data)
+            except Exception as e:
+                continue
+
+        youtube_search_cache.set(cache_key, results)
+        return list(results)
 
     except Exception as e:
         raise ValueError(f"YouTube 검색 중 오류 발생: {str(e)}")
 
 
-async def get_video_metadata(video_url: str) -> dict:
-    """YouTube API를 사용하여 비디오의 메타데이터를 가져옵니다."""
-    try:
-        if not YOUTUBE_API_KEY:
-            raise ValueError("YouTube API 키가 설정되지 않았습니다.")
+async def search_youtube_videos_concurrently(queries: List[str], limit: int = MAX_RECIPE_VIDEOS) -> List[dict]:
+    """여러 검색어를 동시에 검색해 중복 없이 합치고, limit개가 모이면 남은 검색을 취소합니다.
 
-        # URL에서 video_id 추출
-        if "youtube.com/watch?v=" in video_url:
-            video_id = video_url.split("watch?v=")[-1].split("&")[0]
-        elif "youtube.com/shorts/" in video_url:
-            video_id = video_url.split("shorts/")[-1].split("?")[0]
+    일부 검색이 실패해도 나머지 결과를 반환하며, 모든 검색이 실패한 경우에만 예외를 발생시킵니다.
+    """
+    semaphore = asyncio.Semaphore(YOUTUBE_SEARCH_CONCURRENCY)
+
+    async def search(query: str) -> List[dict]:
+        async with semaphore:
+            return await search_youtube_video(query)
+
+    tasks = [asyncio.create_task(search(query)) for query in queries]
+    unique_videos = []
+    seen_urls = set()
+    errors = []
+    try:
+        for future in asyncio.as_completed(tasks):
+            try:
+                videos = await future
+            except Exception as e:
+                logger.warning(f"YouTube 검색 일부 실패: {e}")
+                errors.append(e)
+                continue
+
+            for video in videos:
+                if video["url"] not in seen_urls:
+                    seen_urls.add(video["url"])
+                    unique_videos.append(video)
+                if len(unique_videos) >= limit:
+                    return unique_videos
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if not unique_videos and errors and len(errors) == len(tasks):
+        raise errors[-1]
+    return unique_videos
+
+
+async def fetch_video_snippets(video_ids: List[str]) -> dict:
+    """videos.list로 여러 영상의 메타데이터를 한 번에 가져옵니다 (호출당 최대 50개, 캐시 우선)."""
+    if not YOUTUBE_API_KEY:
+        raise ValueError("YouTube API 키가 설정되지 않았습니다.")
+
+    snippets = {}
+    missing_ids = []
+    for video_id in dict.fromkeys(video_ids):
+        cached = video_metadata_cache.get(video_id)
+        if cached is not None:
+            snippets[video_id] = cached
         else:
-            raise ValueError(f"지원하지 않는 YouTube URL 형식입니다: {video_url}")
+            missing_ids.append(video_id)
 
-        url = "https://www.googleapis.com/youtube/v3/videos"
+    url = "https://www.googleapis.com/youtube/v3/videos"
+    ac = get_http_client(YOUTUBE)
+    for i in range(0, len(missing_ids), YOUTUBE_VIDEOS_BATCH_SIZE):
         params = {
             "part": "snippet",
-            "id": video_id,
+            "id": ",".join(missing_ids[i:i + YOUTUBE_VIDEOS_BATCH_SIZE]),
             "key": YOUTUBE_API_KEY
         }
+        response = await ac.get(url, params=params)
+        response.raise_for_status()
 
-        async with httpx.AsyncClient() as ac:
-            response = await ac.get(url, params=params)
-            response.raise_for_status()
-
-            try:
-                data = response.json()
-            except json.JSONDecodeError as e:
-                raise ValueError(f"YouTube API 응답을 파싱할 수 없습니다: {str(e)}")
-
-            if "error" in data:
-                error_message = data["error"].get("message", "Unknown error")
-                raise ValueError(f"YouTube API 오류: {error_message}")
+        try:
+            data = response.json()
+        except json.JSONDecodeError as e:
+            raise ValueError(f"YouTube API 응답을 파싱할 수 없습니다: {str(e)}")
 
-            if "items" not in data or not data["items"]:
-                raise ValueError(f"비디오를 찾을 수 없습니다. (ID: {video_id})")
+        if "error" in data:
+            error_message = data["error"].get("message", "Unknown error")
+            raise ValueError(f"YouTube API 오류: {error_message}")
 
-            item = data["items"][0].get("snippet", {})
-            if not item:
-                raise ValueError("비디오 정보가 올바르지 않습니다.")
+        for item in data.get("items", []):
+            snippet = item.get("snippet", {})
+            if not item.get("id") or not snippet:
+                continue
 
             metadata = {
-                "title": item.get("title", ""),
-                "description": item.get("description", ""),
-                "tags": item.get("tags", []),
-                "url": video_url
+                "title": snippet.get("title", ""),
+                "description": snippet.get("description", ""),
+                "tags": snippet.get("tags", [])
             }
+            video_metadata_cache.set(item["id"], metadata)
+            snippets[item["id"]] = metadata
 
-            # 필수 필드 검증
-            if not metadata["title"]:
-                raise ValueError("비디오 제목을 찾을 수 없습니다.")
+    return snippets
 
-            return metadata
 
+async def prefetch_video_metadata(video_ids: List[str]):
+    """검색 결과 영상들의 메타데이터를 미리 캐시에 채웁니다 (응답 후 백그라운드 실행)."""
+    try:
+        await fetch_video_snippets(video_ids)
     except Exception as e:
-        raise ValueError(f"비디오 메타데이터 가져오기 실패: {str(e)}")
+        logger.warning(f"비디오 메타데이터 미리 가져오기 실패: {e}")
 
-async def generate_recipe_with_gpt(video_url: str) -> dict:
-    """GPT API를 사용하여 YouTube 영상의 레시피를 분석하고 생성합니다."""
+
+async def get_video_metadata(video_url: str) -> dict:
+    """YouTube API를 사용하여 비디오의 메타데이터를 가져옵니다."""
     try:
-        # 비디오 메타데이터 가져오기
-        metadata = await get_video_metadata(video_url)
-        if not metadata:
-            raise ValueError("비디오 정보를 가져올 수 없습니다.")
+        # URL에서 video_id 추출
+        video_id = extract_video_id(video_url)
 
-        prompt = f"""다음 YouTube 영상의 정보를 바탕으로 요리 레시피를 생성해주세요.
+        snippets = await fetch_video_snippets([video_id])
+        if video_id not in snippets:
+            raise ValueError(f"비디오를 찾을 수 없습니다. (ID: {video_id})")
+
+        metadata = {
+            **snippets[video_id],
+            "url": video_url
+        }
+
+        # 필수 필드 검증
+        if not metadata["title"]:
+            raise ValueError("비디오 제목을 찾을 수 없습니다.")
+
+        return metadata
+
+    except Exception as e:
+        raise ValueError(f"비디오 메타데이터 가져오기 실패: {str(e)}")
+
+GPT_MODEL = "gpt-4.1"
+GPT_COMPLETION_PARAMS = {
+    "temperature": 0.3,
+    "max_tokens": 2000,
+    "response_format": {"type": "json_object"}
+}
+
+# (공유 HTTP 클라이언트, 그 위에 만든 OpenAI 클라이언트)
+_openai_clients: dict = {}
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """공유 HTTP 클라이언트를 사용하는 비동기 OpenAI 클라이언트를 반환합니다."""
+    http_client = get_http_client(OPENAI)
+    # 종료 훅에서 공유 클라이언트가 닫혔다가 다시 만들어진 경우 새로 생성
+    if _openai_clients.get("http") is not http_client:
+        _openai_clients["http"] = http_client
+        _openai_clients["openai"] = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client)
+    return _openai_clients["openai"]
+
+
+def build_recipe_messages(metadata: dict, video_url: str) -> List[ChatCompletionMessageParam]:
+    """비디오 메타데이터로 GPT 요청 메시지를 구성합니다."""
+    prompt = f"""다음 YouTube 영상의 정보를 바탕으로 요리 레시피를 생성해주세요.
 
 영상 제목: {metadata['title']}
 영상 설명: {metadata['description']}
@@ -1004,89 +1446,222 @@ async def generate_recipe_with_gpt(video_url: str) -> dict:
     }}
 }}"""
 
-        system_message: ChatCompletionSystemMessageParam = {
-            "role": "system",
-            "content": """당신은 한국 요리 전문가입니다.
+    system_message: ChatCompletionSystemMessageParam = {
+        "role": "system",
+        "content": """당신은 한국 요리 전문가입니다.
 주어진 YouTube 영상의 정보를 바탕으로 상세한 요리 레시피를 생성해주세요.
 모든 설명은 반드시 한국어로 작성해주세요.
 레시피는 실용적이고 따라하기 쉬워야 합니다.
 영상의 제목, 설명, 태그를 바탕으로 재료와 양념을 정확히 파악하고 설명해주세요.
 반드시 요청된 JSON 형식을 정확히 지켜주세요.
 다른 설명이나 텍스트는 포함하지 마세요."""
-        }
-        user_message: ChatCompletionUserMessageParam = {
-            "role": "user",
-            "content": prompt
-        }
-        messages: List[ChatCompletionMessageParam] = [system_message, user_message]
-
-        response = client.chat.completions.create(
-            model="gpt-4.1",
-            messages=messages,
-            temperature=0.3,
-            max_tokens=2000,
-            response_format={ "type": "json_object" }
-        )
+    }
+    user_message: ChatCompletionUserMessageParam = {
+        "role": "user",
+        "content": prompt
+    }
+    return [system_message, user_message]
 
-        content = response.choices[0].message.content.strip()
 
-        try:
-            recipe_data = json.loads(content)
-            if not isinstance(recipe_data, dict) or "recipe" not in recipe_data:
-                raise ValueError("Invalid recipe data format: missing 'recipe' key")
-
-            recipe = recipe_data["recipe"]
-            required_fields = ["title", "subtitle", "steps", "ingredients", "seasonings", "youtube_url"]
-            missing_fields = [field for field in required_fields if field not in recipe]
-            if missing_fields:
-                raise ValueError(f"Missing required fields in recipe: {', '.join(missing_fields)}")
-
-            # 한국어 검증 로직
-            def contains_korean(text):
-                return any(ord('가') <= ord(c) <= ord('힣') for c in text)
-
-            if not contains_korean(recipe["title"]):
-                raise ValueError("Recipe title must contain Korean characters")
-
-            # 단계 설명 검증
-            if len(recipe["steps"]) < 3:
-                raise ValueError("Recipe must have at least 3 steps")
-
-            for step in recipe["steps"]:
-                if not contains_korean(step):
-                    raise ValueError("Recipe steps must be in Korean")
-                if len(step) < 20:
-                    raise ValueError("Recipe step description must be at least 20 characters")
-
-            return {
-                "status": "success",
-                "recipe": recipe
-            }
+def parse_recipe_content(content: str) -> dict:
+    """GPT 응답 본문을 파싱하고 레시피 형식을 검증합니다."""
+    try:
+        recipe_data = json.loads(content.strip())
+        if not isinstance(recipe_data, dict) or "recipe" not in recipe_data:
+            raise ValueError("Invalid recipe data format: missing 'recipe' key")
+
+        recipe = recipe_data["recipe"]
+        required_fields = ["title", "subtitle", "steps", "ingredients", "seasonings", "youtube_url"]
+        missing_fields = [field for field in required_fields if field not in recipe]
+        if missing_fields:
+            raise ValueError(f"Missing required fields in recipe: {', '.join(missing_fields)}")
+
+        # 한국어 검증 로직
+        def contains_korean(text):
+            return any(ord('가') <= ord(c) <= ord('힣') for c in text)
+
+        if not contains_korean(recipe["title"]):
+            raise ValueError("Recipe title must contain Korean characters")
+
+        # 단계 설명 검증
+        if len(recipe["steps"]) < 3:
+            raise ValueError("Recipe must have at least 3 steps")
+
+        for step in recipe["steps"]:
+            if not contains_korean(step):
+                raise ValueError("Recipe steps must be in Korean")
+            if len(step) < 20:
+                raise ValueError("Recipe step description must be at least 20 characters")
+
+        return recipe
+
+    except json.JSONDecodeError as e:
+        raise ValueError(f"GPT API 응답을 파싱할 수 없습니다: {str(e)}")
+    except ValueError as e:
+        raise ValueError(f"레시피 데이터 형식이 올바르지 않습니다: {str(e)}")
 
-        except json.JSONDecodeError as e:
-            raise ValueError(f"GPT API 응답을 파싱할 수 없습니다: {str(e)}")
-        except ValueError as e:
-            raise ValueError(f"레시피 데이터 형식이 올바르지 않습니다: {str(e)}")
+
+async def generate_recipe_with_gpt(video_url: str) -> dict:
+    """GPT API를 사용하여 YouTube 영상의 레시피를 분석하고 생성합니다."""
+    try:
+        # 비디오 메타데이터 가져오기
+        metadata = await get_video_metadata(video_url)
+        if not metadata:
+            raise ValueError("비디오 정보를 가져올 수 없습니다.")
+
+        response = await get_openai_client().chat.completions.create(
+            model=GPT_MODEL,
+            messages=build_recipe_messages(metadata, video_url),
+            **GPT_COMPLETION_PARAMS
+        )
+
+        recipe = parse_recipe_content(response.choices[0].message.content)
+        return {
+            "status": "success",
+            "recipe": recipe
+        }
 
     except Exception as e:
         raise ValueError(f"레시피 생성 중 오류가 발생했습니다: {str(e)}")
 
+
+async def stream_recipe_with_gpt(messages: List[ChatCompletionMessageParam]) -> AsyncIterator[str]:
+    """GPT 응답을 스트리밍으로 받아 텍스트 조각 단위로 반환합니다."""
+    stream = await get_openai_client().chat.completions.create(
+        model=GPT_MODEL,
+        messages=messages,
+        stream=True,
+        **GPT_COMPLETION_PARAMS
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+async def save_generated_recipe(db: AsyncSession, recipe: dict, video_id: Optional[str] = None) -> Recipe:
+    """GPT로 생성한 레시피를 저장합니다."""
+    new_recipe = Recipe(
+        title=recipe["title"],
+        subtitle=recipe["subtitle"],
+        youtube_link=recipe["youtube_url"],
+        video_id=video_id,
+        steps=recipe["steps"],
+        ingredients=recipe["ingredients"],
+        seasonings=recipe["seasonings"],
+        created_at=datetime.datetime.now()
+    )
+    db.add(new_recipe)
+    await db.commit()
+    await db.refresh(new_recipe)
+    recipe_index.add_recipe(new_recipe)
+    recipe_scorer.add_recipe(new_recipe)
+    recipe_scorer.schedule_compaction()
+    recipe_text_index.add_recipe(new_recipe)
+    await index_recipes_for_search([new_recipe])
+    return new_recipe
+
+
+async def find_recipe_by_video_id(db: AsyncSession, video_id: str) -> Optional[Recipe]:
+    """영상 ID로 이미 생성된 레시피를 조회합니다."""
+    result = await db.execute(select(Recipe).filter(Recipe.video_id == video_id))
+    return result.scalars().first()
+
+
+def stored_recipe_to_dict(recipe: Recipe) -> dict:
+    """저장된 레시피를 GPT 생성 결과와 같은 형태로 변환합니다."""
+    return {
+        "title": recipe.title,
+        "subtitle": recipe.subtitle,
+        "steps": recipe.steps,
+        "ingredients": recipe.ingredients,
+        "seasonings": recipe.seasonings,
+        "youtube_url": recipe.youtube_link,
+        "id": recipe.id
+    }
+
+
+async def is_recipe_starred(db: AsyncSession, recipe_id: int, kakao_id: int) -> bool:
+    result = await db.execute(
+        select(Star.id).filter(Star.recipe_id == recipe_id, Star.kakao_id == kakao_id)
+    )
+    return result.first() is not None
+
+
+async def generate_recipe_events(video_url: str, video_id: str) -> AsyncIterator[dict]:
+    """영상의 레시피를 GPT 스트리밍으로 생성해 저장하며, 파싱된 항목을 이벤트로 냅니다.
+
+    마지막 이벤트는 {"type": "done", "recipe": {...}} 입니다 (is_starred 는 요청마다 붙임).
+    이미 저장된 레시피가 있으면 GPT 호출 없이 done 이벤트 하나만 냅니다.
+    """
+    # 여러 요청이 공유하는 작업이므로 요청 스코프가 아닌 별도 세션 사용 (GPT 응답을 기다리는 동안은 닫아 둠)
+    async with AsyncSessionLocal() as db:
+        existing = await find_recipe_by_video_id(db, video_id)
+    if existing:
+        yield {"type": "done", "recipe": stored_recipe_to_dict(existing)}
+        return
+
+    metadata = await get_video_metadata(video_url)
+    parser = RecipeStreamParser()
+    content_parts = []
+    async for text in stream_recipe_with_gpt(build_recipe_messages(metadata, video_url)):
+        content_parts.append(text)
+        for path, value in parser.feed(text):
+            if len(path) == 2 and path[1] in ("title", "subtitle"):
+                yield {"type": "field", "field": path[1], "value": value}
+            elif len(path) == 3 and path[1] in ("steps", "ingredients", "seasonings"):
+                yield {"type": "item", "field": path[1], "index": path[2], "value": value}
+
+    recipe = parse_recipe_content("".join(content_parts))
+    async with AsyncSessionLocal() as db:
+        try:
+            new_recipe = await save_generated_recipe(db, recipe, video_id)
+            recipe = {**recipe, "id": new_recipe.id}
+        except IntegrityError:
+            # 다른 워커 프로세스가 같은 영상의 레시피를 먼저 저장한 경우
+            await db.rollback()
+            existing = await find_recipe_by_video_id(db, video_id)
+            if not existing:
+                raise
+            recipe = stored_recipe_to_dict(existing)
+    yield {"type": "done", "recipe": recipe}
+
+
+# 같은 영상에 대한 동시 생성 요청(일반/스트리밍)을 하나의 GPT 호출로 합침
+recipe_generation_flight = StreamFlight()
+
+
+def join_recipe_generation(video_url: str, video_id: str) -> AsyncIterator[dict]:
+    """같은 영상의 진행 중인 생성에 합류하거나 새로 시작합니다 (이미 나온 이벤트부터 받음)."""
+    return recipe_generation_flight.join(video_id, lambda: generate_recipe_events(video_url, video_id))
+
+
+async def generate_and_store_recipe(video_url: str, video_id: str) -> dict:
+    """영상의 레시피를 생성해 저장하고 반환합니다. 이미 저장되었거나 생성 중이면 그 결과를 사용합니다."""
+    async for event in join_recipe_generation(video_url, video_id):
+        if event["type"] == "done":
+            return event["recipe"]
+    raise ValueError("레시피 상세 정보를 생성할 수 없습니다.")
+
 @app.post("/api/generate-recipe")
 @handle_db_operation("레시피 생성")
 async def generate_recipe(
+        background_tasks: BackgroundTasks,
         current_user: UserResponse = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """사용자의 보유 재료로 레시피를 생성합니다."""
     try:
         # 사용자의 재료 목록 조회
-        ingredients = db.query(Ingredient).options(
-            joinedload(Ingredient.image)
-        ).filter(
-            Ingredient.kakao_id == current_user.kakao_id,
-            Ingredient.added_date <= datetime.datetime.now(),
-            Ingredient.limit_date >= datetime.datetime.now()
-        ).all()
+        result = await db.execute(
+            select(Ingredient).options(
+                joinedload(Ingredient.image)
+            ).filter(
+                Ingredient.kakao_id == current_user.kakao_id,
+                Ingredient.added_date <= datetime.datetime.now(),
+                Ingredient.limit_date >= datetime.datetime.now()
+            )
+        )
+        ingredients = result.scalars().all()
 
         if not ingredients:
             raise create_error_response(
@@ -1097,27 +1672,15 @@ async def generate_recipe(
         # 사용자의 재료 이름 목록
         ingredient_names = [str(getattr(ing, "name")) for ing in ingredients]
 
-        # 1. YouTube 검색 결과 가져오기
-        youtube_queries = [
-            f"{ingredient_names[0]} 요리 레시피",
-            f"{ingredient_names[0]} {ingredient_names[1]} 요리",
-            f"{ingredient_names[0]} {ingredient_names[1]} {ingredient_names[2]} 요리"
-        ]
+        # 1. YouTube 검색 결과 가져오기 (재료가 3개 미만이어도 가능한 검색어만 사용)
+        youtube_queries = [f"{ingredient_names[0]} 요리 레시피"]
+        if len(ingredient_names) >= 2:
+            youtube_queries.append(f"{ingredient_names[0]} {ingredient_names[1]} 요리")
+        if len(ingredient_names) >= 3:
+            youtube_queries.append(f"{ingredient_names[0]} {ingredient_names[1]} {ingredient_names[2]} 요리")
 
-        all_videos = []
-        for query in youtube_queries:
-            videos = await search_youtube_video(query)
-            all_videos.extend(videos)
-
-        # 중복 제거 및 최대 5개로 제한
-        unique_videos = []
-        seen_urls = set()
-        for video in all_videos:
-            if video["url"] not in seen_urls:
-                seen_urls.add(video["url"])
-                unique_videos.append(video)
-            if len(unique_videos) >= 5:
-                break
+        # 동시에 검색하고 중복 제거 후 최대 5개가 모이면 바로 반환
+        unique_videos = await search_youtube_videos_concurrently(youtube_queries)
 
         if not unique_videos:
             raise create_error_response(
@@ -1125,6 +1688,9 @@ async def generate_recipe(
                 status.HTTP_404_NOT_FOUND
             )
 
+        # 사용자가 영상을 고르는 동안 메타데이터를 한 번에 미리 받아 둠
+        background_tasks.add_task(prefetch_video_metadata, [video["video_id"] for video in unique_videos])
+
         return {
             "status": "success",
             "message": "YouTube 검색 결과",
@@ -1134,7 +1700,7 @@ async def generate_recipe(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise create_error_response(
             f"레시피 생성 중 오류가 발생했습니다: {str(e)}",
             status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1145,54 +1711,98 @@ async def generate_recipe(
 async def generate_recipe_details(
         video_url: str,
         current_user: UserResponse = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """선택된 YouTube 영상에 대한 레시피 상세 정보를 생성합니다."""
     try:
-        # GPT로 레시피 상세 정보 생성
-        result = await generate_recipe_with_gpt(video_url)
+        video_id = extract_video_id(video_url)
 
-        if not result or "recipe" not in result:
-            raise create_error_response(
-                "레시피 상세 정보를 생성할 수 없습니다.",
-                status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-        recipe = result["recipe"]
-
-        # 레시피 저장
-        new_recipe = Recipe(
-            title=recipe["title"],
-            subtitle=recipe["subtitle"],
-            youtube_link=recipe["youtube_url"],
-            steps=recipe["steps"],
-            ingredients=recipe["ingredients"],
-            seasonings=recipe["seasonings"],
-            created_at=datetime.datetime.now()
-        )
-        db.add(new_recipe)
-        db.commit()
-        db.refresh(new_recipe)
+        # 이미 생성된 레시피가 있으면 GPT 호출 없이 반환
+        existing = await find_recipe_by_video_id(db, video_id)
+        if existing:
+            recipe = stored_recipe_to_dict(existing)
+        else:
+            # GPT로 레시피 상세 정보 생성 후 저장 (같은 영상의 동시 요청은 스트리밍 요청과 함께 한 번만 생성)
+            recipe = await generate_and_store_recipe(video_url, video_id)
 
         return {
             "status": "success",
             "message": "레시피 상세 정보가 생성되었습니다.",
             "recipe": {
                 **recipe,
-                "id": new_recipe.id,
-                "is_starred": False
+                "is_starred": await is_recipe_starred(db, recipe["id"], current_user.kakao_id)
             }
         }
 
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise create_error_response(
             f"레시피 상세 정보 생성 중 오류가 발생했습니다: {str(e)}",
             status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@app.post("/api/generate-recipe-details/stream")
+async def generate_recipe_details_stream(
+        video_url: str,
+        current_user: UserResponse = Depends(get_current_user),
+        db: AsyncSession = Depends(get_async_db)
+) -> StreamingResponse:
+    """선택된 YouTube 영상의 레시피를 생성하며, 파싱된 항목을 NDJSON으로 즉시 전송합니다.
+
+    이벤트 형식 (한 줄에 하나):
+    - {"type": "field", "field": "title" | "subtitle", "value": ...}
+    - {"type": "item", "field": "steps" | "ingredients" | "seasonings", "index": n, "value": ...}
+    - {"type": "done", "recipe": {...}} / {"type": "error", "detail": ...}
+    """
+    def encode(event: dict) -> bytes:
+        return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+    try:
+        video_id = extract_video_id(video_url)
+    except ValueError as e:
+        raise create_error_response(str(e), status.HTTP_400_BAD_REQUEST)
+
+    # 이미 생성된 레시피가 있으면 완료 이벤트 하나만 전송
+    existing = await find_recipe_by_video_id(db, video_id)
+    if existing:
+        is_starred = await is_recipe_starred(db, existing.id, current_user.kakao_id)
+
+        async def stored_stream():
+            yield encode({
+                "type": "done",
+                "recipe": {**stored_recipe_to_dict(existing), "is_starred": is_starred}
+            })
+
+        return StreamingResponse(stored_stream(), media_type="application/x-ndjson")
+
+    # 스트림을 열기 전에 잘못된 영상은 400 으로 응답 (결과는 캐시되어 생성 작업에서 재사용)
+    try:
+        await get_video_metadata(video_url)
+    except ValueError as e:
+        raise create_error_response(str(e), status.HTTP_400_BAD_REQUEST)
+
+    kakao_id = current_user.kakao_id
+
+    async def event_stream():
+        # 같은 영상을 생성 중인 요청이 있으면 그 생성에 합류 (지금까지 나온 항목부터 받음)
+        try:
+            async for event in join_recipe_generation(video_url, video_id):
+                if event["type"] == "done":
+                    recipe = event["recipe"]
+                    # 응답 스트리밍 중에는 요청 스코프 세션이 이미 닫혔을 수 있으므로 별도 세션 사용
+                    async with AsyncSessionLocal() as stream_db:
+                        is_starred = await is_recipe_starred(stream_db, recipe["id"], kakao_id)
+                    event = {"type": "done", "recipe": {**recipe, "is_starred": is_starred}}
+                yield encode(event)
+        except Exception as e:
+            logger.error(f"레시피 스트리밍 생성 실패: {e}")
+            yield encode({"type": "error", "detail": f"레시피 상세 정보 생성 중 오류가 발생했습니다: {str(e)}"})
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
 @app.get("/api/test/youtube")
 async def test_youtube():
     """YouTube API 테스트"""
@@ -1214,6 +1824,7 @@ async def test_youtube():
                 "message": "YouTube API 테스트 완료",
                 "query": test_query,
                 "video_count": len(videos),
+                "cache": youtube_search_cache.stats(),
                 "videos": [{
                     "title": video["title"],
                     "url": video["url"],
@@ -0,0 +1,275 @@
+"""운영용 유지보수 명령
+
+backend 디렉토리에서 실행합니다:
+    python maintenance.py images    # 이미지 카탈로그 upsert + 기존 재료 이미지 백필
+    python maintenance.py sprites   # static/icons 로 아이콘 스프라이트(+ gzip/brotli) 생성
+    python maintenance.py notify    # 유통기한 임박 재료 카카오톡 알림 (--days 로 기간 지정, cron 용)
+    python maintenance.py embeddings  # 저장된 레시피를 임베딩해 의미 검색 벡터 색인 생성/보충
+    python maintenance.py stars     # recipes.star_count 컬럼/stars 인덱스 추가(없으면) + stars 테이블로 좋아요 수 재계산
+    python maintenance.py video-ids  # recipes.video_id 컬럼 추가(없으면) + youtube_link 로 영상 ID 백필
+    python maintenance.py indexes   # 모델에 선언됐지만 기존 테이블에 없는 인덱스 생성 (create_all 은 만들지 않음)
+"""
+import argparse
+import asyncio
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, func, inspect, select, text, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, async_engine, engine
+from embeddings import EMBEDDING_BATCH_SIZE, get_encoder, recipe_text
+from http_clients import close_http_clients, init_http_clients
+from icons import HAN_TO_ENG_ICON_MAP, ICONS_DIR, SPRITES_DIR, icon_url, catalog_icon_index
+from models import Base, Image, Ingredient, Recipe, Star
+from notifications import notify_expiring_ingredients
+from sprites import build_icon_sprite
+from vector_index import RECIPE_VECTORS_DIR, VectorIndex
+from youtube_urls import extract_video_id
+
+logger = logging.getLogger(__name__)
+
+
+def upsert_image_catalog(db: Session) -> int:
+    """아이콘 카탈로그를 한 번의 다중 행 upsert로 images 테이블에 반영합니다."""
+    rows = [
+        {"name": name, "image_url": icon_url(file_name)}
+        for name, file_name in HAN_TO_ENG_ICON_MAP.items()
+    ]
+
+    if db.bind.dialect.name == "mysql":
+        stmt = mysql_insert(Image).values(rows)
+        stmt = stmt.on_duplicate_key_update(image_url=stmt.inserted.image_url)
+    else:
+        stmt = sqlite_insert(Image).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Image.name],
+            set_={"image_url": stmt.excluded.image_url}
+        )
+
+    db.execute(stmt)
+    db.commit()
+    return len(rows)
+
+
+def backfill_ingredient_images(db: Session) -> int:
+    """이미지가 없는 재료에 아이콘을 연결합니다.
+
+    이름이 정확히 같은 경우는 한 번의 UPDATE ... JOIN으로, 나머지("국산 감자" 등)는
+    고유 재료명별로 아이콘 인덱스에서 찾아 한 번의 executemany로 반영합니다.
+    """
+    stmt = (
+        update(Ingredient)
+        .where(
+            Ingredient.image_name.is_(None),
+            Ingredient.name == Image.name
+        )
+        .values(image_name=Image.name)
+        .execution_options(synchronize_session=False)
+    )
+    updated = db.execute(stmt).rowcount
+
+    icon_index = catalog_icon_index()
+    names = db.execute(
+        select(Ingredient.name).distinct().where(Ingredient.image_name.is_(None), Ingredient.name.is_not(None))
+    ).scalars()
+    matches = [
+        {"match_name": name, "matched_image": image_name}
+        for name in names
+        if (image_name := icon_index.match(name))
+    ]
+    if matches:
+        stmt = (
+            update(Ingredient.__table__)
+            .where(
+                Ingredient.__table__.c.image_name.is_(None),
+                Ingredient.__table__.c.name == bindparam("match_name")
+            )
+            .values(image_name=bindparam("matched_image"))
+        )
+        updated += db.execute(stmt, matches).rowcount
+
+    db.commit()
+    return updated
+
+
+def bootstrap_images(args):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        count = upsert_image_catalog(db)
+        logger.info(f"이미지 카탈로그 {count}건 반영")
+        updated = backfill_ingredient_images(db)
+        logger.info(f"재료 이미지 {updated}건 백필")
+    finally:
+        db.close()
+
+
+def build_sprites(args):
+    sprite = build_icon_sprite(ICONS_DIR, SPRITES_DIR, "/static/sprites")
+    if sprite:
+        logger.info(f"아이콘 스프라이트: {sprite['url']} ({len(sprite['icons'])}개)")
+    else:
+        logger.warning(f"{ICONS_DIR} 에 SVG 아이콘이 없습니다")
+
+
+def build_recipe_embeddings(args):
+    """벡터 색인에 없는 레시피를 배치로 임베딩합니다 (배포 직후 한 번 실행하면 앱 시작이 빨라짐)."""
+    encoder = get_encoder()
+    if encoder is None:
+        logger.warning("EMBEDDING_MODEL 이 설정되지 않았거나 sentence-transformers 가 없어 임베딩하지 않습니다")
+        return
+    index = VectorIndex(RECIPE_VECTORS_DIR, encoder.dim, encoder.name)
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            select(Recipe.id, Recipe.title, Recipe.subtitle, Recipe.steps).order_by(Recipe.id)
+        ).yield_per(EMBEDDING_BATCH_SIZE * 16)
+        for rows in result.partitions():
+            pending = [row for row in rows if row.id not in index]
+            if pending:
+                vectors = encoder.encode([recipe_text(row.title, row.subtitle, row.steps) for row in pending])
+                index.add([row.id for row in pending], vectors)
+        logger.info(f"레시피 벡터 색인: {len(index)}개 ({encoder.name})")
+    finally:
+        db.close()
+
+
+def rebuild_star_counts(args):
+    """좋아요 수를 stars 테이블 기준으로 다시 계산합니다 (컬럼 추가 직후나 값이 어긋났을 때, 앱을 멈추고 실행).
+
+    star_count 컬럼을 먼저 추가한 뒤, 기간별 인기 순위 집계에 쓰는 stars 인덱스(ix_stars_created 등)가 없으면 만듭니다.
+    """
+    Base.metadata.create_all(bind=engine)
+    columns = {column["name"] for column in inspect(engine).get_columns("recipes")}
+    with engine.begin() as conn:
+        if "star_count" not in columns:
+            conn.execute(text("ALTER TABLE recipes ADD COLUMN star_count INTEGER NOT NULL DEFAULT 0"))
+        counts = select(func.count(Star.id)).where(Star.recipe_id == Recipe.id).scalar_subquery()
+        updated = conn.execute(update(Recipe.__table__).values(star_count=counts)).rowcount
+    logger.info(f"레시피 {updated}건 좋아요 수 재계산")
+
+    created = create_missing_indexes(engine, [Star.__tablename__])
+    if created:
+        logger.info(f"인덱스 생성: {', '.join(created)}")
+
+
+def backfill_recipe_video_ids(db: Session) -> tuple[int, int]:
+    """video_id 가 없는 레시피에 youtube_link 에서 추출한 영상 ID 를 채웁니다. (채운 수, 건너뛴 수) 반환.
+
+    video_id 는 고유하므로 같은 영상의 레시피가 여러 개면 먼저 저장된(id 가 작은) 것만 채웁니다.
+    """
+    taken = set(db.execute(select(Recipe.video_id).where(Recipe.video_id.is_not(None))).scalars())
+    rows, skipped = [], 0
+    result = db.execute(
+        select(Recipe.id, Recipe.youtube_link).where(Recipe.video_id.is_(None)).order_by(Recipe.id)
+    )
+    for recipe_id, youtube_link in result:
+        try:
+            video_id = extract_video_id(youtube_link or "")
+        except ValueError:
+            skipped += 1
+            continue
+        if video_id in taken:
+            skipped += 1
+            continue
+        taken.add(video_id)
+        rows.append({"recipe_key": recipe_id, "new_video_id": video_id})
+
+    if rows:
+        table = Recipe.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("recipe_key"))
+            .values(video_id=bindparam("new_video_id"))
+        )
+        db.execute(stmt, rows)
+    db.commit()
+    return len(rows), skipped
+
+
+def backfill_video_ids(args):
+    """영상별 레시피 재사용(find_recipe_by_video_id)이 기존 레시피도 찾도록 video_id 를 채웁니다."""
+    Base.metadata.create_all(bind=engine)
+    columns = {column["name"] for column in inspect(engine).get_columns("recipes")}
+    if "video_id" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE recipes ADD COLUMN video_id VARCHAR(32) NULL"))
+            conn.execute(text("CREATE UNIQUE INDEX ix_recipes_video_id ON recipes (video_id)"))
+    db = SessionLocal()
+    try:
+        updated, skipped = backfill_recipe_video_ids(db)
+        logger.info(f"레시피 video_id {updated}건 백필 (URL 형식 오류/같은 영상 중복 {skipped}건 제외)")
+    finally:
+        db.close()
+
+
+def create_missing_indexes(bind, tables: Optional[Iterable[str]] = None) -> list[str]:
+    """모델에 선언된 인덱스 중 DB 에 없는 것을 만듭니다 (tables 를 주면 그 테이블만). 만든 인덱스 이름 목록 반환.
+
+    create_all 은 이미 있는 테이블에는 인덱스를 추가하지 않으므로, 기존 DB 에는 이 명령으로 반영합니다.
+    컬럼이 아직 없는 인덱스(예: video-ids 전의 ix_recipes_video_id)는 건너뛰고 로그만 남깁니다.
+    """
+    Base.metadata.create_all(bind=bind)
+    inspector = inspect(bind)
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if tables is not None and table.name not in tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name in existing:
+                continue
+            missing = [column.name for column in index.columns if column.name not in columns]
+            if missing:
+                logger.warning(f"{table.name} 에 컬럼 {', '.join(missing)} 이 없어 인덱스 {index.name} 를 건너뜁니다")
+                continue
+            index.create(bind=bind)
+            created.append(index.name)
+    return created
+
+
+def create_indexes(args):
+    created = create_missing_indexes(engine)
+    logger.info(f"인덱스 {len(created)}개 생성: {', '.join(created) or '없음'}")
+
+
+def notify_expiring(args):
+    async def run():
+        await init_http_clients()
+        try:
+            return await notify_expiring_ingredients(window_days=args.days)
+        finally:
+            await close_http_clients()
+            await async_engine.dispose()
+
+    stats = asyncio.run(run())
+    logger.info(f"알림 결과: {stats}")
+
+
+COMMANDS = {
+    "images": bootstrap_images,
+    "sprites": build_sprites,
+    "notify": notify_expiring,
+    "embeddings": build_recipe_embeddings,
+    "stars": rebuild_star_counts,
+    "video-ids": backfill_video_ids,
+    "indexes": create_indexes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="요리의 봄 유지보수 명령")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--days", type=int, default=3, help="notify: 유통기한이 며칠 이내인 재료를 알릴지")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    COMMANDS[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""요청/DB/외부 API 지표 (Prometheus 텍스트 형식, 외부 의존성 없음)
+
+- MetricsMiddleware: 라우트(경로 템플릿)별 응답 시간 히스토그램, 처리 중인 요청 수(메서드별), 요청당 SQL 문 수/시간
+- instrument_engine: SQLAlchemy cursor 이벤트로 SQL 문 시간을 재고, SLOW_QUERY_SECONDS 이상 걸린 문장을
+  SLOW_QUERY_SAMPLE_RATE 비율로 로그에 남깁니다 (echo=True 대체)
+- upstream_event_hooks: httpx 클라이언트의 업스트림(kakao/youtube/openai)별 응답 시간 (헤더 수신까지)
+- render_metrics: /metrics 응답 본문
+
+지표는 워커 프로세스별로 집계됩니다 (Prometheus 가 워커마다 수집하거나 한 워커로 실행).
+"""
+import bisect
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", "0.2"))
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "1.0"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    TYPE = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.TYPE}"
+        for values, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labels, values)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    TYPE = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1.0):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # 라벨 값 -> [버킷별 개수..., +Inf 개수, 합계]
+        self._values: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for values, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                bucket_labels = _format_labels(self.labels, values, 'le="' + le + '"')
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, values)} {state[-1]!r}"
+            yield f"{self.name}_count{_format_labels(self.labels, values)} {cumulative}"
+
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP 요청 처리 시간", ("method", "route", "status"))
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "처리 중인 HTTP 요청 수", ("method",))
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements", "요청당 실행한 SQL 문 수", ("method", "route"), buckets=COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "요청당 SQL 실행 시간 합계", ("method", "route"))
+DB_STATEMENT_SECONDS = Histogram("db_statement_duration_seconds", "SQL 문 실행 시간", ("operation",))
+DB_SLOW_STATEMENTS = Counter("db_slow_statements_total", "SLOW_QUERY_SECONDS 이상 걸린 SQL 문 수", ("operation",))
+UPSTREAM_SECONDS = Histogram(
+    "upstream_request_duration_seconds", "외부 API 응답 시간 (헤더 수신까지)", ("upstream", "method", "status")
+)
+
+REGISTRY = (
+    REQUEST_SECONDS, REQUESTS_IN_FLIGHT, REQUEST_DB_STATEMENTS, REQUEST_DB_SECONDS,
+    DB_STATEMENT_SECONDS, DB_SLOW_STATEMENTS, UPSTREAM_SECONDS,
+)
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+
+
+# 현재 요청의 SQL 통계 (미들웨어가 설정, 태스크/greenlet 로 복사되어도 같은 객체를 갱신)
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def _route_path(scope: dict) -> str:
+    route = scope.get("route")
+    # 경로 템플릿("/api/recipes/{recipe_id}")으로 묶어 라벨 수가 늘어나지 않게 함
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI 미들웨어 (BaseHTTPMiddleware 보다 요청당 비용이 적음)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        # 라우트는 라우팅 뒤에 정해지므로 처리 중 요청 수는 메서드 단위로 셈
+        REQUESTS_IN_FLIGHT.inc(method)
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            REQUESTS_IN_FLIGHT.dec(method)
+            route = _route_path(scope)
+            REQUEST_SECONDS.observe(elapsed, method, route, str(status_code))
+            REQUEST_DB_STATEMENTS.observe(stats.statements, method, route)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, method, route)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_start
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    DB_STATEMENT_SECONDS.observe(elapsed, operation)
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+    if elapsed >= SLOW_QUERY_SECONDS:
+        DB_SLOW_STATEMENTS.inc(operation)
+        if random.random() < SLOW_QUERY_SAMPLE_RATE:
+            logger.warning(f"느린 SQL ({elapsed * 1000:.1f} ms{', executemany' if executemany else ''}): {statement[:1000]}")
+
+
+def instrument_engine(engine):
+    """동기 Engine(비동기 엔진은 .sync_engine)에 SQL 시간 측정/느린 쿼리 로그를 붙입니다."""
+    from sqlalchemy import event
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def upstream_event_hooks(upstream: str) -> dict:
+    """httpx.AsyncClient(event_hooks=...) 용 업스트림 응답 시간 측정 훅."""
+
+    async def on_request(request):
+        request.extensions["metrics_start"] = time.perf_counter()
+
+    async def on_response(response):
+        start = response.request.extensions.get("metrics_start")
+        if start is not None:
+            UPSTREAM_SECONDS.observe(
+                time.perf_counter() - start, upstream, response.request.method, str(response.status_code)
+            )
+
+    return {"request": [on_request], "response": [on_response]}
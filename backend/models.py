@@ -1,9 +1,33 @@
 import datetime
 
-from sqlalchemy import Column, Integer, ForeignKey, func, VARCHAR, DateTime, BigInteger, JSON, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, func, VARCHAR, DateTime, BigInteger, JSON, UniqueConstraint, Index
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 from sqlalchemy.orm import relationship
 
 from database import Base
+from icons import sprite_icon_url
+
+DEFAULT_SHELF_LIFE = datetime.timedelta(days=15)  # 재료 추가 시 기본 유통기한
+
+
+class days_between(FunctionElement):
+    """두 시각 사이의 일수 (end - start, 정수로 절사). days_between(start, end)"""
+    type = Integer()
+    inherit_cache = True
+    name = "days_between"
+
+
+@compiles(days_between)
+def _days_between_mysql(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"TIMESTAMPDIFF(DAY, {compiler.process(start, **kw)}, {compiler.process(end, **kw)})"
+
+
+@compiles(days_between, "sqlite")
+def _days_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"CAST(julianday({compiler.process(end, **kw)}) - julianday({compiler.process(start, **kw)}) AS INTEGER)"
 
 
 class User(Base):
@@ -13,6 +37,9 @@ class User(Base):
     nickname = Column(VARCHAR(255))
     profile_image = Column(VARCHAR(255))
     created_at = Column(DateTime, default=datetime.datetime.now)
+    # 유통기한 알림(카카오톡 나에게 보내기) 발송용 토큰
+    kakao_access_token = Column(VARCHAR(255))
+    kakao_refresh_token = Column(VARCHAR(255))
 
     ingredients = relationship("Ingredient", back_populates="user")
     stars = relationship("Star", back_populates="user")
@@ -25,9 +52,11 @@ class Recipe(Base):
     title = Column(VARCHAR(255), nullable=False)
     subtitle = Column(VARCHAR(255))
     youtube_link = Column(VARCHAR(255), nullable=False)
+    video_id = Column(VARCHAR(32), unique=True, index=True)  # 정규화된 YouTube 영상 ID (영상당 레시피 1개)
     steps = Column(JSON, nullable=False)  # 요리 단계
     ingredients = Column(JSON, nullable=False)  # 재료 목록
     seasonings = Column(JSON, nullable=False)  # 양념 목록
+    star_count = Column(Integer, nullable=False, default=0, server_default="0")  # 좋아요 수 (popularity.py 에서 모아서 갱신)
     created_at = Column(DateTime(timezone=True), default=func.now())
 
     stars = relationship("Star", back_populates="recipe")
@@ -38,6 +67,7 @@ class Recipe(Base):
             "title": self.title,
             "subtitle": self.subtitle,
             "youtube_link": self.youtube_link,
+            "video_id": self.video_id,
             "steps": self.steps,
             "ingredients": self.ingredients,
             "seasonings": self.seasonings,
@@ -58,6 +88,10 @@ class Star(Base):
 
     __table_args__ = (
         UniqueConstraint('recipe_id', 'kakao_id', name='uix_recipe_user'),
+        # 사용자별 좋아요 목록 최신순 조회용
+        Index("ix_stars_kakao_created", "kakao_id", "created_at"),
+        # 기간별 인기 순위 집계용
+        Index("ix_stars_created", "created_at"),
     )
 
 
@@ -90,6 +124,11 @@ class Ingredient(Base):
     user = relationship("User", back_populates="ingredients")
     image = relationship("Image", foreign_keys=[image_name], primaryjoin="Ingredient.image_name == Image.name")
 
+    __table_args__ = (
+        # 사용자별 유통기한 조회/정렬용
+        Index("ix_ingredients_kakao_limit", "kakao_id", "limit_date"),
+    )
+
     @property
     def is_expired(self):
         return datetime.datetime.now() > self.limit_date
@@ -107,20 +146,20 @@ class Ingredient(Base):
             "limit_date": self.limit_date.isoformat(),
             "is_expired": self.is_expired,
             "days_until_expiry": self.days_until_expiry,
-            "image_url": self.image.image_url if self.image else None
+            "image_url": sprite_icon_url(self.image.image_url) if self.image else None
         }
 
     @classmethod
-    def create(cls, db, name, category, added_date, kakao_id, image_name=None):
+    async def create(cls, db, name, category, added_date, kakao_id, image_name=None):
         ingredient = cls(
             name=name,
             category=category,
             added_date=added_date,
-            limit_date=added_date + datetime.timedelta(days=15),
+            limit_date=added_date + DEFAULT_SHELF_LIFE,
             kakao_id=kakao_id,
             image_name=image_name
         )
         db.add(ingredient)
-        db.commit()
-        db.refresh(ingredient)
+        await db.commit()
+        await db.refresh(ingredient)
         return ingredient
\ No newline at end of file
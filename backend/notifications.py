@@ -0,0 +1,270 @@
+"""유통기한 임박 재료 알림 작업
+
+유통기한이 window 안에 들어온 재료를 사용자별로 묶어, 사용자마다 카카오톡 메시지(나에게 보내기)를
+한 통씩 보냅니다. 재료는 (kakao_id, limit_date, id) 순서의 keyset 청크로 읽어 메모리 사용량이
+전체 사용자 수와 무관하게 유지되고, 청크마다 세션을 새로 열어 발송하는 동안 DB 연결을 잡고 있지 않습니다.
+
+cron 등에서 `python maintenance.py notify --days 3` 으로 실행합니다.
+KAKAO_API_HOST / KAKAO_AUTH_HOST 를 바꾸면 로컬 카카오 대역 서버로 실행할 수 있습니다.
+"""
+import asyncio
+import datetime
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Optional
+
+import httpx
+from sqlalchemy import select, tuple_, update
+
+from database import AsyncSessionLocal
+from http_clients import KAKAO, KAKAO_API_HOST, KAKAO_AUTH_HOST, get_http_client
+from models import Ingredient, User
+
+logger = logging.getLogger(__name__)
+
+KAKAO_CLIENT_ID = os.getenv("KAKAO_CLIENT_ID")
+KAKAO_CLIENT_SECRET = os.getenv("KAKAO_CLIENT_SECRET")
+SERVICE_URL = os.getenv("SERVICE_URL", "https://areono.store/home")
+
+CHUNK_SIZE = 1000  # 한 번에 읽는 재료 행 수
+MAX_LISTED_ITEMS = 10  # 메시지에 나열할 최대 재료 수
+SEND_CONCURRENCY = 10  # 동시에 보내는 메시지 수
+SEND_RATE = 20.0  # 초당 최대 발송 수
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5  # 초, 재시도마다 2배
+
+
+@dataclass
+class ExpiringGroup:
+    kakao_id: int
+    access_token: Optional[str]
+    refresh_token: Optional[str]
+    items: List[tuple] = field(default_factory=list)  # (재료명, 유통기한)
+    total: int = 0
+
+
+@dataclass
+class NotifyStats:
+    users: int = 0
+    sent: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+
+class RateLimiter:
+    """토큰 버킷 방식의 비동기 발송 속도 제한기."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class KakaoMessenger:
+    """카카오톡 나에게 보내기 API 클라이언트 (공유 커넥션 풀, 속도 제한, 재시도)."""
+
+    def __init__(self, client: httpx.AsyncClient, rate: float = SEND_RATE,
+                 api_host: str = KAKAO_API_HOST, auth_host: str = KAKAO_AUTH_HOST):
+        self.client = client
+        self.limiter = RateLimiter(rate)
+        self.api_host = api_host
+        self.auth_host = auth_host
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """429/5xx/네트워크 오류는 지수 백오프로 재시도합니다."""
+        for attempt in range(MAX_RETRIES + 1):
+            await self.limiter.acquire()
+            retry_after = None
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if attempt == MAX_RETRIES:
+                    raise
+            else:
+                if response.status_code != 429 and response.status_code < 500:
+                    return response
+                if attempt == MAX_RETRIES:
+                    return response
+                retry_after = response.headers.get("retry-after")
+
+            delay = RETRY_BACKOFF * (2 ** attempt)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            await asyncio.sleep(delay)
+
+    async def refresh_access_token(self, refresh_token: str) -> Optional[dict]:
+        response = await self._request("POST", f"{self.auth_host}/oauth/token", data={
+            "grant_type": "refresh_token",
+            "client_id": KAKAO_CLIENT_ID,
+            "client_secret": KAKAO_CLIENT_SECRET,
+            "refresh_token": refresh_token,
+        })
+        if response.status_code != 200:
+            return None
+        return response.json()
+
+    async def send_memo(self, access_token: str, template: dict) -> httpx.Response:
+        return await self._request(
+            "POST",
+            f"{self.api_host}/v2/api/talk/memo/default/send",
+            headers={"Authorization": f"Bearer {access_token}"},
+            data={"template_object": json.dumps(template, ensure_ascii=False)}
+        )
+
+
+def build_expiry_message(group: ExpiringGroup, now: datetime.datetime) -> dict:
+    """사용자 한 명의 임박 재료를 하나의 텍스트 메시지 템플릿으로 만듭니다."""
+    lines = [f"[요리의 봄] 유통기한이 얼마 남지 않은 재료가 {group.total}개 있어요."]
+    for name, limit_date in group.items:
+        days = (limit_date - now).days
+        lines.append(f"- {name} ({'오늘까지' if days <= 0 else f'D-{days}'})")
+    if group.total > len(group.items):
+        lines.append(f"외 {group.total - len(group.items)}개")
+
+    return {
+        "object_type": "text",
+        "text": "\n".join(lines),
+        "link": {"web_url": SERVICE_URL, "mobile_web_url": SERVICE_URL},
+        "button_title": "재료 확인하기"
+    }
+
+
+async def stream_expiring_groups(start: datetime.datetime, end: datetime.datetime,
+                                 chunk_size: int = CHUNK_SIZE) -> AsyncIterator[ExpiringGroup]:
+    """유통기한이 [start, end) 인 재료를 사용자별로 묶어 순서대로 반환합니다.
+
+    청크마다 세션을 열고 닫으므로, 반환된 그룹을 발송하는 동안에는 연결/트랜잭션이 열려 있지 않습니다.
+    """
+    query = select(
+        Ingredient.kakao_id,
+        Ingredient.limit_date,
+        Ingredient.id,
+        Ingredient.name,
+        User.kakao_access_token,
+        User.kakao_refresh_token
+    ).join(User, User.kakao_id == Ingredient.kakao_id).filter(
+        Ingredient.limit_date >= start,
+        Ingredient.limit_date < end
+    ).order_by(Ingredient.kakao_id, Ingredient.limit_date, Ingredient.id)
+
+    group = None
+    last_key = None
+    while True:
+        chunk_query = query
+        if last_key is not None:
+            chunk_query = chunk_query.filter(
+                tuple_(Ingredient.kakao_id, Ingredient.limit_date, Ingredient.id) > tuple_(*last_key)
+            )
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(chunk_query.limit(chunk_size))).all()
+        if not rows:
+            break
+
+        for row in rows:
+            if group is None or group.kakao_id != row.kakao_id:
+                if group is not None:
+                    yield group
+                group = ExpiringGroup(row.kakao_id, row.kakao_access_token, row.kakao_refresh_token)
+            group.total += 1
+            if len(group.items) < MAX_LISTED_ITEMS:
+                group.items.append((row.name, row.limit_date))
+
+        last = rows[-1]
+        last_key = (last.kakao_id, last.limit_date, last.id)
+        if len(rows) < chunk_size:
+            break
+
+    if group is not None:
+        yield group
+
+
+async def notify_group(messenger: KakaoMessenger, group: ExpiringGroup, now: datetime.datetime) -> bool:
+    """한 사용자에게 메시지를 보냅니다. 액세스 토큰이 만료되었으면 갱신 후 다시 보냅니다."""
+    template = build_expiry_message(group, now)
+    access_token = group.access_token
+
+    if access_token:
+        response = await messenger.send_memo(access_token, template)
+        if response.status_code == 200:
+            return True
+        if response.status_code != 401:
+            logger.warning(f"알림 발송 실패 (kakao_id={group.kakao_id}): {response.status_code} {response.text}")
+            return False
+
+    if not group.refresh_token:
+        return False
+
+    token_json = await messenger.refresh_access_token(group.refresh_token)
+    if not token_json or not token_json.get("access_token"):
+        logger.warning(f"카카오 토큰 갱신 실패 (kakao_id={group.kakao_id})")
+        return False
+
+    values = {"kakao_access_token": token_json["access_token"]}
+    if token_json.get("refresh_token"):
+        values["kakao_refresh_token"] = token_json["refresh_token"]
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(User).where(User.kakao_id == group.kakao_id).values(**values))
+        await db.commit()
+
+    response = await messenger.send_memo(token_json["access_token"], template)
+    return response.status_code == 200
+
+
+async def notify_expiring_ingredients(window_days: int = 3, now: Optional[datetime.datetime] = None,
+                                      messenger: Optional[KakaoMessenger] = None,
+                                      concurrency: int = SEND_CONCURRENCY) -> NotifyStats:
+    """유통기한이 window_days 이내인 재료가 있는 사용자마다 알림을 한 통씩 보냅니다."""
+    now = now or datetime.datetime.now()
+    messenger = messenger or KakaoMessenger(get_http_client(KAKAO))
+    stats = NotifyStats()
+    # 진행 중인 발송 수를 제한해 대기 중인 그룹이 메모리에 쌓이지 않도록 함
+    slots = asyncio.Semaphore(concurrency)
+    pending = set()
+
+    async def send(group: ExpiringGroup):
+        try:
+            if await notify_group(messenger, group, now):
+                stats.sent += 1
+            else:
+                stats.failed += 1
+        except Exception as e:
+            logger.warning(f"알림 발송 중 오류 (kakao_id={group.kakao_id}): {e}")
+            stats.failed += 1
+        finally:
+            slots.release()
+
+    async for group in stream_expiring_groups(now, now + datetime.timedelta(days=window_days)):
+        stats.users += 1
+        if not group.access_token and not group.refresh_token:
+            stats.skipped += 1
+            continue
+
+        await slots.acquire()
+        task = asyncio.create_task(send(group))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending)
+
+    logger.info(
+        f"유통기한 알림: 대상 {stats.users}명, 발송 {stats.sent}건, "
+        f"건너뜀 {stats.skipped}건, 실패 {stats.failed}건"
+    )
+    return stats
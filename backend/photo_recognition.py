@@ -0,0 +1,364 @@
+"""냉장고 사진 재료 인식 (CPU 이미지 분류 + 동적 마이크로 배치)
+
+- 모델: PHOTO_MODEL_PATH 의 TorchScript 파일을 한 번 읽고 앱 시작 시 최대 배치 크기로 미리 실행해 둡니다.
+  파일 안에 extra file "labels.json" ({"labels": [...], "image_size": 224}) 으로 라벨을 함께 저장합니다.
+  파일이 없으면 사진 인식을 끕니다 (엔드포인트는 503). 고정 시드의 작은 CNN(tiny_classifier, 예측 품질 없음)은
+  PHOTO_TEST_MODEL=1 로 명시했을 때(개발용)나 테스트 fixture 에서만 사용합니다.
+- 라벨은 아이콘 파일 이름("green_onion") 또는 HAN_TO_ENG_ICON_MAP 의 한글 재료명이며, 재료 추가와 같은
+  어휘(한글 재료명)로 바꿉니다. 어휘에 없는 라벨은 버립니다.
+- 사진 한 장은 전체 + 2x2 조각(냉장고 칸마다 다른 재료)으로 나눠 한 번의 forward 로 분류하고, 라벨별 최고 확률을 씁니다.
+- 디코딩/전처리는 요청마다 워커 스레드에서 동시에 합니다.
+- MicroBatcher: 동시에 들어온 요청을 최대 PHOTO_BATCH_WAIT 동안(조각 PHOTO_BATCH_SIZE 개까지) 모아 한 번의
+  forward 로 처리합니다. 배치가 도는 동안 쌓인 요청은 다음 배치에 바로 들어가므로 부하가 클수록 배치가 커집니다.
+- forward 는 전용 스레드 하나에서 실행하고, 그 스레드의 torch 스레드 수만 PHOTO_THREADS 로 정합니다
+  (프로세스 기본값과 임베딩 인코더의 설정은 바꾸지 않음).
+
+벤치마크: python photo_recognition.py [torch 스레드 수 ...]
+"""
+import asyncio
+import io
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+
+import numpy as np
+import torch
+
+from icons import HAN_TO_ENG_ICON_MAP
+
+try:
+    from PIL import Image, UnidentifiedImageError
+except ImportError:  # pillow 미설치 시 사진 인식 비활성화
+    Image = None
+    UnidentifiedImageError = OSError
+
+logger = logging.getLogger(__name__)
+
+PHOTO_MODEL_PATH = os.getenv("PHOTO_MODEL_PATH", "models/ingredient_classifier.pt")
+PHOTO_TEST_MODEL = os.getenv("PHOTO_TEST_MODEL") == "1"  # 모델 파일이 없을 때 테스트용 모델 사용 (개발용)
+PHOTO_BATCH_SIZE = int(os.getenv("PHOTO_BATCH_SIZE", "32"))  # 한 번의 forward 에 넣을 최대 이미지(조각) 수
+PHOTO_BATCH_WAIT = float(os.getenv("PHOTO_BATCH_WAIT", "0.005"))  # 배치를 모으는 최대 대기 시간 (초)
+PHOTO_THREADS = int(os.getenv("PHOTO_THREADS", "2"))  # forward 에 쓰는 torch 스레드 수
+PHOTO_MAX_BYTES = 10 * 1024 * 1024
+PHOTO_GRID = 2  # 전체 사진 + GRID x GRID 조각
+PHOTO_MIN_CONFIDENCE = float(os.getenv("PHOTO_MIN_CONFIDENCE", "0.3"))
+
+IMAGE_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGE_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+# 아이콘 파일 이름("potato") -> 대표 한글 재료명 (같은 아이콘이면 먼저 나온 이름)
+ICON_LABELS: dict[str, str] = {}
+for _name, _file_name in HAN_TO_ENG_ICON_MAP.items():
+    ICON_LABELS.setdefault(os.path.splitext(_file_name)[0], _name)
+
+
+def label_to_ingredient(label: str) -> Optional[str]:
+    """모델 라벨을 재료명으로 바꿉니다. 어휘에 없으면 None."""
+    if label in HAN_TO_ENG_ICON_MAP:
+        return label
+    return ICON_LABELS.get(label.strip().lower().replace(" ", "_"))
+
+
+class TinyIngredientNet(torch.nn.Module):
+    """테스트용 작은 CNN (가중치는 고정 시드 난수). width 를 키우면 벤치마크용으로 연산량을 늘릴 수 있습니다."""
+
+    def __init__(self, n_labels: int, width: int = 16):
+        super().__init__()
+        self.features = torch.nn.Sequential(
+            torch.nn.Conv2d(3, width, 3, stride=2, padding=1),
+            torch.nn.ReLU(),
+            torch.nn.Conv2d(width, width * 2, 3, stride=2, padding=1),
+            torch.nn.ReLU(),
+            torch.nn.Conv2d(width * 2, width * 4, 3, stride=2, padding=1),
+            torch.nn.ReLU(),
+            torch.nn.AdaptiveAvgPool2d(1),
+            torch.nn.Flatten()
+        )
+        self.classifier = torch.nn.Linear(width * 4, n_labels)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.classifier(self.features(x))
+
+
+class IngredientClassifier:
+    def __init__(self, model: torch.nn.Module, labels: Sequence[str], image_size: int, name: str):
+        self.model = model.eval()
+        self.labels = list(labels)
+        self.image_size = image_size
+        self.name = name
+        # 어휘에 있는 라벨만 사용 (모델 출력 열 번호 -> 재료명)
+        self.ingredients = [label_to_ingredient(label) for label in self.labels]
+
+    def preprocess(self, data: bytes) -> torch.Tensor:
+        """사진을 (1 + GRID^2, 3, S, S) 정규화 텐서로 바꿉니다. 이미지가 아니면 ValueError."""
+        size = self.image_size
+        try:
+            image = Image.open(io.BytesIO(data))
+            # JPEG 는 조각이 size 이상이 되는 최소 해상도로만 디코딩
+            image.draft("RGB", (size * PHOTO_GRID, size * PHOTO_GRID))
+            image = image.convert("RGB")
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+            raise ValueError(f"이미지를 읽을 수 없습니다: {e}")
+
+        width, height = image.size
+        crops = [image]
+        for row in range(PHOTO_GRID):
+            for col in range(PHOTO_GRID):
+                crops.append(image.crop((
+                    width * col // PHOTO_GRID,
+                    height * row // PHOTO_GRID,
+                    width * (col + 1) // PHOTO_GRID,
+                    height * (row + 1) // PHOTO_GRID
+                )))
+        pixels = np.stack([np.asarray(crop.resize((size, size), Image.BILINEAR)) for crop in crops])
+        pixels = (pixels.astype(np.float32) / 255.0 - IMAGE_MEAN) / IMAGE_STD
+        return torch.from_numpy(pixels).permute(0, 3, 1, 2).contiguous()
+
+    def predict(self, images: torch.Tensor) -> np.ndarray:
+        """(N, 3, S, S) -> 라벨별 확률 (N, 라벨 수)."""
+        with torch.inference_mode():
+            return torch.softmax(self.model(images), dim=1).numpy()
+
+    def predict_batch(self, items: List[torch.Tensor]) -> List[np.ndarray]:
+        """여러 사진의 조각을 한 번의 forward 로 분류하고 사진별로 나눠 돌려줍니다."""
+        probabilities = self.predict(torch.cat(items))
+        bounds = np.cumsum([0] + [len(item) for item in items])
+        return [probabilities[bounds[i]:bounds[i + 1]] for i in range(len(items))]
+
+    def warmup(self, batch_size: int = PHOTO_BATCH_SIZE):
+        """첫 요청이 느리지 않도록 최대 배치 크기로 미리 실행 (메모리 할당, TorchScript 최적화)."""
+        self.predict(torch.zeros(batch_size, 3, self.image_size, self.image_size))
+
+    def top(self, probabilities: np.ndarray, limit: int, min_confidence: float) -> List[tuple[str, str, float]]:
+        """조각별 확률에서 재료마다 최고 확률을 골라 (재료명, 라벨, 확률) 을 확률 순으로 반환합니다."""
+        best = probabilities.max(axis=0)
+        found: dict[str, tuple[str, str, float]] = {}
+        for column in np.argsort(-best):
+            confidence = float(best[column])
+            if confidence < min_confidence or len(found) >= limit:
+                break
+            ingredient = self.ingredients[column]
+            if ingredient and ingredient not in found:
+                found[ingredient] = (ingredient, self.labels[column], confidence)
+        return list(found.values())
+
+
+def tiny_classifier(width: int = 16, image_size: int = 64) -> IngredientClassifier:
+    """고정 시드 난수 가중치의 테스트용 분류기 (모든 아이콘 라벨)."""
+    torch.manual_seed(0)
+    labels = list(ICON_LABELS)
+    return IngredientClassifier(TinyIngredientNet(len(labels), width), labels, image_size, "tiny-test")
+
+
+def load_classifier(path: str = PHOTO_MODEL_PATH) -> IngredientClassifier:
+    """모델 파일을 읽습니다. 파일이 없으면 FileNotFoundError (PHOTO_TEST_MODEL=1 이면 테스트용 모델)."""
+    if os.path.exists(path):
+        extra_files = {"labels.json": ""}
+        model = torch.jit.load(path, map_location="cpu", _extra_files=extra_files)
+        meta = json.loads(extra_files["labels.json"])
+        model = torch.jit.optimize_for_inference(torch.jit.freeze(model.eval()))
+        classifier = IngredientClassifier(model, meta["labels"], int(meta.get("image_size", 224)), os.path.basename(path))
+    elif PHOTO_TEST_MODEL:
+        logger.warning("PHOTO_TEST_MODEL: 학습되지 않은 테스트용 모델로 사진 재료 인식을 실행합니다")
+        classifier = tiny_classifier()
+    else:
+        raise FileNotFoundError(f"사진 재료 인식 모델 파일이 없습니다: {path}")
+    missing = sum(ingredient is None for ingredient in classifier.ingredients)
+    if missing:
+        logger.warning(f"사진 인식 라벨 {missing}개가 재료 어휘에 없어 무시됩니다")
+    return classifier
+
+
+def _in_new_thread(func: Callable, *args) -> Any:
+    with ThreadPoolExecutor(1) as executor:
+        return executor.submit(func, *args).result()
+
+
+def _init_forward_thread(threads: int):
+    torch.get_num_threads()  # 이 스레드의 torch 스레드 수를 프로세스 기본값으로 먼저 초기화
+    torch.set_num_threads(threads)
+
+
+def forward_executor(threads: int = PHOTO_THREADS) -> ThreadPoolExecutor:
+    """torch 스레드 수를 threads 로 정한 forward 전용 스레드 하나.
+
+    torch.set_num_threads 는 호출한 스레드의 OpenMP 스레드 수와 함께 이후 새로 만들어지는 스레드의 기본값도
+    바꾸므로, 전용 스레드를 초기화한 뒤 기본값은 (호출한 스레드의 값을 건드리지 않도록 새 스레드에서) 되돌립니다.
+    """
+    default = _in_new_thread(torch.get_num_threads)
+    executor = ThreadPoolExecutor(
+        1, thread_name_prefix="photo-forward", initializer=_init_forward_thread, initargs=(threads,)
+    )
+    executor.submit(int).result()
+    _in_new_thread(torch.set_num_threads, default)
+    return executor
+
+
+class MicroBatcher:
+    """동시에 들어온 항목을 모아 run_batch(items) -> results 를 executor 에서 한 번에 실행합니다.
+
+    size(item) 은 항목의 크기(이미지 조각 수)이며, 합이 max_batch_size 를 넘지 않게 배치를 나눕니다.
+    배치는 한 번에 하나씩 실행합니다. 처음 submit 할 때 실행 중인 이벤트 루프에서 시작합니다.
+    """
+
+    def __init__(
+            self,
+            run_batch: Callable[[List[Any]], List[Any]],
+            max_batch_size: int = PHOTO_BATCH_SIZE,
+            max_wait: float = PHOTO_BATCH_WAIT,
+            size: Callable[[Any], int] = lambda item: 1,
+            executor: Optional[ThreadPoolExecutor] = None
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.size = size
+        self.executor = executor
+        self.batch_sizes: List[int] = []  # 실행한 배치의 항목 수 (최근 것만, 벤치마크/테스트용)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._carry = None  # 이전 배치에 들어가지 못한 항목
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._carry = None
+
+    async def submit(self, item: Any) -> Any:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> List[tuple[Any, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        first = self._carry or await self._queue.get()
+        self._carry = None
+        batch, total = [first], self.size(first[0])
+        deadline = loop.time() + self.max_wait
+        while total < self.max_batch_size:
+            try:
+                entry = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if total + self.size(entry[0]) > self.max_batch_size:
+                self._carry = entry
+                break
+            batch.append(entry)
+            total += self.size(entry[0])
+        # 기다리다 연결이 끊긴 요청은 제외
+        return [(item, future) for item, future in batch if not future.done()]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+            self.batch_sizes = self.batch_sizes[-999:] + [len(batch)]
+            try:
+                results = await loop.run_in_executor(self.executor, self.run_batch, [item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+class PhotoRecognizer:
+    def __init__(self, classifier: IngredientClassifier, max_batch_size: int = PHOTO_BATCH_SIZE,
+                 max_wait: float = PHOTO_BATCH_WAIT, threads: int = PHOTO_THREADS):
+        self.classifier = classifier
+        self._executor = forward_executor(threads)
+        self.batcher = MicroBatcher(classifier.predict_batch, max_batch_size, max_wait, size=len,
+                                    executor=self._executor)
+
+    async def warmup(self):
+        """요청과 같은 forward 스레드(같은 torch 스레드 수)에서 최대 배치 크기로 미리 실행합니다."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.classifier.warmup, self.batcher.max_batch_size)
+
+    def start(self):
+        self.batcher.start()
+
+    async def stop(self):
+        await self.batcher.stop()
+        self._executor.shutdown(wait=False)
+
+    async def recognize(
+            self,
+            data: bytes,
+            limit: int = 10,
+            min_confidence: float = PHOTO_MIN_CONFIDENCE
+    ) -> List[tuple[str, str, float]]:
+        """사진에서 인식한 (재료명, 모델 라벨, 확률) 목록. 이미지가 아니면 ValueError."""
+        images = await asyncio.to_thread(self.classifier.preprocess, data)
+        probabilities = await self.batcher.submit(images)
+        return self.classifier.top(probabilities, limit, min_confidence)
+
+
+def _benchmark(thread_counts: Sequence[int], n_requests: int = 256, concurrency: int = 32):
+    """동시 업로드 처리량: 요청마다 forward vs 마이크로 배치 (640x480 JPEG, torch 스레드 수별).
+
+    작은 테스트 모델과, 실제 분류 모델처럼 forward 비용이 큰 넓은 모델(width 64, 128px) 두 가지로 잽니다.
+    """
+    import time
+
+    rng = np.random.default_rng(0)
+    buffer = io.BytesIO()
+    Image.fromarray(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)).save(buffer, "JPEG")
+    photo = buffer.getvalue()
+
+    async def run(recognizer: PhotoRecognizer) -> float:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                await recognizer.recognize(photo, min_confidence=0.0)
+
+        await recognizer.warmup()
+        start = time.perf_counter()
+        await asyncio.gather(*[one() for _ in range(n_requests)])
+        elapsed = time.perf_counter() - start
+        await recognizer.stop()
+        return elapsed
+
+    print(f"CPU 코어 {len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()}개")
+    models = (("tiny", tiny_classifier()), ("wide", tiny_classifier(width=64, image_size=128)))
+    for threads in thread_counts:
+        for model_name, classifier in models:
+            for name, max_batch_size in (("no batching", 1 + PHOTO_GRID ** 2), ("micro-batch", PHOTO_BATCH_SIZE)):
+                recognizer = PhotoRecognizer(classifier, max_batch_size=max_batch_size, threads=threads)
+                elapsed = asyncio.run(run(recognizer))
+                batches = recognizer.batcher.batch_sizes
+                print(
+                    f"threads {threads}  {model_name:5s} {name:12s} {n_requests / elapsed:7.1f} photos/s  "
+                    f"({elapsed * 1000 / n_requests:.2f} ms/photo, 평균 배치 {sum(batches) / len(batches):.1f}장)"
+                )
+
+
+if __name__ == "__main__":
+    import sys
+
+    _benchmark([int(arg) for arg in sys.argv[1:]] or [1, 2, 4])
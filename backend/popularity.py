@@ -0,0 +1,188 @@
+"""레시피 좋아요 수 집계와 인기 순위
+
+- recipes.star_count: 레시피별 좋아요 수 (비정규화). toggle_star 는 증감만 메모리에 모으고,
+  백그라운드 작업이 STAR_FLUSH_INTERVAL 마다 레시피 id 순서로 한 번의 executemany UPDATE 로 반영합니다.
+  인기 레시피 행에 요청마다 잠금이 걸리지 않고, 여러 워커의 증감은 더하기로 합쳐집니다.
+- 전체 순위: 좋아요가 있는 레시피의 수를 메모리에 두고 상위 POPULAR_CAPACITY 개를 증분 갱신합니다.
+  STAR_SYNC_INTERVAL 마다 DB 값을 다시 읽어 다른 워커의 증감을 반영합니다.
+- 기간별 순위(24h/7d): Star.created_at 기준 GROUP BY 결과를 WINDOW_REFRESH_SECONDS 동안 재사용하고,
+  그 사이 새 좋아요는 바로 더합니다. 취소는 원래 좋아요 시각을 모르므로 다음 새로고침 때 반영됩니다.
+
+star_count 컬럼 추가/재계산: python maintenance.py stars
+"""
+import asyncio
+import datetime
+import heapq
+import logging
+import time
+from typing import List, Optional
+
+from sqlalchemy import bindparam, func, select, update
+
+from cache import SingleFlight
+from database import AsyncSessionLocal
+from models import Recipe, Star
+
+logger = logging.getLogger(__name__)
+
+STAR_FLUSH_INTERVAL = 5.0  # 초
+STAR_SYNC_INTERVAL = 60.0
+WINDOW_REFRESH_SECONDS = 60.0
+POPULAR_CAPACITY = 100  # 순위에 유지할 최대 레시피 수
+POPULAR_WINDOWS = {
+    "24h": datetime.timedelta(hours=24),
+    "7d": datetime.timedelta(days=7),
+}
+
+
+class TopK:
+    """id -> 개수 의 상위 k 개를 유지합니다.
+
+    증가는 순위 목록을 제자리에서 고치고, 순위 안 항목이 줄어 밖의 항목과 순서가 바뀔 수 있을 때만
+    다음 조회에서 전체를 다시 계산합니다 (heapq.nsmallest).
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.counts: dict[int, int] = {}
+        self._top: Optional[List[tuple[int, int]]] = []  # (-개수, id) 오름차순, None 이면 다시 계산
+
+    def reset(self, counts: dict[int, int]):
+        self.counts = {key: count for key, count in counts.items() if count > 0}
+        self._top = None
+
+    def add(self, key: int, delta: int):
+        count = self.counts.get(key, 0) + delta
+        if count > 0:
+            self.counts[key] = count
+        else:
+            self.counts.pop(key, None)
+
+        top = self._top
+        if top is None:
+            return
+        position = next((i for i, (_, k) in enumerate(top) if k == key), None)
+        if position is not None:
+            if delta < 0 and len(self.counts) > len(top) - (count <= 0):
+                self._top = None
+                return
+            if count > 0:
+                top[position] = (-count, key)
+            else:
+                del top[position]
+            top.sort()
+        elif count > 0 and (len(top) < self.k or (-count, key) < top[-1]):
+            top.append((-count, key))
+            top.sort()
+            del top[self.k:]
+
+    def top(self, limit: int) -> List[tuple[int, int]]:
+        """(id, 개수) 를 개수 내림차순(같으면 id 오름차순)으로 반환합니다."""
+        if self._top is None:
+            self._top = heapq.nsmallest(self.k, ((-count, key) for key, count in self.counts.items()))
+        return [(key, -negative) for negative, key in self._top[:limit]]
+
+
+class StarCounter:
+    def __init__(self, capacity: int = POPULAR_CAPACITY):
+        self._pending: dict[int, int] = {}  # 아직 DB 에 반영하지 않은 증감
+        self._totals = TopK(capacity)
+        self._windows = {window: TopK(capacity) for window in POPULAR_WINDOWS}
+        self._window_loaded: dict[str, float] = {}
+        self._window_flight = SingleFlight()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, recipe_id: int, delta: int):
+        """좋아요(+1)/취소(-1) 를 기록합니다. DB 반영은 flush 에서 모아서 합니다."""
+        self._pending[recipe_id] = self._pending.get(recipe_id, 0) + delta
+        self._totals.add(recipe_id, delta)
+        if delta > 0:
+            for ranking in self._windows.values():
+                ranking.add(recipe_id, delta)
+
+    async def flush(self) -> int:
+        """모아 둔 증감을 한 트랜잭션으로 반영합니다. 실패하면 증감을 되돌려 다음에 다시 시도합니다."""
+        pending, self._pending = self._pending, {}
+        # 잠금 순서를 일정하게 하려고 레시피 id 순으로 갱신
+        rows = [{"recipe_key": key, "delta": delta} for key, delta in sorted(pending.items()) if delta]
+        if not rows:
+            return 0
+
+        table = Recipe.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("recipe_key"))
+            .values(star_count=table.c.star_count + bindparam("delta"))
+        )
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(stmt, rows)
+                await db.commit()
+        except BaseException:
+            for key, delta in pending.items():
+                self._pending[key] = self._pending.get(key, 0) + delta
+            raise
+        return len(rows)
+
+    async def load_totals(self):
+        """DB 의 좋아요 수(다른 워커 반영분 포함)에 아직 반영하지 않은 증감을 더해 전체 순위를 다시 만듭니다."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Recipe.id, Recipe.star_count).where(Recipe.star_count > 0))
+            counts = {row.id: row.star_count for row in result}
+        for key, delta in self._pending.items():
+            counts[key] = counts.get(key, 0) + delta
+        self._totals.reset(counts)
+
+    async def _load_window(self, window: str):
+        since = datetime.datetime.now() - POPULAR_WINDOWS[window]
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Star.recipe_id, func.count().label("stars"))
+                .where(Star.created_at >= since)
+                .group_by(Star.recipe_id)
+            )
+            counts = {row.recipe_id: row.stars for row in result}
+        self._windows[window].reset(counts)
+        self._window_loaded[window] = time.monotonic()
+
+    async def top(self, window: str, limit: int) -> List[tuple[int, int]]:
+        """window("all", "24h", "7d") 의 상위 (레시피 id, 좋아요 수) 목록."""
+        if window == "all":
+            return self._totals.top(limit)
+        loaded = self._window_loaded.get(window)
+        if loaded is None or time.monotonic() - loaded > WINDOW_REFRESH_SECONDS:
+            await self._window_flight.do(window, lambda: self._load_window(window))
+        return self._windows[window].top(limit)
+
+    async def _run(self):
+        last_sync = time.monotonic()
+        while True:
+            await asyncio.sleep(STAR_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+                if time.monotonic() - last_sync >= STAR_SYNC_INTERVAL:
+                    await self.load_totals()
+                    last_sync = time.monotonic()
+            except Exception as e:
+                logger.warning(f"좋아요 수 반영 실패: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """백그라운드 작업을 멈추고 남은 증감을 반영합니다."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"종료 중 좋아요 수 반영 실패: {e}")
+
+
+star_counter = StarCounter()
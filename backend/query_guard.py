@@ -0,0 +1,143 @@
+"""SQL 문 수 측정/제한 (N+1 쿼리 회귀 방지, 테스트와 개발용)
+
+    with query_budget(3) as queries:      # 3개를 넘으면 QueryBudgetExceeded
+        client.put("/api/ingredients/1", json={...})
+
+    with count_queries() as queries:      # 제한 없이 세기
+        ...
+    print(queries.report())              # 같은 SQL 이 반복된 곳과 호출 위치(스택)
+
+engine 이벤트(after_cursor_execute)로 세므로 TestClient 처럼 다른 스레드에서 실행된 요청도 포함되며,
+그 사이 실행된 백그라운드 작업(좋아요 수 반영 등)의 문장도 함께 세어집니다.
+pytest 에서는 conftest.py 의 query_budget / query_counter fixture 를 사용합니다.
+"""
+import os
+import threading
+import traceback
+from collections import Counter as CounterDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+try:
+    import greenlet
+except ImportError:
+    greenlet = None
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+STACK_DEPTH = 8  # 보고서에 남길 앱 코드 프레임 수
+
+
+@dataclass
+class CapturedStatement:
+    statement: str
+    executemany: bool
+    stack: List[str] = field(default_factory=list)
+
+
+def _frames() -> list:
+    """호출 스택 프레임 (안쪽부터). AsyncSession 의 SQL 은 SQLAlchemy 가 만든 greenlet 안에서 실행되므로
+    부모 greenlet(await 한 코루틴 쪽) 스택까지 이어서 봅니다."""
+    frames = [frame for frame, _ in traceback.walk_stack(None)]
+    current = greenlet.getcurrent().parent if greenlet is not None else None
+    while current is not None:
+        frames.extend(frame for frame, _ in traceback.walk_stack(current.gr_frame))
+        current = current.parent
+    return frames
+
+
+def _app_stack() -> List[str]:
+    """현재 호출 스택 중 backend 코드 프레임만 (SQLAlchemy/라이브러리 프레임 제외), 바깥쪽부터."""
+    summary = traceback.StackSummary.extract(
+        ((frame, frame.f_lineno) for frame in _frames()
+         if frame.f_code.co_filename.startswith(_BACKEND_DIR) and frame.f_code.co_filename != __file__),
+        limit=STACK_DEPTH
+    )
+    return [f"{os.path.basename(f.filename)}:{f.lineno} {f.name}: {f.line}" for f in reversed(summary)]
+
+
+class QueryCounter:
+    def __init__(self, capture_stack: bool = True):
+        self.capture_stack = capture_stack
+        self.statements: List[CapturedStatement] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        captured = CapturedStatement(
+            statement=" ".join(statement.split()),
+            executemany=executemany,
+            stack=_app_stack() if self.capture_stack else []
+        )
+        with self._lock:
+            self.statements.append(captured)
+
+    def repeated(self, min_count: int = 2) -> List[tuple[str, int]]:
+        """같은 SQL(파라미터만 다른 문장 포함)이 min_count 번 이상 실행된 목록 (많은 순)."""
+        counts = CounterDict(captured.statement for captured in self.statements)
+        return [(statement, count) for statement, count in counts.most_common() if count >= min_count]
+
+    def report(self, min_repeat: int = 2) -> str:
+        lines = [f"SQL {self.count}개 실행"]
+        for i, captured in enumerate(self.statements, 1):
+            lines.append(f"  {i}. {captured.statement[:200]}{' (executemany)' if captured.executemany else ''}")
+        for statement, count in self.repeated(min_repeat):
+            lines.append(f"반복된 SQL {count}회: {statement[:200]}")
+            # 호출 위치별로 한 번씩 스택 표시
+            seen = set()
+            for captured in self.statements:
+                key = tuple(captured.stack)
+                if captured.statement == statement and key not in seen:
+                    seen.add(key)
+                    lines.extend(f"    {frame}" for frame in captured.stack or ["(스택 없음)"])
+                    lines.append("    --")
+        return "\n".join(lines)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _sync_engines(engines: Optional[Sequence]) -> list:
+    if engines is None:
+        from database import async_engine, engine
+        engines = (engine, async_engine)
+    return [e.sync_engine if isinstance(e, AsyncEngine) else e for e in engines]
+
+
+@contextmanager
+def count_queries(engines: Optional[Sequence] = None, capture_stack: bool = True) -> Iterator[QueryCounter]:
+    """블록 안에서 실행된 SQL 문을 셉니다. engines 를 생략하면 앱의 동기/비동기 엔진 모두."""
+    counter = QueryCounter(capture_stack)
+    targets = _sync_engines(engines)
+    for target in targets:
+        event.listen(target, "after_cursor_execute", counter._record)
+    try:
+        yield counter
+    finally:
+        for target in targets:
+            event.remove(target, "after_cursor_execute", counter._record)
+
+
+@contextmanager
+def query_budget(
+        max_statements: int,
+        max_repeats: Optional[int] = None,
+        engines: Optional[Sequence] = None
+) -> Iterator[QueryCounter]:
+    """SQL 문이 max_statements 개를 넘거나, 같은 SQL 이 max_repeats 번을 넘게 반복되면 실패합니다."""
+    with count_queries(engines) as counter:
+        yield counter
+    if counter.count > max_statements:
+        raise QueryBudgetExceeded(f"SQL 문 예산 {max_statements}개 초과\n{counter.report()}")
+    if max_repeats is not None and any(count > max_repeats for _, count in counter.repeated()):
+        raise QueryBudgetExceeded(f"같은 SQL 이 {max_repeats}번 넘게 반복됨 (N+1 의심)\n{counter.report(max_repeats + 1)}")
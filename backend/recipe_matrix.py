@@ -0,0 +1,373 @@
+"""보유 재료 -> 레시피 점수를 행렬 연산으로 계산하는 스코어러
+
+레시피 x 재료 희소 행렬(CSC: 재료별 레시피 목록)을 NumPy 배열로 유지하고, 보유 재료의 열만 더해
+모든 레시피의 점수를 한 번에 구합니다. 여러 사용자의 보유 재료는 사용 중인 재료 열만 남긴
+밀집 블록과의 행렬 곱(BLAS)으로 처리하므로, 재료 종류가 아이콘 카탈로그 규모(수백 개)일 때
+사용자별로 따로 계산하는 것보다 빠릅니다.
+
+새 레시피는 대기열에 두고 점수 계산 때 따로 더하다가, COMPACT_PENDING 개가 쌓이면 워커 스레드에서
+행렬에 합친 새 배열을 만들어 이벤트 루프에서 한 번에 교체합니다. 새 행 번호는 기존 행보다 크므로
+열마다 끝에 이어 붙이기만 하면 되어 전체 정렬 없이 O(nnz) 복사로 합쳐집니다.
+
+벤치마크: `python recipe_matrix.py [레시피 수 ...]`
+"""
+import asyncio
+from typing import Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from recommend import ingredient_key
+
+SEASONING_WEIGHT = 0.3  # 양념은 주재료보다 점수 기여를 낮춤
+EXPIRY_BOOST = 1.0  # 유통기한 당일 재료의 추가 가중치
+EXPIRY_HALF_LIFE_DAYS = 3.0  # 추가 가중치가 절반이 되는 남은 일수
+COMPACT_PENDING = 256  # 대기 중인 레시피가 이만큼 쌓이면 백그라운드에서 행렬에 합침
+MAX_SCORE_CELLS = 1 << 22  # 배치 계산 시 한 번에 만드는 (레시피 x 사용자) 점수 칸 수 상한
+
+
+def pantry_weight(days_until_expiry: Optional[int]) -> float:
+    """유통기한이 임박한 재료일수록 큰 가중치를 줍니다. 지난 재료는 0."""
+    if days_until_expiry is None:
+        return 1.0
+    if days_until_expiry < 0:
+        return 0.0
+    return 1.0 + EXPIRY_BOOST * 0.5 ** (days_until_expiry / EXPIRY_HALF_LIFE_DAYS)
+
+
+class _Matrix(NamedTuple):
+    """변경하지 않는 CSC 행렬 (합칠 때는 새로 만들어 통째로 교체)."""
+    recipe_ids: np.ndarray  # 행 -> 레시피 id (교체된 행은 -1)
+    indptr: np.ndarray  # 재료 j 의 레시피 행 번호는 rows[indptr[j]:indptr[j + 1]] (열 안에서 정렬)
+    rows: np.ndarray
+    data: np.ndarray
+    positions: dict  # 레시피 id -> 행
+
+
+_EMPTY = _Matrix(
+    np.empty(0, dtype=np.int64), np.zeros(1, dtype=np.int64),
+    np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32), {}
+)
+
+
+def _merge(matrix: _Matrix, pending: dict[int, dict[int, float]], n_columns: int) -> _Matrix:
+    """대기 중인 레시피를 새 행으로 덧붙인 행렬을 만듭니다 (matrix 는 바꾸지 않음)."""
+    indptr, rows, data = matrix.indptr, matrix.rows, matrix.data
+    if n_columns > len(indptr) - 1:
+        # 새 재료 열은 빈 열로 추가
+        indptr = np.concatenate([indptr, np.full(n_columns - (len(indptr) - 1), indptr[-1])])
+
+    # 이미 있는 레시피를 다시 추가하면 이전 행의 값은 버림
+    replaced = [matrix.positions[recipe_id] for recipe_id in pending if recipe_id in matrix.positions]
+    if replaced:
+        keep = ~np.isin(rows, replaced)
+        columns = np.repeat(np.arange(n_columns), np.diff(indptr))
+        rows, data = rows[keep], data[keep]
+        indptr = np.zeros(n_columns + 1, dtype=np.int64)
+        np.cumsum(np.bincount(columns[keep], minlength=n_columns), out=indptr[1:])
+
+    base = len(matrix.recipe_ids)
+    sizes = [len(weights) for weights in pending.values()]
+    new_rows = np.repeat(np.arange(base, base + len(pending), dtype=np.int32), sizes)
+    new_columns = np.fromiter(
+        (column for weights in pending.values() for column in weights), dtype=np.int64, count=len(new_rows)
+    )
+    new_data = np.fromiter(
+        (w for weights in pending.values() for w in weights.values()), dtype=np.float32, count=len(new_rows)
+    )
+    # 열 순서로 모으고(같은 열 안에서는 행 순서 유지) 각 열의 끝에 끼워 넣음
+    order = np.argsort(new_columns, kind="stable")
+    new_rows, new_columns, new_data = new_rows[order], new_columns[order], new_data[order]
+    at = indptr[new_columns + 1]
+    rows = np.insert(rows, at, new_rows)
+    data = np.insert(data, at, new_data)
+    added = np.zeros(n_columns + 1, dtype=np.int64)
+    np.cumsum(np.bincount(new_columns, minlength=n_columns), out=added[1:])
+
+    recipe_ids = np.concatenate([matrix.recipe_ids, np.fromiter(pending, dtype=np.int64, count=len(pending))])
+    recipe_ids[replaced] = -1
+    positions = dict(matrix.positions)
+    positions.update((recipe_id, base + i) for i, recipe_id in enumerate(pending))
+    return _Matrix(recipe_ids, indptr + added, rows, data, positions)
+
+
+def _dense_block(matrix: _Matrix, begin: int, end: int, columns: np.ndarray) -> np.ndarray:
+    """주어진 재료 열과 레시피 행 [begin, end) 로 이루어진 밀집 부분 행렬 (재료 x 레시피) 을 만듭니다."""
+    block = np.zeros((len(columns), end - begin), dtype=np.float32)
+    for k, column in enumerate(columns.tolist()):
+        lo, hi = matrix.indptr[column], matrix.indptr[column + 1]
+        rows = matrix.rows[lo:hi]
+        # 열 안의 레시피 행 번호는 정렬되어 있으므로 이분 탐색으로 범위를 자름
+        i, j = np.searchsorted(rows, (begin, end))
+        block[k, rows[i:j] - begin] = matrix.data[lo + i:lo + j]
+    return block
+
+
+def _top_rows(scores: np.ndarray, k: int, ordered: bool = True) -> np.ndarray:
+    """(사용자 수, 레시피 수) 점수에서 사용자마다 점수가 높은 레시피 위치 k개를 고릅니다.
+
+    argpartition 으로 k개를 먼저 고른 뒤, ordered 이면 그 k개만 내림차순 정렬합니다.
+    """
+    n = scores.shape[1]
+    if k < n:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        top = np.broadcast_to(np.arange(n), scores.shape)
+    if not ordered:
+        return top
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1)
+
+
+def _results(recipe_ids: np.ndarray, rows: np.ndarray, scores: np.ndarray) -> List[List[tuple[int, float]]]:
+    """(사용자 수, k) 레시피 행/점수를 사용자별 (레시피 id, 점수) 목록으로 바꿉니다."""
+    return [
+        [
+            (int(recipe_ids[row]), float(score))
+            for row, score in zip(user_rows.tolist(), user_scores.tolist())
+            if score > 0 and recipe_ids[row] >= 0
+        ]
+        for user_rows, user_scores in zip(rows, scores)
+    ]
+
+
+class RecipeScorer:
+    """레시피 x 재료 희소 행렬 기반 스코어러.
+
+    각 레시피 행은 가중치 합이 1이 되도록 정규화하므로, 가중치 1인 보유 재료에 대한 점수는
+    레시피 재료를 얼마나 갖췄는지(0~1)를 뜻합니다.
+    """
+
+    def __init__(self):
+        self.vocab: dict[str, int] = {}
+        self._matrix = _EMPTY
+        self._pending: dict[int, dict[int, float]] = {}  # 레시피 id -> {재료 열: 가중치}
+        self._compaction: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        positions = self._matrix.positions
+        return len(positions) + sum(recipe_id not in positions for recipe_id in self._pending)
+
+    def _column(self, key: str) -> int:
+        column = self.vocab.get(key)
+        if column is None:
+            column = self.vocab[key] = len(self.vocab)
+        return column
+
+    def add(self, recipe_id: int, ingredients: Iterable[str], seasonings: Iterable[str] = ()):
+        weights: dict[int, float] = {}
+        for items, weight in ((seasonings or (), SEASONING_WEIGHT), (ingredients or (), 1.0)):
+            for item in items:
+                key = ingredient_key(str(item))
+                if key:
+                    # 주재료와 양념에 같은 키가 있으면 주재료 가중치 사용
+                    weights[self._column(key)] = weight
+        total = sum(weights.values())
+        if total:
+            # 같은 레시피가 여러 번 추가되면 마지막 것만 사용
+            self._pending.pop(recipe_id, None)
+            self._pending[recipe_id] = {column: w / total for column, w in weights.items()}
+
+    def add_recipe(self, recipe):
+        self.add(recipe.id, recipe.ingredients, recipe.seasonings)
+
+    def compact(self):
+        """대기 중인 레시피를 지금 바로 행렬에 합칩니다 (이벤트 루프 밖: 시작 전, 벤치마크)."""
+        pending = dict(self._pending)
+        if pending:
+            self._apply(self._matrix, pending, _merge(self._matrix, pending, len(self.vocab)))
+
+    async def compact_async(self):
+        """대기 중인 레시피를 워커 스레드에서 합친 뒤 이벤트 루프에서 교체합니다."""
+        matrix, pending = self._matrix, dict(self._pending)
+        if pending:
+            merged = await asyncio.to_thread(_merge, matrix, pending, len(self.vocab))
+            self._apply(matrix, pending, merged)
+
+    def schedule_compaction(self):
+        """대기 중인 레시피가 COMPACT_PENDING 개 이상이면 백그라운드 합치기를 시작합니다 (하나씩만)."""
+        if len(self._pending) >= COMPACT_PENDING and (self._compaction is None or self._compaction.done()):
+            self._compaction = asyncio.create_task(self.compact_async())
+
+    def _apply(self, base: _Matrix, pending: dict[int, dict[int, float]], merged: _Matrix):
+        if self._matrix is not base:  # 그 사이 다른 합치기가 끝난 경우 버림
+            return
+        self._matrix = merged
+        # 합치는 동안 다시 추가된 레시피는 대기열에 남김
+        for recipe_id, weights in pending.items():
+            if self._pending.get(recipe_id) is weights:
+                del self._pending[recipe_id]
+
+    def pantry_vector(self, pantry: dict[str, float]) -> tuple[np.ndarray, np.ndarray]:
+        """{재료 키: 가중치} 를 (재료 열 번호, 가중치) 희소 벡터로 바꿉니다. 모르는 재료는 무시."""
+        columns, weights = [], []
+        for key, weight in pantry.items():
+            column = self.vocab.get(key)
+            if column is not None and weight > 0:
+                columns.append(column)
+                weights.append(weight)
+        return np.asarray(columns, dtype=np.int64), np.asarray(weights, dtype=np.float32)
+
+    def score(self, pantry: dict[str, float]) -> tuple[np.ndarray, np.ndarray]:
+        """한 사용자의 보유 재료에 대한 (레시피 id, 점수) 배열 (행렬의 행 + 대기 중인 레시피)."""
+        matrix = self._matrix
+        pending = list(self._pending.items())
+        n_rows = len(matrix.recipe_ids)
+        scores = np.zeros(n_rows + len(pending), dtype=np.float32)
+        columns, weights = self.pantry_vector(pantry)
+        n_columns = len(matrix.indptr) - 1
+        for column, weight in zip(columns.tolist(), weights.tolist()):
+            if column < n_columns:
+                begin, end = matrix.indptr[column], matrix.indptr[column + 1]
+                scores[matrix.rows[begin:end]] += weight * matrix.data[begin:end]
+
+        if not pending:
+            return matrix.recipe_ids, scores
+        pantry_columns = dict(zip(columns.tolist(), weights.tolist()))
+        for i, (recipe_id, recipe_weights) in enumerate(pending):
+            scores[n_rows + i] = sum(pantry_columns.get(c, 0.0) * w for c, w in recipe_weights.items())
+            replaced = matrix.positions.get(recipe_id)
+            if replaced is not None:
+                scores[replaced] = 0.0
+        recipe_ids = np.concatenate([matrix.recipe_ids, np.asarray([rid for rid, _ in pending], dtype=np.int64)])
+        return recipe_ids, scores
+
+    def pantry_matrix(self, pantries: Sequence[dict[str, float]]) -> np.ndarray:
+        """여러 사용자의 보유 재료를 (재료 수, 사용자 수) 가중치 행렬로 만듭니다."""
+        matrix = np.zeros((len(self.vocab), len(pantries)), dtype=np.float32)
+        for user, pantry in enumerate(pantries):
+            columns, weights = self.pantry_vector(pantry)
+            matrix[columns, user] = weights
+        return matrix
+
+    def top_k(self, pantry: dict[str, float], k: int = 10) -> List[tuple[int, float]]:
+        """점수가 높은 레시피 k개를 (레시피 id, 점수) 로 반환합니다."""
+        recipe_ids, scores = self.score(pantry)
+        if len(scores) == 0 or k <= 0:
+            return []
+        scores = scores[None, :]
+        top = _top_rows(scores, k)
+        return _results(recipe_ids, top, np.take_along_axis(scores, top, axis=1))[0]
+
+    def top_k_batch(self, pantries: Sequence[dict[str, float]], k: int = 10,
+                    max_cells: int = MAX_SCORE_CELLS) -> List[List[tuple[int, float]]]:
+        """여러 사용자의 보유 재료를 행렬 곱으로 한 번에 점수화합니다.
+
+        누군가 가진 재료 열만 남긴 레시피 행렬 블록과 (재료 x 사용자) 행렬을 곱하고(BLAS),
+        블록마다 사용자별 상위 k개 후보만 남겨 마지막에 합칩니다. 블록 크기는 점수 행렬이
+        max_cells 를 넘지 않도록 정합니다. 대기 중인 레시피는 마지막 블록으로 계산합니다.
+        """
+        matrix = self._matrix
+        pending = list(self._pending.items())
+        n_rows, n_users = len(matrix.recipe_ids), len(pantries)
+        if n_rows + len(pending) == 0 or n_users == 0 or k <= 0:
+            return [[] for _ in range(n_users)]
+
+        pantry_matrix = self.pantry_matrix(pantries)
+        columns = np.flatnonzero(pantry_matrix.any(axis=1))
+        # (사용자 x 사용 중인 재료) 가중치
+        weights = np.ascontiguousarray(pantry_matrix[columns].T)
+        # 행렬에 아직 없는 새 재료 열은 대기 중인 레시피에만 있음
+        in_matrix = columns < len(matrix.indptr) - 1
+        replaced = np.asarray(
+            [matrix.positions[recipe_id] for recipe_id, _ in pending if recipe_id in matrix.positions], dtype=np.int64
+        )
+        block_rows = max(k, max_cells // n_users)
+
+        candidates, candidate_scores = [], []
+
+        def keep_top(scores: np.ndarray, begin: int):
+            top = _top_rows(scores, k, ordered=False)
+            candidates.append(top + begin)
+            candidate_scores.append(np.take_along_axis(scores, top, axis=1))
+
+        for begin in range(0, n_rows, block_rows):
+            end = min(n_rows, begin + block_rows)
+            scores = weights[:, in_matrix] @ _dense_block(matrix, begin, end, columns[in_matrix])
+            # 대기 중인 레시피로 교체될 이전 행은 제외
+            scores[:, replaced[(replaced >= begin) & (replaced < end)] - begin] = 0.0
+            keep_top(scores, begin)
+
+        if pending:
+            position = {column: i for i, column in enumerate(columns.tolist())}
+            block = np.zeros((len(columns), len(pending)), dtype=np.float32)
+            for j, (_, recipe_weights) in enumerate(pending):
+                for column, w in recipe_weights.items():
+                    i = position.get(column)
+                    if i is not None:
+                        block[i, j] = w
+            keep_top(weights @ block, n_rows)
+
+        recipe_ids = matrix.recipe_ids
+        if pending:
+            recipe_ids = np.concatenate(
+                [recipe_ids, np.asarray([recipe_id for recipe_id, _ in pending], dtype=np.int64)]
+            )
+        candidates = np.concatenate(candidates, axis=1)
+        candidate_scores = np.concatenate(candidate_scores, axis=1)
+        top = _top_rows(candidate_scores, k)
+        return _results(recipe_ids, np.take_along_axis(candidates, top, axis=1),
+                        np.take_along_axis(candidate_scores, top, axis=1))
+
+def _benchmark(n_recipes: int, n_ingredients: int = 300, per_recipe: int = 10,
+               n_users: int = 256, pantry_size: int = 20, k: int = 10):
+    """무작위 레시피/보유 재료로 행렬 구성, 새 레시피 합치기, 단일/배치 점수 계산 시간을 측정합니다."""
+    import time
+
+    rng = np.random.default_rng(0)
+    # 자주 쓰는 재료가 더 많이 등장하도록 Zipf 분포에 가깝게 생성
+    popularity = 1.0 / np.arange(1, n_ingredients + 1)
+    popularity /= popularity.sum()
+    names = [f"재료{i}" for i in range(n_ingredients)]
+
+    def add(scorer: RecipeScorer, first_id: int, count: int):
+        for recipe_id, row in enumerate(rng.choice(n_ingredients, size=(count, per_recipe), p=popularity), first_id):
+            scorer.add(recipe_id, [names[c] for c in row])
+
+    scorer = RecipeScorer()
+    add(scorer, 0, n_recipes)
+    started = time.perf_counter()
+    scorer.compact()
+    build = time.perf_counter() - started
+
+    pantries = [
+        {names[int(c)]: pantry_weight(int(d)) for c, d in zip(
+            rng.choice(n_ingredients, size=pantry_size, replace=False, p=popularity),
+            rng.integers(0, 14, size=pantry_size)
+        )}
+        for _ in range(n_users)
+    ]
+
+    def measure() -> tuple[float, float]:
+        started = time.perf_counter()
+        singles = [scorer.top_k(pantry, k) for pantry in pantries[:32]]
+        single = (time.perf_counter() - started) / 32
+
+        started = time.perf_counter()
+        batches = scorer.top_k_batch(pantries, k)
+        batch = (time.perf_counter() - started) / n_users
+
+        # 동점 레시피 순서는 다를 수 있으므로 점수만 비교
+        for a, b in zip(singles, batches):
+            assert np.allclose([s for _, s in a], [s for _, s in b], atol=1e-5)
+        return single, batch
+
+    # 합치기 직전(대기 COMPACT_PENDING - 1 개)의 점수 계산과 합치기 한 번
+    add(scorer, n_recipes, COMPACT_PENDING - 1)
+    pending_single, pending_batch = measure()
+
+    started = time.perf_counter()
+    scorer.compact()
+    merge = time.perf_counter() - started
+    single, batch = measure()
+
+    print(
+        f"레시피 {n_recipes:>9,}  구성 {build * 1000:8.1f}ms  새 레시피 {COMPACT_PENDING - 1}개 합치기 {merge * 1000:7.1f}ms  "
+        f"단일 {single * 1000:6.2f}ms/명  배치 {batch * 1000:6.2f}ms/명  "
+        f"(대기 중: 단일 {pending_single * 1000:6.2f}  배치 {pending_batch * 1000:6.2f})"
+    )
+
+if __name__ == "__main__":
+    import sys
+
+    for size in [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]:
+        _benchmark(size)
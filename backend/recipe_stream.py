@@ -0,0 +1,74 @@
+import json
+from typing import Any, List, Tuple
+
+
+class RecipeStreamParser:
+    """GPT가 스트리밍하는 JSON 조각을 받아, 완성된 문자열 값을 경로와 함께 즉시 돌려줍니다.
+
+    예: {"recipe": {"title": "감자조림", "steps": ["...", ...]}} 에서
+    (["recipe", "title"], "감자조림"), (["recipe", "steps", 0], "...") 순으로 반환
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        # 컨테이너 스택: 객체는 [현재 키, 키를 기다리는 중인지], 배열은 [현재 인덱스]
+        self._stack: List[list] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+
+    def feed(self, chunk: str) -> List[Tuple[List[Any], str]]:
+        """새 조각을 추가하고 이번에 완성된 (경로, 값) 목록을 반환합니다."""
+        self._buffer += chunk
+        completed = []
+
+        while self._pos < len(self._buffer):
+            c = self._buffer[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    value = json.loads(self._buffer[self._string_start:self._pos + 1])
+                    item = self._on_string(value)
+                    if item:
+                        completed.append(item)
+            elif c == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif c == "{":
+                self._stack.append(["obj", None, True])
+            elif c == "[":
+                self._stack.append(["arr", 0])
+            elif c in "}]":
+                if self._stack:
+                    self._stack.pop()
+            elif c == ":":
+                if self._stack and self._stack[-1][0] == "obj":
+                    self._stack[-1][2] = False
+            elif c == ",":
+                if self._stack:
+                    top = self._stack[-1]
+                    if top[0] == "arr":
+                        top[1] += 1
+                    else:
+                        top[2] = True
+
+            self._pos += 1
+
+        return completed
+
+    def _on_string(self, value: str):
+        if not self._stack:
+            return None
+
+        top = self._stack[-1]
+        if top[0] == "obj" and top[2]:
+            top[1] = value
+            return None
+
+        return [entry[1] for entry in self._stack], value
@@ -0,0 +1,134 @@
+import heapq
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from icons import get_icon_index, normalize_ingredient_name
+
+# "양파(중) 1/2개", "돼지고기 300g", "소금 약간" 에서 분량 표기를 제거하기 위한 패턴
+_PARENTHESES = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+_AMOUNT_WORDS = {"약간", "조금", "적당량", "적당히", "소량", "한줌", "한꼬집", "취향껏", "선택"}
+
+
+def ingredient_key(name: str) -> Optional[str]:
+    """재료 표기를 비교용 키로 바꿉니다.
+
+    아이콘 카탈로그에 있는 재료면 카탈로그 이름("국산 감자 2개" -> "감자")을,
+    없으면 분량을 뺀 정규화된 이름을 사용합니다.
+    """
+    if not name:
+        return None
+
+    words = [
+        word for word in _PARENTHESES.sub(" ", name).split()
+        if not word[0].isdigit() and word not in _AMOUNT_WORDS
+    ]
+    if not words:
+        return None
+
+    text = " ".join(words)
+    return get_icon_index().match(text) or normalize_ingredient_name(text)
+
+
+@dataclass(frozen=True)
+class IndexedRecipe:
+    id: int
+    title: str
+    subtitle: Optional[str]
+    youtube_link: str
+    video_id: Optional[str]
+    ingredients: tuple  # 원래 재료 표기
+    keys: tuple  # ingredients 와 같은 순서의 비교용 키 (None 이면 매칭 불가)
+    key_count: int  # 서로 다른 키 수 (점수의 분모)
+
+
+@dataclass
+class Recommendation:
+    recipe: IndexedRecipe
+    score: float
+    matched: List[str]
+    missing: List[str]
+
+
+class RecipeIndex:
+    """저장된 레시피의 재료 -> 레시피 id 역색인.
+
+    추천 시 보유 재료 키의 posting 만 훑으므로 레시피 수가 많아도 DB나 외부 API 없이 바로 응답합니다.
+    """
+
+    def __init__(self):
+        self._recipes: dict[int, IndexedRecipe] = {}
+        self._postings: dict[str, set[int]] = {}
+        # sync_recipe_index 가 DB 에서 읽은 마지막 id. 이 워커가 직접 저장해 add 한 레시피는 올리지 않음
+        # (다른 워커가 먼저 저장한, 더 작은 id 의 레시피를 건너뛰지 않도록)
+        self.synced_id = 0
+
+    def __len__(self) -> int:
+        return len(self._recipes)
+
+    def __contains__(self, recipe_id: int) -> bool:
+        return recipe_id in self._recipes
+
+    def get(self, recipe_id: int) -> Optional[IndexedRecipe]:
+        return self._recipes.get(recipe_id)
+
+    def add(self, recipe_id: int, title: str, subtitle: Optional[str], youtube_link: str,
+            video_id: Optional[str], ingredients: Iterable[str]):
+        """레시피를 색인에 추가합니다. 같은 id가 있으면 교체합니다."""
+        self.remove(recipe_id)
+
+        ingredients = tuple(str(item) for item in ingredients or ())
+        keys = tuple(ingredient_key(item) for item in ingredients)
+        unique_keys = {key for key in keys if key}
+        self._recipes[recipe_id] = IndexedRecipe(
+            recipe_id, title, subtitle, youtube_link, video_id, ingredients, keys, len(unique_keys)
+        )
+        for key in unique_keys:
+            self._postings.setdefault(key, set()).add(recipe_id)
+
+    def add_recipe(self, recipe):
+        """Recipe 모델(또는 같은 속성을 가진 행)을 색인에 추가합니다."""
+        self.add(recipe.id, recipe.title, recipe.subtitle, recipe.youtube_link,
+                 recipe.video_id, recipe.ingredients)
+
+    def remove(self, recipe_id: int):
+        indexed = self._recipes.pop(recipe_id, None)
+        if indexed is None:
+            return
+        for key in set(filter(None, indexed.keys)):
+            posting = self._postings.get(key)
+            if posting is not None:
+                posting.discard(recipe_id)
+                if not posting:
+                    del self._postings[key]
+
+    def recommend(self, pantry: Iterable[str], limit: int = 10) -> List[Recommendation]:
+        """보유 재료(비교용 키)로 만들 수 있는 비율이 높은 레시피 순으로 반환합니다.
+
+        점수는 레시피 재료 중 보유한 비율이며, 같으면 겹치는 재료가 많은 순입니다.
+        """
+        pantry_keys = {key for key in pantry if key}
+        hits: dict[int, int] = {}
+        for key in pantry_keys:
+            for recipe_id in self._postings.get(key, ()):
+                hits[recipe_id] = hits.get(recipe_id, 0) + 1
+
+        def rank(item):
+            recipe_id, count = item
+            return count / self._recipes[recipe_id].key_count, count, recipe_id
+
+        return [
+            explain(self._recipes[recipe_id], pantry_keys, count / self._recipes[recipe_id].key_count)
+            for recipe_id, count in heapq.nlargest(limit, hits.items(), key=rank)
+        ]
+
+
+def explain(recipe: IndexedRecipe, pantry_keys: set, score: float) -> Recommendation:
+    """레시피 재료를 보유한 것과 부족한 것으로 나눠 추천 결과를 만듭니다."""
+    matched = [item for item, key in zip(recipe.ingredients, recipe.keys) if key in pantry_keys]
+    missing = [item for item, key in zip(recipe.ingredients, recipe.keys) if key not in pantry_keys]
+    return Recommendation(recipe, score, matched, missing)
+
+
+# 앱 시작 시 recipes 테이블에서 채우고, 레시피 저장 시 add_recipe 로 갱신
+recipe_index = RecipeIndex()
@@ -39,9 +39,14 @@ class IngredientCreate(BaseSchema):
     added_date: datetime
 
 
+class IngredientBulkCreate(BaseSchema):
+    ingredients: List[IngredientCreate] = Field(..., min_length=1, max_length=500)  # 한 번에 최대 500개
+
+
 class IngredientUpdate(BaseSchema):
     name: Optional[str] = None
     category: Optional[str] = None
+    added_date: Optional[datetime] = None
     limit_date: Optional[datetime] = None
     image_name: Optional[str] = None
 
@@ -59,6 +64,19 @@ class IngredientResponse(BaseSchema):
 
 class IngredientsResponse(BaseSchema):
     ingredients: List[IngredientResponse]
+    next_cursor: Optional[str] = None  # 다음 페이지 요청 시 cursor 로 전달
+
+
+class RecognizedIngredient(BaseSchema):
+    name: str  # 재료명 (아이콘 카탈로그 어휘)
+    label: str  # 모델 라벨
+    confidence: float
+    image_url: Optional[str] = None
+
+
+class PhotoIngredientsResponse(BaseSchema):
+    recognized: List[RecognizedIngredient]
+    ingredients: List[IngredientResponse]  # save=true 일 때 추가된 재료
 
 
 class RecipeBase(BaseSchema):
@@ -79,10 +97,67 @@ class RecipeResponse(RecipeBase):
     created_at: datetime
 
 
+class RecommendedRecipe(BaseSchema):
+    id: int
+    title: str
+    subtitle: Optional[str] = None
+    youtube_link: str
+    video_id: Optional[str] = None
+    score: float  # 레시피 재료 중 보유한 비율 (0~1, prefer_expiring 이면 유통기한 가중 점수)
+    matched_ingredients: List[str]
+    missing_ingredients: List[str]
+
+
+class RecommendationsResponse(BaseSchema):
+    recipes: List[RecommendedRecipe]
+
+
+class RecipeSearchResult(BaseSchema):
+    id: int
+    title: str
+    subtitle: Optional[str] = None
+    youtube_link: str
+    video_id: Optional[str] = None
+    score: float  # semantic: 질의와의 코사인 유사도, keyword: BM25 점수
+
+
+class RecipeSearchResponse(BaseSchema):
+    recipes: List[RecipeSearchResult]
+
+
+class PopularRecipe(BaseSchema):
+    id: int
+    title: str
+    subtitle: Optional[str] = None
+    youtube_link: str
+    video_id: Optional[str] = None
+    star_count: int  # window 안에 받은 좋아요 수
+
+
+class PopularRecipesResponse(BaseSchema):
+    window: str
+    recipes: List[PopularRecipe]
+
+
+class StarredRecipeSummary(BaseSchema):
+    id: int
+    title: str
+    subtitle: Optional[str] = None
+    video_id: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    starred_at: datetime  # 좋아요를 누른 시각
+
+
+class StarredRecipesResponse(BaseSchema):
+    recipes: List[StarredRecipeSummary]
+    next_cursor: Optional[str] = None  # 다음 페이지 요청 시 cursor 로 전달
+
+
 class StarResponse(BaseSchema):
     recipe_id: int
     kakao_id: int
-    created_at: datetime
+    starred: bool  # 토글 후 좋아요 상태
+    created_at: Optional[datetime] = None  # 좋아요를 누른 시각 (취소하면 None)
 
 
 class StarBase(BaseModel):
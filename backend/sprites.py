@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # brotli 미설치 시 gzip 사전 압축만 생성
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+SPRITE_PREFIX = "icons"
+KEEP_PREVIOUS_SPRITES = 1  # 배포 직후 이전 페이지가 참조할 수 있도록 남겨 둘 이전 스프라이트 수
+
+_SVG_ROOT = re.compile(r"<svg\b([^>]*)>(.*)</svg>", re.S)
+_ATTR = re.compile(r'([\w:-]+)\s*=\s*"([^"]*)"')
+_ID_ATTR = re.compile(r'\bid="([^"]+)"')
+_XML_PROLOG = re.compile(r"<\?xml[^>]*\?>|<!DOCTYPE[^>]*>|<!--.*?-->", re.S)
+_SPRITE_FILE = re.compile(rf"{SPRITE_PREFIX}\.([0-9a-f]{{12}})\.svg(?:\.gz|\.br)?")
+
+
+def _parse_size(attrs: dict) -> tuple[str, float, float]:
+    """아이콘의 viewBox와 가로/세로 크기를 구합니다."""
+    view_box = attrs.get("viewBox")
+    if view_box:
+        _, _, w, h = (float(v) for v in view_box.replace(",", " ").split())
+        return view_box, w, h
+
+    w = float(re.sub(r"[^\d.]", "", attrs.get("width", "")) or 24)
+    h = float(re.sub(r"[^\d.]", "", attrs.get("height", "")) or 24)
+    return f"0 0 {w:g} {h:g}", w, h
+
+
+def _prefix_ids(body: str, prefix: str) -> str:
+    """아이콘끼리 내부 id(gradient 등)가 충돌하지 않도록 접두어를 붙입니다."""
+    for icon_id in set(_ID_ATTR.findall(body)):
+        new_id = f"{prefix}-{icon_id}"
+        body = body.replace(f'id="{icon_id}"', f'id="{new_id}"')
+        body = body.replace(f"url(#{icon_id})", f"url(#{new_id})")
+        body = body.replace(f'href="#{icon_id}"', f'href="#{new_id}"')
+    return body
+
+
+def _write_atomic(path: str, data: bytes):
+    """같은 디렉토리의 임시 파일에 쓴 뒤 교체합니다 (다른 워커가 쓰다 만 파일을 제공하지 않도록)."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _remove_stale_sprites(out_dir: str, current_digest: str):
+    """현재 스프라이트와 최근 KEEP_PREVIOUS_SPRITES 개를 빼고 이전 스프라이트(.svg/.gz/.br)를 지웁니다."""
+    files: dict[str, list[str]] = {}
+    for file_name in os.listdir(out_dir):
+        match = _SPRITE_FILE.fullmatch(file_name)
+        if match and match.group(1) != current_digest:
+            files.setdefault(match.group(1), []).append(file_name)
+
+    def created(digest: str) -> float:
+        try:
+            return os.path.getmtime(os.path.join(out_dir, f"{SPRITE_PREFIX}.{digest}.svg"))
+        except OSError:
+            return 0.0
+
+    for digest in sorted(files, key=created, reverse=True)[KEEP_PREVIOUS_SPRITES:]:
+        for file_name in files[digest]:
+            try:
+                os.remove(os.path.join(out_dir, file_name))
+            except FileNotFoundError:  # 다른 워커가 먼저 지운 경우
+                pass
+        logger.info(f"이전 아이콘 스프라이트 삭제: {SPRITE_PREFIX}.{digest}.svg")
+
+
+def build_icon_sprite(icons_dir: str, out_dir: str, url_prefix: str) -> Optional[dict]:
+    """icons_dir의 SVG 아이콘을 하나의 스프라이트로 묶고 gzip/brotli 사전 압축본을 만듭니다.
+
+    아이콘은 세로로 쌓고 각각 <view id="아이콘명">을 두어 "스프라이트.svg#아이콘명" 으로
+    <img>/CSS 에서 바로 쓸 수 있게 합니다. 파일명에 내용 해시를 넣어 배포마다 새 URL이 됩니다.
+
+    반환값: {"url": 스프라이트 URL, "icons": {아이콘 파일명: "스프라이트 URL#아이콘명"}}
+    """
+    if not os.path.isdir(icons_dir):
+        return None
+
+    file_names = sorted(f for f in os.listdir(icons_dir) if f.endswith(".svg"))
+    if not file_names:
+        return None
+
+    views = []
+    bodies = []
+    fragments = {}
+    offset = 0.0
+    max_width = 0.0
+    for file_name in file_names:
+        with open(os.path.join(icons_dir, file_name), encoding="utf-8") as f:
+            svg = _XML_PROLOG.sub("", f.read())
+
+        match = _SVG_ROOT.search(svg)
+        if not match:
+            logger.warning(f"SVG 형식이 아니어서 스프라이트에서 제외합니다: {file_name}")
+            continue
+
+        attrs = dict(_ATTR.findall(match.group(1)))
+        view_box, width, height = _parse_size(attrs)
+        name = os.path.splitext(file_name)[0]
+
+        views.append(f'<view id="{name}" viewBox="0 {offset:g} {width:g} {height:g}"/>')
+        bodies.append(
+            f'<svg x="0" y="{offset:g}" width="{width:g}" height="{height:g}" viewBox="{view_box}">'
+            f'{_prefix_ids(match.group(2), name)}</svg>'
+        )
+        fragments[file_name] = name
+        offset += height
+        max_width = max(max_width, width)
+
+    content = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'viewBox="0 0 {max_width:g} {offset:g}">'
+        + "".join(views) + "".join(bodies) + "</svg>"
+    ).encode("utf-8")
+
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    sprite_name = f"{SPRITE_PREFIX}.{digest}.svg"
+    sprite_path = os.path.join(out_dir, sprite_name)
+
+    # 같은 내용이면 이미 만들어진 파일을 그대로 사용. .svg 를 마지막에 쓰므로 .svg 가 있으면 압축본도 있음
+    if not os.path.exists(sprite_path):
+        os.makedirs(out_dir, exist_ok=True)
+        _write_atomic(f"{sprite_path}.gz", gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write_atomic(f"{sprite_path}.br", brotli.compress(content, quality=11))
+        _write_atomic(sprite_path, content)
+        logger.info(f"아이콘 스프라이트 생성: {sprite_name} ({len(fragments)}개)")
+    _remove_stale_sprites(out_dir, digest)
+
+    sprite_url = f"{url_prefix}/{sprite_name}"
+    return {
+        "url": sprite_url,
+        "icons": {file_name: f"{sprite_url}#{name}" for file_name, name in fragments.items()}
+    }
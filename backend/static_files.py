@@ -0,0 +1,78 @@
+import mimetypes
+import re
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.types import Scope
+
+# 파일명에 내용 해시가 들어간 파일 (예: icons.3f2a9c1b7d0e.svg)
+HASHED_FILE = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=3600"
+
+# 사전 압축 파일 (선호 순)
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """Accept-Encoding 헤더에서 받을 수 있는 인코딩만 골라냅니다 (q=0 은 거부, "*" 는 나머지 전부)."""
+    qualities = {}
+    for token in accept_encoding.split(","):
+        name, *params = token.split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+
+    accepted = {name for name, quality in qualities.items() if quality > 0}
+    if "x-gzip" in accepted and "gzip" not in qualities:
+        accepted.add("gzip")
+    if "*" in accepted:
+        accepted.update(encoding for encoding, _ in PRECOMPRESSED if encoding not in qualities)
+    return accepted
+
+
+class CachedStaticFiles(StaticFiles):
+    """정적 파일에 캐시 헤더를 붙이고, 사전 압축본(.br/.gz)이 있으면 대신 제공합니다.
+
+    해시가 들어간 파일은 내용이 바뀌면 URL도 바뀌므로 immutable 로 1년간 캐시합니다.
+    ETag/Last-Modified 및 304 처리는 StaticFiles(FileResponse)가 담당합니다.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+
+        response = None
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding not in accepted:
+                continue
+            try:
+                response = await super().get_response(path + suffix, scope)
+            except HTTPException:
+                continue
+            response.headers["content-encoding"] = encoding
+            media_type = mimetypes.guess_type(path)[0]
+            if media_type:
+                response.headers["content-type"] = media_type
+            break
+
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        response.headers["vary"] = "Accept-Encoding"
+        if HASHED_FILE.search(path):
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers.setdefault("cache-control", DEFAULT_CACHE_CONTROL)
+        return response
@@ -0,0 +1,40 @@
+"""재료 일괄 추가"""
+import datetime
+
+from sqlalchemy import select
+
+from database import AsyncSessionLocal, SessionLocal
+from ingredient_bulk import _inserted_ids
+from models import Ingredient
+
+
+def test_bulk_insert_returns_ids_in_order(client, user):
+    now = datetime.datetime.now().isoformat()
+    items = [{"name": name, "category": "채소", "added_date": now} for name in ("양파", "당근", "양파")]
+    response = client.post("/api/ingredients/bulk", json={"ingredients": items})
+    assert response.status_code == 200
+    created = response.json()["ingredients"]
+
+    with SessionLocal() as db:
+        names = dict(db.execute(select(Ingredient.id, Ingredient.name).where(Ingredient.kakao_id == user)).all())
+    assert [names[item["id"]] for item in created] == ["양파", "당근", "양파"]
+
+
+def test_inserted_ids_skips_interleaved_rows(app_client, user):
+    """MySQL 경로: id 사이에 다른 요청의 행이 끼어 있어도 입력 순서대로 찾음."""
+    now = datetime.datetime.now()
+
+    def row(name):
+        return {"name": name, "category": "채소", "added_date": now, "limit_date": now, "kakao_id": user, "image_name": None}
+
+    with SessionLocal() as db:
+        stored = [Ingredient(**row(name)) for name in ("감자", "다른 요청", "고구마", "감자")]
+        db.add_all(stored)
+        db.commit()
+        stored_ids = [ingredient.id for ingredient in stored]
+
+    async def find():
+        async with AsyncSessionLocal() as db:
+            return await _inserted_ids(db, user, [row("감자"), row("고구마"), row("감자")], stored_ids[0])
+
+    assert app_client.portal.call(find) == [stored_ids[0], stored_ids[2], stored_ids[3]]
@@ -0,0 +1,57 @@
+"""재료 목록 cursor 페이지네이션: 모든 정렬에서 빠지거나 겹치는 행이 없어야 함"""
+import datetime
+
+import pytest
+
+from database import SessionLocal
+from models import Ingredient
+
+NAMES = ["파", None, "감자", "파", None, "가지"]
+
+
+def add_ingredients(kakao_id: int) -> list[int]:
+    now = datetime.datetime.now()
+    with SessionLocal() as db:
+        ingredients = [
+            Ingredient(
+                name=name,
+                category="채소",
+                added_date=now - datetime.timedelta(days=i + 1),
+                limit_date=now + datetime.timedelta(days=i + 1),
+                kakao_id=kakao_id
+            )
+            for i, name in enumerate(NAMES)
+        ]
+        db.add_all(ingredients)
+        db.commit()
+        return [ingredient.id for ingredient in ingredients]
+
+
+def fetch_all(client, sort: str, limit: int) -> list[dict]:
+    rows, cursor = [], None
+    while True:
+        params = {"sort": sort, "limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/user-ingredients", params=params)
+        assert response.status_code == 200
+        body = response.json()
+        rows += body["ingredients"]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return rows
+
+
+@pytest.mark.parametrize("sort", ["expiring", "latest", "name"])
+@pytest.mark.parametrize("limit", [1, 2, 4])
+def test_pages_cover_every_row(client, user, sort, limit):
+    ids = add_ingredients(user)
+    rows = fetch_all(client, sort, limit)
+    assert sorted(row["id"] for row in rows) == sorted(ids)
+
+
+def test_name_sort_puts_null_names_first(client, user):
+    ids = add_ingredients(user)
+    rows = fetch_all(client, "name", 1)
+    assert [row["name"] for row in rows] == [None, None, "가지", "감자", "파", "파"]
+    assert [row["id"] for row in rows[:2]] == [ids[1], ids[4]]
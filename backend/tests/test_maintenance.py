@@ -0,0 +1,77 @@
+"""유지보수 마이그레이션"""
+from sqlalchemy import create_engine, inspect, text
+
+from database import engine
+from maintenance import create_missing_indexes, rebuild_star_counts
+
+
+def test_creates_indexes_missing_on_existing_table(tmp_path):
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    create_missing_indexes(old_engine)
+    with old_engine.begin() as conn:
+        # 인덱스가 모델에 추가되기 전에 만들어진 DB
+        conn.execute(text("DROP INDEX ix_stars_kakao_created"))
+        conn.execute(text("DROP INDEX ix_stars_created"))
+
+    assert create_missing_indexes(old_engine) == ["ix_stars_created", "ix_stars_kakao_created"]
+    indexes = {index["name"]: index["column_names"] for index in inspect(old_engine).get_indexes("stars")}
+    assert indexes["ix_stars_kakao_created"] == ["kakao_id", "created_at"]
+    assert indexes["ix_stars_created"] == ["created_at"]
+    assert create_missing_indexes(old_engine) == []
+    old_engine.dispose()
+
+
+def test_star_migration_creates_ranking_index(app_client):
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_stars_created"))
+    rebuild_star_counts(None)
+    assert "ix_stars_created" in {index["name"] for index in inspect(engine).get_indexes("stars")}
+
+
+def test_skips_indexes_on_missing_columns(tmp_path):
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with old_engine.begin() as conn:
+        # video_id 컬럼이 생기기 전의 recipes 테이블 (video-ids 를 아직 실행하지 않은 DB)
+        conn.execute(text(
+            "CREATE TABLE recipes (id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL, subtitle VARCHAR(255), "
+            "youtube_link VARCHAR(255) NOT NULL, steps JSON NOT NULL, ingredients JSON NOT NULL, "
+            "seasonings JSON NOT NULL, created_at DATETIME)"
+        ))
+
+    created = create_missing_indexes(old_engine)
+    assert "ix_recipes_video_id" not in created
+    assert "ix_recipes_id" in created
+    assert "ix_recipes_video_id" not in {index["name"] for index in inspect(old_engine).get_indexes("recipes")}
+    old_engine.dispose()
+
+
+def test_star_migration_on_db_without_video_id(tmp_path, monkeypatch):
+    """video-ids 를 실행하지 않은 DB 에서도 star_count 추가와 stars 인덱스 생성이 끝까지 실행됨."""
+    import maintenance
+
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'upgraded.db'}")
+    with old_engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE recipes (id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL, subtitle VARCHAR(255), "
+            "youtube_link VARCHAR(255) NOT NULL, steps JSON NOT NULL, ingredients JSON NOT NULL, "
+            "seasonings JSON NOT NULL, created_at DATETIME)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE stars (id INTEGER PRIMARY KEY, kakao_id BIGINT NOT NULL, recipe_id INTEGER NOT NULL, "
+            "created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        conn.execute(text(
+            "INSERT INTO recipes (title, youtube_link, steps, ingredients, seasonings) VALUES ('a', 'x', '[]', '[]', '[]')"
+        ))
+        conn.execute(text("INSERT INTO stars (kakao_id, recipe_id) VALUES (1, 1), (2, 1)"))
+    monkeypatch.setattr(maintenance, "engine", old_engine)
+
+    rebuild_star_counts(None)
+    inspector = inspect(old_engine)
+    assert "star_count" in {column["name"] for column in inspector.get_columns("recipes")}
+    with old_engine.connect() as conn:
+        assert conn.execute(text("SELECT star_count FROM recipes")).scalar_one() == 2
+    assert {"ix_stars_created", "ix_stars_kakao_created"} <= {index["name"] for index in inspector.get_indexes("stars")}
+    # recipes 인덱스는 stars 마이그레이션이 만들지 않음
+    assert "ix_recipes_video_id" not in {index["name"] for index in inspector.get_indexes("recipes")}
+    old_engine.dispose()
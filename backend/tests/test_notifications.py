@@ -0,0 +1,135 @@
+"""유통기한 임박 재료 알림 (카카오 API 는 httpx.MockTransport 로 대신함)"""
+import datetime
+import itertools
+import json
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+import notifications
+from database import SessionLocal
+from models import Ingredient, User
+from notifications import KakaoMessenger, notify_expiring_ingredients, stream_expiring_groups
+
+API_HOST = "https://kapi.test"
+AUTH_HOST = "https://kauth.test"
+MEMO_PATH = "/v2/api/talk/memo/default/send"
+
+# 테스트마다 다른 기간을 써서 다른 테스트가 만든 재료가 섞이지 않게 함
+_years = itertools.count(2100)
+
+
+@pytest.fixture
+def now():
+    return datetime.datetime(next(_years), 1, 1, 9)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(notifications, "RETRY_BACKOFF", 0.0)
+
+
+def add_user(kakao_id: int, now: datetime.datetime, n_items: int,
+             access_token: str = None, refresh_token: str = None):
+    with SessionLocal() as db:
+        db.add(User(kakao_id=kakao_id, nickname="", profile_image="",
+                    kakao_access_token=access_token, kakao_refresh_token=refresh_token))
+        db.add_all(
+            Ingredient(name=f"재료{i}", category="채소", kakao_id=kakao_id,
+                       limit_date=now + datetime.timedelta(hours=i + 1))
+            for i in range(n_items)
+        )
+        db.commit()
+
+
+def notify(app_client, now, handler):
+    """MockTransport 로 보내는 알림 작업을 앱 이벤트 루프에서 실행합니다."""
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            messenger = KakaoMessenger(client, rate=1000, api_host=API_HOST, auth_host=AUTH_HOST)
+            return await notify_expiring_ingredients(window_days=3, now=now, messenger=messenger)
+
+    return app_client.portal.call(run)
+
+
+def memo_text(request: httpx.Request) -> str:
+    return json.loads(parse_qs(request.content.decode())["template_object"][0])["text"]
+
+
+def test_groups_per_user_across_chunks(app_client, now):
+    add_user(9001, now, 12, access_token="a1")
+    add_user(9002, now, 1, access_token="a2")
+    add_user(9003, now, 2)  # 토큰 없음: 건너뜀
+
+    async def collect():
+        end = now + datetime.timedelta(days=3)
+        return [(g.kakao_id, g.total, len(g.items)) async for g in stream_expiring_groups(now, end, chunk_size=5)]
+
+    assert app_client.portal.call(collect) == [(9001, 12, 10), (9002, 1, 1), (9003, 2, 2)]
+
+    sent = []
+
+    def handler(request):
+        sent.append((request.headers["authorization"], memo_text(request)))
+        return httpx.Response(200, json={"result_code": 0})
+
+    stats = notify(app_client, now, handler)
+    assert (stats.users, stats.sent, stats.skipped, stats.failed) == (3, 2, 1, 0)
+    messages = dict(sent)
+    assert len(sent) == 2
+    assert "재료가 12개" in messages["Bearer a1"] and "외 2개" in messages["Bearer a1"]
+    assert "재료가 1개" in messages["Bearer a2"]
+
+
+def test_retries_429_and_5xx(app_client, now):
+    add_user(9011, now, 1, access_token="a")
+    responses = iter([
+        httpx.Response(503),
+        httpx.Response(429, headers={"retry-after": "0"}),
+        httpx.Response(200, json={"result_code": 0}),
+    ])
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return next(responses)
+
+    stats = notify(app_client, now, handler)
+    assert calls == [MEMO_PATH] * 3
+    assert (stats.sent, stats.failed) == (1, 0)
+
+
+def test_gives_up_after_max_retries(app_client, now):
+    add_user(9021, now, 1, access_token="a")
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(500)
+
+    stats = notify(app_client, now, handler)
+    assert len(calls) == notifications.MAX_RETRIES + 1
+    assert (stats.sent, stats.failed) == (0, 1)
+
+
+def test_refreshes_expired_token(app_client, now):
+    add_user(9031, now, 1, access_token="expired", refresh_token="r1")
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.host == "kauth.test":
+            form = parse_qs(request.content.decode())
+            assert form["grant_type"] == ["refresh_token"] and form["refresh_token"] == ["r1"]
+            return httpx.Response(200, json={"access_token": "fresh", "refresh_token": "r2"})
+        if request.headers["authorization"] == "Bearer expired":
+            return httpx.Response(401, json={"code": -401})
+        return httpx.Response(200, json={"result_code": 0})
+
+    stats = notify(app_client, now, handler)
+    assert calls == [MEMO_PATH, "/oauth/token", MEMO_PATH]
+    assert stats.sent == 1
+    with SessionLocal() as db:
+        user = db.get(User, 9031)
+        assert (user.kakao_access_token, user.kakao_refresh_token) == ("fresh", "r2")
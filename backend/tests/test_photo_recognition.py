@@ -0,0 +1,136 @@
+"""사진 재료 인식 (테스트용 tiny 모델)"""
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import torch
+
+import main
+from photo_recognition import (
+    Image,
+    MicroBatcher,
+    PhotoRecognizer,
+    forward_executor,
+    label_to_ingredient,
+    load_classifier,
+    tiny_classifier
+)
+
+pytestmark = pytest.mark.skipif(Image is None, reason="pillow 미설치")
+
+
+def jpeg_bytes(width: int = 320, height: int = 240) -> bytes:
+    rng = np.random.default_rng(0)
+    buffer = io.BytesIO()
+    Image.fromarray(rng.integers(0, 255, (height, width, 3), dtype=np.uint8)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def photo_recognizer(app_client, monkeypatch):
+    recognizer = PhotoRecognizer(tiny_classifier())
+    monkeypatch.setattr(main, "photo_recognizer", recognizer)
+    yield recognizer
+    app_client.portal.call(recognizer.stop)
+
+
+def test_missing_model_file_is_not_replaced(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_classifier(str(tmp_path / "missing.pt"))
+
+
+def test_disabled_without_model(client, monkeypatch):
+    monkeypatch.setattr(main, "photo_recognizer", None)
+    response = client.post("/api/ingredients/from-photo", files={"photo": ("a.jpg", jpeg_bytes(), "image/jpeg")})
+    assert response.status_code == 503
+
+
+def test_label_to_ingredient():
+    assert label_to_ingredient("양파") == "양파"
+    assert label_to_ingredient("no_such_label") is None
+
+
+def test_classifier_top():
+    classifier = tiny_classifier()
+    images = classifier.preprocess(jpeg_bytes())
+    assert images.shape == (5, 3, classifier.image_size, classifier.image_size)
+
+    probabilities = classifier.predict(images)
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0, rtol=1e-5)
+    found = classifier.top(probabilities, limit=3, min_confidence=0.0)
+    assert len(found) == 3
+    assert [confidence for _, _, confidence in found] == sorted((c for _, _, c in found), reverse=True)
+    assert classifier.top(probabilities, limit=3, min_confidence=1.01) == []
+
+
+def test_recognize_and_save(client, photo_recognizer):
+    response = client.post(
+        "/api/ingredients/from-photo",
+        params={"save": "true", "min_confidence": 0, "limit": 2},
+        files={"photo": ("fridge.jpg", jpeg_bytes(), "image/jpeg")}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["recognized"]) == 2
+    assert [item["name"] for item in body["ingredients"]] == [item["name"] for item in body["recognized"]]
+
+    names = {item["name"] for item in client.get("/api/user-ingredients").json()["ingredients"]}
+    assert names == {item["name"] for item in body["recognized"]}
+
+
+def test_rejects_non_image(client, photo_recognizer):
+    response = client.post("/api/ingredients/from-photo", files={"photo": ("a.jpg", b"not an image", "image/jpeg")})
+    assert response.status_code == 400
+
+
+def test_concurrent_photos_share_one_forward():
+    classifier = tiny_classifier()
+    photos = [jpeg_bytes(320 + 16 * i) for i in range(4)]
+
+    async def run():
+        # 조각 5개짜리 사진 4장이 두 배치(10 + 10)로 나뉘도록 최대 배치 크기 10
+        recognizer = PhotoRecognizer(classifier, max_batch_size=10, max_wait=0.05)
+        try:
+            results = await asyncio.gather(*[recognizer.recognize(photo, min_confidence=0.0) for photo in photos])
+        finally:
+            await recognizer.stop()
+        return results, recognizer.batcher.batch_sizes
+
+    results, batch_sizes = asyncio.run(run())
+    assert batch_sizes == [2, 2]
+    for photo, found in zip(photos, results):
+        expected = classifier.top(classifier.predict(classifier.preprocess(photo)), 10, 0.0)
+        assert [name for name, _, _ in found] == [name for name, _, _ in expected]
+        np.testing.assert_allclose([c for _, _, c in found], [c for _, _, c in expected], rtol=1e-4)
+
+
+def test_batch_errors_reach_every_caller():
+    def fail(items):
+        raise RuntimeError("forward 실패")
+
+    async def run():
+        batcher = MicroBatcher(fail, max_batch_size=8, max_wait=0.01)
+        try:
+            return await asyncio.gather(*[batcher.submit(i) for i in range(3)], return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    assert [str(error) for error in asyncio.run(run())] == ["forward 실패"] * 3
+
+
+def test_forward_thread_count_is_local():
+    def new_thread_default():
+        with ThreadPoolExecutor(1) as other:
+            return other.submit(torch.get_num_threads).result()
+
+    caller, default = torch.get_num_threads(), new_thread_default()
+    executor = forward_executor(default + 2)
+    try:
+        assert executor.submit(torch.get_num_threads).result() == default + 2
+    finally:
+        executor.shutdown()
+    # 호출한 스레드와 이후 새로 만든 스레드의 설정은 그대로
+    assert torch.get_num_threads() == caller
+    assert new_thread_default() == default
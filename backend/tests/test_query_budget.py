@@ -0,0 +1,127 @@
+"""엔드포인트별 SQL 문 예산 (N+1 회귀 방지)
+
+예산은 로그인 사용자 조회(캐시가 비어 있을 때 1개)를 포함한 값이고, 항목 수와 관계없이 일정해야 합니다.
+max_repeats=1 이므로 같은 SQL 이 두 번 실행되면 실패합니다.
+"""
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+from database import SessionLocal
+from models import Ingredient, Recipe, Star
+from query_guard import QueryBudgetExceeded, count_queries, query_budget as make_query_budget
+
+N_ITEMS = 5
+
+
+def add_ingredients(kakao_id: int, n: int = N_ITEMS) -> list[int]:
+    now = datetime.datetime.now()
+    with SessionLocal() as db:
+        ingredients = [
+            Ingredient(
+                name=f"재료{i}",
+                category="채소",
+                added_date=now - datetime.timedelta(days=1),
+                limit_date=now + datetime.timedelta(days=i + 1),
+                kakao_id=kakao_id
+            )
+            for i in range(n)
+        ]
+        db.add_all(ingredients)
+        db.commit()
+        return [ingredient.id for ingredient in ingredients]
+
+
+def add_recipes(n: int = N_ITEMS) -> list[int]:
+    with SessionLocal() as db:
+        recipes = [
+            Recipe(
+                title=f"레시피{i}",
+                subtitle="",
+                youtube_link=f"https://www.youtube.com/watch?v=test{i}",
+                steps=["끓인다"],
+                ingredients=[{"name": "양파"}],
+                seasonings=[]
+            )
+            for i in range(n)
+        ]
+        db.add_all(recipes)
+        db.commit()
+        return [recipe.id for recipe in recipes]
+
+
+def star_recipes(kakao_id: int, recipe_ids: list[int]):
+    with SessionLocal() as db:
+        db.add_all(Star(kakao_id=kakao_id, recipe_id=recipe_id) for recipe_id in recipe_ids)
+        db.commit()
+
+
+def test_update_ingredient(client, user, query_budget):
+    ingredient_id = add_ingredients(user)[0]
+    with query_budget(3, max_repeats=1):
+        response = client.put(f"/api/ingredients/{ingredient_id}", json={"name": "대파"})
+    assert response.status_code == 200
+    assert response.json()["name"] == "대파"
+
+
+def test_toggle_star(client, query_budget):
+    recipe_id = add_recipes(1)[0]
+    with query_budget(3, max_repeats=1):
+        response = client.post(f"/api/recipes/{recipe_id}/star")
+    assert response.json()["starred"] is True
+
+    with query_budget(2, max_repeats=1):
+        response = client.post(f"/api/recipes/{recipe_id}/star")
+    assert response.json()["starred"] is False
+
+
+def test_starred_recipes(client, user, query_budget):
+    star_recipes(user, add_recipes())
+    with query_budget(2, max_repeats=1):
+        response = client.get("/api/recipes")
+    assert response.status_code == 200
+    assert len(response.json()["recipes"]) == N_ITEMS
+
+
+def test_user_ingredients(client, user, query_budget):
+    add_ingredients(user)
+    with query_budget(2, max_repeats=1):
+        response = client.get("/api/user-ingredients")
+    assert response.status_code == 200
+    assert len(response.json()["ingredients"]) == N_ITEMS
+
+
+def test_repeated_statements_fail(user):
+    ingredient_ids = add_ingredients(user, 3)
+
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        with make_query_budget(10, max_repeats=1) as counter:
+            with SessionLocal() as db:
+                for ingredient_id in ingredient_ids:  # 의도한 N+1
+                    db.execute(select(Ingredient).where(Ingredient.id == ingredient_id)).scalar_one()
+
+    (statement, count), = counter.repeated()
+    assert count == 3
+    assert statement.startswith("SELECT ingredients.id")
+    report = counter.report()
+    assert "반복된 SQL 3회" in report
+    assert "test_query_budget.py" in report  # 호출 위치 스택
+    assert "N+1" in str(excinfo.value)
+
+
+def test_statement_budget_fails():
+    with pytest.raises(QueryBudgetExceeded, match="예산 1개 초과"):
+        with make_query_budget(1):
+            with SessionLocal() as db:
+                db.execute(select(Recipe.id)).all()
+                db.execute(select(Star.id)).all()
+
+
+def test_count_queries_detaches():
+    with count_queries() as counter:
+        with SessionLocal() as db:
+            db.execute(select(Recipe.id)).all()
+    with SessionLocal() as db:
+        db.execute(select(Recipe.id)).all()
+    assert counter.count == 1
@@ -0,0 +1,125 @@
+"""영상별 레시피 생성 합치기와 video_id 백필"""
+import asyncio
+import json
+
+import pytest
+
+import main
+from cache import StreamFlight
+from database import SessionLocal
+from maintenance import backfill_recipe_video_ids
+from models import Recipe
+
+RECIPE = {
+    "recipe": {
+        "title": "감자조림",
+        "subtitle": "달콤짭짤한 밑반찬",
+        "steps": [
+            "감자를 깍둑썰기 해서 찬물에 담가 전분을 빼 줍니다",
+            "팬에 기름을 두르고 감자를 중불에서 겉면이 익을 때까지 볶습니다",
+            "간장과 물엿을 넣고 국물이 졸아들 때까지 약불에서 졸입니다"
+        ],
+        "ingredients": ["감자 3개"],
+        "seasonings": ["간장 3큰술", "물엿 2큰술"],
+        "youtube_url": "https://www.youtube.com/watch?v=coalesce01"
+    }
+}
+
+
+@pytest.fixture
+def fake_gpt(monkeypatch):
+    """GPT 스트리밍 호출 수를 세고, 조각 사이에 다른 요청이 합류할 틈을 둡니다."""
+    calls = []
+
+    async def stream_recipe_with_gpt(messages):
+        calls.append(messages)
+        content = json.dumps(RECIPE, ensure_ascii=False)
+        for begin in range(0, len(content), 40):
+            await asyncio.sleep(0.005)
+            yield content[begin:begin + 40]
+
+    async def get_video_metadata(video_url):
+        return {"title": "감자조림 만들기", "description": "", "tags": []}
+
+    monkeypatch.setattr(main, "stream_recipe_with_gpt", stream_recipe_with_gpt)
+    monkeypatch.setattr(main, "get_video_metadata", get_video_metadata)
+    return calls
+
+
+def test_stream_flight_replays_to_late_joiners():
+    async def run():
+        flight = StreamFlight()
+        started = []
+
+        async def numbers():
+            started.append(1)
+            for i in range(5):
+                await asyncio.sleep(0.001)
+                yield i
+
+        async def collect(delay):
+            await asyncio.sleep(delay)
+            return [item async for item in flight.join("key", numbers)]
+
+        return await asyncio.gather(collect(0), collect(0.003)), started
+
+    (first, late), started = asyncio.run(run())
+    assert first == late == [0, 1, 2, 3, 4]
+    assert len(started) == 1
+
+
+def test_stream_flight_propagates_errors():
+    async def run():
+        flight = StreamFlight()
+
+        async def failing():
+            yield 1
+            raise ValueError("boom")
+
+        return [item async for item in flight.join("key", failing)]
+
+    with pytest.raises(ValueError, match="boom"):
+        asyncio.run(run())
+
+
+def test_concurrent_generation_shares_one_gpt_call(app_client, fake_gpt):
+    video_url = "https://youtu.be/coalesce01"
+
+    async def run():
+        async def stream():
+            return [event async for event in main.join_recipe_generation(video_url, "coalesce01")]
+
+        return await asyncio.gather(
+            stream(),
+            stream(),
+            main.generate_and_store_recipe(video_url, "coalesce01")
+        )
+
+    first, second, recipe = app_client.portal.call(run)
+    assert len(fake_gpt) == 1
+    assert first == second
+    assert [event["type"] for event in first][-1] == "done"
+    assert any(event["type"] == "item" for event in first)
+    assert recipe["id"] == first[-1]["recipe"]["id"]
+
+    # 저장된 뒤에는 GPT 호출 없이 재사용
+    assert app_client.portal.call(main.generate_and_store_recipe, video_url, "coalesce01")["id"] == recipe["id"]
+    assert len(fake_gpt) == 1
+
+
+def test_backfill_video_ids():
+    with SessionLocal() as db:
+        recipes = [
+            Recipe(title="a", youtube_link="https://www.youtube.com/watch?v=backfill01", steps=[], ingredients=[], seasonings=[]),
+            Recipe(title="b", youtube_link="https://youtu.be/backfill01", steps=[], ingredients=[], seasonings=[]),
+            Recipe(title="c", youtube_link="https://www.youtube.com/shorts/backfill02", steps=[], ingredients=[], seasonings=[]),
+            Recipe(title="d", youtube_link="https://example.com/video", steps=[], ingredients=[], seasonings=[]),
+        ]
+        db.add_all(recipes)
+        db.commit()
+        ids = [recipe.id for recipe in recipes]
+
+        updated, skipped = backfill_recipe_video_ids(db)
+        assert updated >= 2 and skipped >= 2  # 다른 테스트가 만든 레시피도 함께 채워질 수 있음
+        video_ids = dict(db.query(Recipe.id, Recipe.video_id).filter(Recipe.id.in_(ids)).all())
+        assert [video_ids[i] for i in ids] == ["backfill01", None, "backfill02", None]
@@ -0,0 +1,37 @@
+"""여러 워커가 레시피를 저장할 때 색인 동기화"""
+import main
+from database import AsyncSessionLocal, SessionLocal
+from models import Recipe
+
+
+def test_own_save_does_not_skip_other_workers_recipes(app_client):
+    async def sync():
+        async with AsyncSessionLocal() as db:
+            await main.sync_recipe_index(db)
+
+    async def save(recipe):
+        async with AsyncSessionLocal() as db:
+            return (await main.save_generated_recipe(db, recipe)).id
+
+    app_client.portal.call(sync)
+
+    # 다른 워커가 저장한 레시피 (이 워커는 아직 동기화하지 않음)
+    with SessionLocal() as db:
+        other = Recipe(title="다른워커 된장국", subtitle="", youtube_link="https://youtu.be/otherworker",
+                       steps=["끓인다"], ingredients=["된장", "두부"], seasonings=[])
+        db.add(other)
+        db.commit()
+        other_id = other.id
+
+    # 이 워커가 저장한 레시피는 더 큰 id 를 받고 바로 색인됨
+    own_id = app_client.portal.call(save, {
+        "title": "이워커 계란말이", "subtitle": "", "youtube_url": "https://youtu.be/ownworker",
+        "steps": ["굽는다"], "ingredients": ["계란"], "seasonings": []
+    })
+    assert own_id > other_id
+    assert own_id in main.recipe_index and other_id not in main.recipe_index
+
+    response = app_client.get("/api/recipes/search", params={"q": "된장국"})
+    assert other_id in [recipe["id"] for recipe in response.json()["recipes"]]
+    assert other_id in main.recipe_index and own_id in main.recipe_index
+    assert main.recipe_index.synced_id >= own_id
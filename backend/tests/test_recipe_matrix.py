@@ -0,0 +1,115 @@
+"""레시피 행렬 스코어러: 대기 중인 레시피와 합친 뒤의 점수가 같아야 함"""
+import asyncio
+
+import numpy as np
+import pytest
+
+import recipe_matrix
+from recipe_matrix import RecipeScorer
+
+
+def build(scorer: RecipeScorer, recipes: dict):
+    for recipe_id, ingredients in recipes.items():
+        scorer.add(recipe_id, ingredients)
+
+
+def scores(scorer: RecipeScorer, pantry: dict) -> dict:
+    return dict(scorer.top_k(pantry, k=100))
+
+
+RECIPES = {
+    1: ["양파", "감자", "당근"],
+    2: ["감자", "돼지고기"],
+    3: ["김치", "돼지고기", "두부"],
+    4: ["양파"],
+}
+PANTRY = {"양파": 1.0, "감자": 2.0, "돼지고기": 1.0, "두부": 0.5}
+
+
+def test_pending_matches_compacted():
+    pending, compacted = RecipeScorer(), RecipeScorer()
+    build(pending, RECIPES)
+    build(compacted, RECIPES)
+    compacted.compact()
+
+    assert len(pending._pending) == 4 and not compacted._pending
+    expected = scores(compacted, PANTRY)
+    assert scores(pending, PANTRY) == expected
+    assert expected[4] == 1.0 and expected[2] == 1.5
+
+
+def test_incremental_merge_with_replacement():
+    scorer = RecipeScorer()
+    build(scorer, {1: RECIPES[1], 2: RECIPES[2]})
+    scorer.compact()
+    # 기존 레시피 교체 + 새 재료 열이 생기는 레시피 추가
+    build(scorer, {2: ["두부"], 3: RECIPES[3], 5: ["새우", "감자"]})
+    before = scores(scorer, PANTRY)
+    scorer.compact()
+    after = scores(scorer, PANTRY)
+
+    reference = RecipeScorer()
+    build(reference, {1: RECIPES[1], 2: ["두부"], 3: RECIPES[3], 5: ["새우", "감자"]})
+    reference.compact()
+    assert before == after
+    assert after.keys() == scores(reference, PANTRY).keys()
+    for recipe_id, score in scores(reference, PANTRY).items():
+        assert np.isclose(after[recipe_id], score)
+    assert len(scorer) == 4
+
+    # 열 안의 행 번호가 정렬된 CSC 를 유지
+    matrix = scorer._matrix
+    for column in range(len(matrix.indptr) - 1):
+        rows = matrix.rows[matrix.indptr[column]:matrix.indptr[column + 1]]
+        assert np.all(np.diff(rows) > 0)
+
+
+def test_compact_async_keeps_recipes_added_meanwhile(monkeypatch):
+    scorer = RecipeScorer()
+    build(scorer, {1: RECIPES[1]})
+    merge = recipe_matrix._merge
+
+    def slow_merge(*args):
+        # 워커 스레드에서 합치는 동안 같은 레시피가 다시 추가된 상황
+        scorer.add(1, ["두부"])
+        return merge(*args)
+
+    monkeypatch.setattr(recipe_matrix, "_merge", slow_merge)
+    asyncio.run(scorer.compact_async())
+    assert list(scorer._pending) == [1]
+    assert scores(scorer, PANTRY) == {1: 0.5}
+
+
+def test_schedule_compaction(monkeypatch):
+    monkeypatch.setattr(recipe_matrix, "COMPACT_PENDING", 3)
+    scorer = RecipeScorer()
+
+    async def run():
+        build(scorer, {1: RECIPES[1], 2: RECIPES[2]})
+        scorer.schedule_compaction()
+        assert scorer._compaction is None
+        build(scorer, {3: RECIPES[3]})
+        scorer.schedule_compaction()
+        await scorer._compaction
+
+    asyncio.run(run())
+    assert not scorer._pending and len(scorer._matrix.recipe_ids) == 3
+
+
+def test_top_k_batch_matches_single_users():
+    scorer = RecipeScorer()
+    build(scorer, RECIPES)
+    scorer.compact()
+    # 교체, 새 레시피, 행렬에 아직 없는 새 재료 열까지 대기 중인 상태
+    build(scorer, {2: ["두부"], 5: ["새우", "감자"], 6: ["양파", "두부"]})
+    pantries = [PANTRY, {"새우": 1.0}, {"김치": 2.0, "양파": 0.5}, {}, {"없는재료": 1.0}]
+
+    for k in (1, 2, 10):
+        for max_cells in (2, 1 << 20):  # 레시피 행렬을 여러 블록으로 나누는 경우 포함
+            batches = scorer.top_k_batch(pantries, k, max_cells=max_cells)
+            for pantry, batch in zip(pantries, batches):
+                single = scorer.top_k(pantry, k)
+                assert [s for _, s in batch] == pytest.approx([s for _, s in single])
+                assert {rid for rid, _ in batch} == {rid for rid, _ in single} or len(single) == k
+    assert dict(scorer.top_k_batch([PANTRY], 10)[0]) == pytest.approx(scores(scorer, PANTRY))
+    assert scorer.top_k_batch([], 10) == [] and scorer.top_k_batch([PANTRY], 0) == [[]]
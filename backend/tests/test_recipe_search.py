@@ -0,0 +1,105 @@
+"""레시피 검색 모드"""
+import numpy as np
+import pytest
+
+import main
+import vector_index
+from database import AsyncSessionLocal, SessionLocal
+from models import Recipe
+from vector_index import VectorIndex
+
+
+def test_keyword_is_default(app_client):
+    with SessionLocal() as db:
+        db.add(Recipe(
+            title="얼큰한 김치찌개",
+            subtitle="",
+            youtube_link="https://www.youtube.com/watch?v=search-test",
+            steps=["김치를 볶는다"],
+            ingredients=[{"name": "김치"}],
+            seasonings=[]
+        ))
+        db.commit()
+
+    response = app_client.get("/api/recipes/search", params={"q": "김치찌개"})
+    assert response.status_code == 200
+    assert response.json()["recipes"][0]["title"] == "얼큰한 김치찌개"
+
+
+def test_semantic_requires_embedding_model(app_client, monkeypatch):
+    monkeypatch.setattr(main, "recipe_vectors", None)
+    response = app_client.get("/api/recipes/search", params={"q": "매콤한 국물", "mode": "semantic"})
+    assert response.status_code == 503
+
+
+class StubEncoder:
+    """유의어 묶음별 차원을 세는 결정적 인코더 (sentence-transformers 대역)."""
+
+    GROUPS = [
+        ("매운", "매콤", "얼큰", "칼칼"),
+        ("국물", "찌개", "탕", "전골"),
+        ("달콤", "디저트", "케이크", "쿠키"),
+        ("계란", "달걀", "오믈렛"),
+        ("볶음", "볶은", "볶아"),
+    ]
+    dim = len(GROUPS) + 1
+    name = "stub"
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for d, words in enumerate(self.GROUPS):
+                vectors[i, d] = sum(text.count(word) for word in words)
+            vectors[i, -1] = 0.1  # 어느 묶음에도 없는 문장도 0 벡터가 되지 않도록
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def semantic_search(app_client, tmp_path, monkeypatch):
+    # 작은 색인에서도 IVF 학습/군집 탐색 경로를 타도록 기준을 낮춤
+    monkeypatch.setattr(vector_index, "IVF_MIN_SIZE", 4)
+    encoder = StubEncoder()
+    monkeypatch.setattr(main, "recipe_encoder", encoder)
+    monkeypatch.setattr(main, "recipe_vectors", VectorIndex(str(tmp_path / "vectors"), encoder.dim, encoder.name))
+    return main.recipe_vectors
+
+
+def add_recipe(title: str, subtitle: str, steps: list[str]) -> int:
+    with SessionLocal() as db:
+        recipe = Recipe(title=title, subtitle=subtitle, youtube_link=f"https://youtu.be/{title}", steps=steps,
+                        ingredients=[], seasonings=[])
+        db.add(recipe)
+        db.commit()
+        return recipe.id
+
+
+def semantic(app_client, q: str) -> list[int]:
+    response = app_client.get("/api/recipes/search", params={"q": q, "mode": "semantic", "limit": 3})
+    assert response.status_code == 200
+    return [recipe["id"] for recipe in response.json()["recipes"]]
+
+
+def test_semantic_search_end_to_end(app_client, semantic_search):
+    stew = add_recipe("얼큰한 김치찌개", "칼칼한 국물", ["김치를 볶아 끓인다"])
+    cake = add_recipe("초코 케이크", "달콤한 디저트", ["반죽을 굽는다"])
+    omelet = add_recipe("치즈 오믈렛", "", ["달걀을 풀어 익힌다"])
+    fried = add_recipe("매콤 제육볶음", "", ["고기를 볶은 뒤 양념한다"])
+
+    # 검색 때 sync_recipe_index 가 새 레시피를 임베딩해 색인에 추가
+    assert semantic(app_client, "매운 탕 요리")[0] == stew
+    assert {stew, cake, omelet, fried} <= set(semantic_search._positions)
+    assert semantic(app_client, "쿠키 같은 간식")[0] == cake
+    assert semantic(app_client, "계란 요리")[0] == omelet
+    assert semantic_search._ivf is not None  # IVF 학습 후 군집 탐색 + int8 후보 + float32 재순위
+
+    # 이 워커가 생성해 저장한 레시피도 바로 검색됨
+    async def save():
+        async with AsyncSessionLocal() as db:
+            return (await main.save_generated_recipe(db, {
+                "title": "해물 전골", "subtitle": "얼큰한 국물", "youtube_url": "https://youtu.be/jeongol",
+                "steps": ["해물을 넣고 끓인다"], "ingredients": [], "seasonings": []
+            })).id
+
+    jeongol = app_client.portal.call(save)
+    assert jeongol in semantic_search
+    assert set(semantic(app_client, "칼칼한 찌개")[:2]) == {stew, jeongol}
@@ -0,0 +1,48 @@
+"""아이콘 스프라이트 파일 생성"""
+import os
+import time
+
+from sprites import SPRITE_PREFIX, build_icon_sprite
+
+
+def write_icon(icons_dir, name: str, color: str):
+    with open(os.path.join(icons_dir, f"{name}.svg"), "w", encoding="utf-8") as f:
+        f.write(f'<svg viewBox="0 0 24 24"><rect width="24" height="24" fill="{color}"/></svg>')
+
+
+def sprite_files(out_dir) -> set[str]:
+    return set(os.listdir(out_dir))
+
+
+def test_sprite_written_atomically_and_reused(tmp_path):
+    icons_dir, out_dir = tmp_path / "icons", tmp_path / "sprites"
+    icons_dir.mkdir()
+    write_icon(icons_dir, "potato", "#a80")
+    write_icon(icons_dir, "onion", "#fff")
+
+    sprite = build_icon_sprite(str(icons_dir), str(out_dir), "/static/sprites")
+    name = sprite["url"].rsplit("/", 1)[1]
+    assert sprite["icons"]["potato.svg"] == f"{sprite['url']}#potato"
+    # 임시 파일이 남지 않고 압축본이 함께 있음
+    assert {name, f"{name}.gz"} <= sprite_files(out_dir)
+    assert not [f for f in sprite_files(out_dir) if f.startswith(".")]
+
+    mtime = os.path.getmtime(out_dir / name)
+    assert build_icon_sprite(str(icons_dir), str(out_dir), "/static/sprites") == sprite
+    assert os.path.getmtime(out_dir / name) == mtime
+
+
+def test_stale_sprites_removed(tmp_path):
+    icons_dir, out_dir = tmp_path / "icons", tmp_path / "sprites"
+    icons_dir.mkdir()
+    names = []
+    for color in ("#000", "#111", "#222"):
+        write_icon(icons_dir, "potato", color)
+        sprite = build_icon_sprite(str(icons_dir), str(out_dir), "/static/sprites")
+        names.append(sprite["url"].rsplit("/", 1)[1])
+        time.sleep(0.01)  # mtime 순서 구분
+
+    remaining = {f for f in sprite_files(out_dir) if f.startswith(f"{SPRITE_PREFIX}.") and f.endswith(".svg")}
+    # 현재 + 바로 이전 하나만 유지
+    assert remaining == {names[2], names[1]}
+    assert not [f for f in sprite_files(out_dir) if f.startswith(names[0])]
@@ -0,0 +1,73 @@
+"""좋아요 토글"""
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from database import SessionLocal, async_engine
+from models import Recipe
+
+
+class FakeMySQLError(Exception):
+    """pymysql 오류처럼 args[0] 에 MySQL 오류 번호를 담음."""
+
+
+def add_recipe() -> int:
+    with SessionLocal() as db:
+        recipe = Recipe(title="좋아요", subtitle="", youtube_link="https://www.youtube.com/watch?v=star", steps=[],
+                        ingredients=[], seasonings=[])
+        db.add(recipe)
+        db.commit()
+        return recipe.id
+
+
+@pytest.fixture
+def fail_star_deletes():
+    """stars DELETE 를 지정한 MySQL 오류 번호로 실패시킵니다 (남은 횟수만큼)."""
+    failures = []
+    deletes = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("DELETE FROM stars"):
+            deletes.append(statement)
+            if failures:
+                code = failures.pop(0)
+                raise OperationalError(statement, parameters, FakeMySQLError(code, "Deadlock found when trying to get lock"))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield failures, deletes
+    event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_toggle_retries_deadlock(client, fail_star_deletes):
+    failures, deletes = fail_star_deletes
+    recipe_id = add_recipe()
+
+    failures.append(1213)
+    response = client.post(f"/api/recipes/{recipe_id}/star")
+    assert response.status_code == 200
+    assert response.json()["starred"] is True
+    assert len(deletes) == 2
+
+    failures.extend([1213, 1205])
+    response = client.post(f"/api/recipes/{recipe_id}/star")
+    assert response.status_code == 200
+    assert response.json()["starred"] is False
+
+
+def test_toggle_gives_up_after_retries(client, fail_star_deletes):
+    failures, deletes = fail_star_deletes
+    recipe_id = add_recipe()
+
+    failures.extend([1213] * 3)
+    assert client.post(f"/api/recipes/{recipe_id}/star").status_code == 500
+    assert len(deletes) == 3
+
+
+def test_other_operational_errors_are_not_retried(client, fail_star_deletes):
+    failures, deletes = fail_star_deletes
+    recipe_id = add_recipe()
+
+    failures.append(2013)  # 연결 끊김
+    assert client.post(f"/api/recipes/{recipe_id}/star").status_code == 500
+    assert len(deletes) == 1
+    assert client.post(f"/api/recipes/{recipe_id}/star").json()["starred"] is True
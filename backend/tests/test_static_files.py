@@ -0,0 +1,49 @@
+"""정적 파일의 사전 압축본 선택: Accept-Encoding 의 q=0 은 거부로 처리"""
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from static_files import CachedStaticFiles, accepted_encodings
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", set()),
+    ("gzip, deflate, br", {"gzip", "deflate", "br"}),
+    ("br;q=0, gzip", {"gzip"}),
+    ("gzip;q=0", set()),
+    ("GZIP ; Q=0.5, br; q=0.0", {"gzip"}),
+    ("x-gzip", {"x-gzip", "gzip"}),
+    ("*", {"*", "br", "gzip"}),
+    ("*, br;q=0", {"*", "gzip"}),
+    ("br;q=abc, identity", {"identity"}),
+])
+def test_accepted_encodings(header, expected):
+    assert accepted_encodings(header) == expected
+
+
+@pytest.fixture
+def static_client(tmp_path):
+    (tmp_path / "app.js").write_text("plain")
+    (tmp_path / "app.js.gz").write_bytes(gzip.compress(b"gzipped"))
+    (tmp_path / "app.js.br").write_bytes(b"brotli")
+    app = FastAPI()
+    app.mount("/static", CachedStaticFiles(directory=tmp_path), name="static")
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("header, encoding", [
+    ("br, gzip", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("gzip;q=0, br;q=0", None),
+    ("identity", None),
+])
+def test_precompressed_respects_q_zero(static_client, header, encoding):
+    # 압축된 본문은 클라이언트가 디코딩하려 하므로 헤더만 확인
+    with static_client.stream("GET", "/static/app.js", headers={"accept-encoding": header}) as response:
+        assert response.status_code == 200
+        assert response.headers.get("content-encoding") == encoding
+        assert response.headers["vary"] == "Accept-Encoding"
+        if encoding is None:
+            assert response.read() == b"plain"
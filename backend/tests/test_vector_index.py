@@ -0,0 +1,62 @@
+"""디스크 벡터 색인"""
+import threading
+
+import numpy as np
+
+import vector_index
+from vector_index import VectorIndex
+
+DIM = 8
+
+
+def unit_vectors(n: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(n, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_search_finds_exact_vector(tmp_path):
+    index = VectorIndex(str(tmp_path), DIM, "test")
+    vectors = unit_vectors(50)
+    index.add(list(range(50)), vectors)
+    assert index.search(vectors[7], k=1)[0][0] == 7
+
+    # 다른 프로세스가 연 색인은 refresh 로 같은 행을 봄
+    other = VectorIndex(str(tmp_path), DIM, "test")
+    index.add([100], unit_vectors(1, seed=1))
+    other.refresh()
+    assert len(other) == 51 and 100 in other
+
+
+def test_search_while_adding_from_another_thread(tmp_path, monkeypatch):
+    # 용량을 작게 잡아 add 가 memmap 을 자주 다시 열도록 함
+    monkeypatch.setattr(vector_index, "INITIAL_CAPACITY", 4)
+    index = VectorIndex(str(tmp_path), DIM, "test")
+    vectors = unit_vectors(400)
+    index.add([0], vectors[:1])
+    errors = []
+    done = threading.Event()
+
+    def writer():
+        try:
+            for i in range(1, len(vectors)):
+                index.add([i], vectors[i:i + 1])
+                if i % 50 == 0:
+                    index.refresh()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        while not done.is_set():
+            for recipe_id, score in index.search(vectors[0], k=5):
+                assert 0 <= recipe_id < len(vectors)
+                assert np.isclose(score, vectors[recipe_id] @ vectors[0], atol=1e-5)
+    finally:
+        thread.join()
+
+    assert not errors
+    assert len(index) == len(vectors)
+    assert index.search(vectors[399], k=1)[0][0] == 399
@@ -0,0 +1,176 @@
+import functools
+import math
+import re
+import unicodedata
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+_WORD = re.compile(r"[0-9a-z가-힣]+")
+
+# 필드별 가중치 (제목에 나온 단어가 조리 과정에 나온 단어보다 중요)
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "subtitle": 2.0,
+    "ingredients": 1.5,
+    "seasonings": 1.0,
+    "steps": 1.0,
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """정규화한 단어 목록 (유니코드 NFKC, 소문자, 한글/영문/숫자만)."""
+    return _WORD.findall(unicodedata.normalize("NFKC", text or "").lower())
+
+
+def word_terms(word: str) -> List[str]:
+    """색인할 단어를 글자 bigram 과 첫 글자 표시("^감")로 나눕니다."""
+    return [f"^{word[0]}"] + [word[i:i + 2] for i in range(len(word) - 1)]
+
+
+def query_terms(word: str) -> List[str]:
+    """질의 단어의 검색어. 한 글자는 그 글자로 시작하는 단어를 찾습니다 (접두어 일치)."""
+    if len(word) == 1:
+        return [f"^{word}"]
+    return [word[i:i + 2] for i in range(len(word) - 1)]
+
+
+class _Posting:
+    """한 검색어의 posting. 정렬된 배열 + 새로 추가된 문서 꼬리 목록 (조회 시 합침)."""
+
+    __slots__ = ("docs", "tfs", "tail_docs", "tail_tfs")
+
+    def __init__(self):
+        self.docs = np.empty(0, dtype=np.int32)
+        self.tfs = np.empty(0, dtype=np.float32)
+        self.tail_docs: List[int] = []
+        self.tail_tfs: List[float] = []
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        if self.tail_docs:
+            # 문서 번호는 계속 커지므로 뒤에 붙여도 정렬 유지
+            self.docs = np.concatenate([self.docs, np.asarray(self.tail_docs, dtype=np.int32)])
+            self.tfs = np.concatenate([self.tfs, np.asarray(self.tail_tfs, dtype=np.float32)])
+            self.tail_docs, self.tail_tfs = [], []
+        return self.docs, self.tfs
+
+
+class BigramIndex:
+    """레시피 글자 bigram 역색인 (BM25F 순위).
+
+    단어를 글자 bigram 으로 색인하므로 띄어쓰기나 조사와 상관없이 부분 문자열이 일치하고,
+    입력 중인 접두어("감자조" -> "감자조림")도 찾을 수 있습니다. 질의 단어는 모두 포함된 레시피만
+    찾고(AND), 없으면 하나라도 포함된 레시피로 넓힙니다(OR).
+
+    posting 은 내부 문서 번호 순으로 정렬된 NumPy 배열이라 교집합과 BM25 계산이 벡터 연산으로
+    처리됩니다. 같은 레시피를 다시 추가하면 이전 문서는 삭제 표시만 하고 새 번호로 추가합니다.
+    """
+
+    def __init__(self):
+        # 검색어(bigram, 첫 글자) -> posting
+        self._postings: dict[str, _Posting] = {}
+        self._positions: dict[int, int] = {}  # 레시피 id -> 내부 문서 번호
+        self._ids: List[int] = []  # 내부 문서 번호 -> 레시피 id (삭제되면 -1)
+        self._lengths: List[float] = []  # 내부 문서 번호 -> 필드 가중 길이
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def add(self, recipe_id: int, fields: dict[str, Optional[Iterable[str] | str]]):
+        """레시피를 색인합니다. fields: 필드 이름 -> 문자열 또는 문자열 목록. 같은 id 는 교체합니다."""
+        self.remove(recipe_id)
+
+        frequencies: dict[str, float] = {}
+        length = 0.0
+        for field, value in fields.items():
+            weight = FIELD_WEIGHTS.get(field, 1.0)
+            texts = [value] if isinstance(value, str) else list(value or ())
+            for text in texts:
+                for word in tokenize(str(text)):
+                    for term in word_terms(word):
+                        frequencies[term] = frequencies.get(term, 0.0) + weight
+                        length += weight
+
+        doc = len(self._ids)
+        for term, frequency in frequencies.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = _Posting()
+            posting.tail_docs.append(doc)
+            posting.tail_tfs.append(frequency)
+        self._positions[recipe_id] = doc
+        self._ids.append(recipe_id)
+        self._lengths.append(length)
+        self._total_length += length
+
+    def add_recipe(self, recipe):
+        self.add(recipe.id, {
+            "title": recipe.title,
+            "subtitle": recipe.subtitle,
+            "ingredients": recipe.ingredients,
+            "seasonings": recipe.seasonings,
+            "steps": recipe.steps,
+        })
+
+    def remove(self, recipe_id: int):
+        doc = self._positions.pop(recipe_id, None)
+        if doc is None:
+            return
+        self._ids[doc] = -1
+        self._total_length -= self._lengths[doc]
+
+    def _matching(self, word: str) -> Optional[np.ndarray]:
+        """단어의 검색어가 모두 들어 있는 문서 번호 (빈도가 낮은 검색어부터 교집합)."""
+        postings = [self._postings.get(term) for term in set(query_terms(word))]
+        if not postings or any(posting is None for posting in postings):
+            return None
+        arrays = sorted((posting.arrays()[0] for posting in postings), key=len)
+        matched = arrays[0]
+        for docs in arrays[1:]:
+            matched = np.intersect1d(matched, docs, assume_unique=True)
+            if not len(matched):
+                break
+        return matched
+
+    def search(self, query: str, limit: int = 10) -> List[tuple[int, float]]:
+        """BM25 점수가 높은 순으로 (레시피 id, 점수) 를 반환합니다."""
+        words = tokenize(query)
+        if not words or not self._positions:
+            return []
+
+        matches = [self._matching(word) for word in words]
+        candidates = None
+        if all(m is not None for m in matches):
+            candidates = functools.reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), matches)
+        if candidates is None or not len(candidates):
+            found = [m for m in matches if m is not None and len(m)]
+            if not found:
+                return []
+            candidates = functools.reduce(np.union1d, found)
+
+        ids = np.asarray(self._ids, dtype=np.int64)
+        lengths = np.asarray(self._lengths, dtype=np.float32)
+        n_docs = len(self._positions)
+        average_length = self._total_length / n_docs or 1.0
+        norms = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length)
+
+        scores = np.zeros(len(ids), dtype=np.float32)
+        for term in {term for word in words for term in query_terms(word)}:
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            docs, tfs = posting.arrays()
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + norms[docs])
+
+        # 후보(삭제되지 않은 문서)만 남기고 상위 limit 개 선택
+        candidates = candidates[ids[candidates] >= 0]
+        candidate_scores = scores[candidates]
+        if len(candidates) > limit:
+            top = np.argpartition(-candidate_scores, limit - 1)[:limit]
+            candidates, candidate_scores = candidates[top], candidate_scores[top]
+        order = np.lexsort((ids[candidates], -candidate_scores))
+        return [(int(ids[candidates[i]]), float(candidate_scores[i])) for i in order]
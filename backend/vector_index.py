@@ -0,0 +1,266 @@
+"""디스크(memmap)에 저장되는 벡터 색인
+
+- vectors.f32: 정규화된 float32 벡터 (재순위용 원본)
+- vectors.i8 / scales.f32: 행별 스케일로 양자화한 int8 벡터 (후보 탐색용, 원본의 1/4 크기)
+- ids.i64: 벡터 행 -> 레시피 id
+- centroids.npy / assign.i32: IVF(역파일) 근사 최근접 이웃 색인
+- meta.json: 인코더 이름, 차원, 저장된 행 수, IVF 학습 시점 행 수 (데이터를 쓴 뒤 마지막에 갱신)
+
+여러 워커 프로세스가 같은 디렉토리를 쓸 수 있도록 쓰기는 파일 잠금(fcntl) 안에서 하고, 잠금을 얻으면
+다른 프로세스가 추가한 행을 먼저 반영합니다 (refresh). 한 프로세스 안에서는 add/refresh 가 memmap 을
+다시 열고 행 수를 바꾸는 동안 search 가 섞이지 않도록 세 메서드가 같은 스레드 잠금을 잡습니다.
+
+행 수가 IVF_MIN_SIZE 보다 작으면 전체 int8 행렬을 훑고, 크면 질의와 가까운 군집(nprobe 개)의
+벡터만 훑은 뒤 float32 원본으로 상위 후보를 다시 계산합니다.
+"""
+import json
+import logging
+import math
+import os
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경에서는 잠금 없이 단일 프로세스로 사용
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+RECIPE_VECTORS_DIR = os.getenv("RECIPE_VECTORS_DIR", "data/recipe_vectors")
+
+INITIAL_CAPACITY = 1024
+IVF_MIN_SIZE = 4096  # 이보다 작으면 전체 탐색
+IVF_NPROBE = 8
+IVF_TRAIN_SAMPLE = 20_000
+KMEANS_ITERATIONS = 10
+RERANK_FACTOR = 4  # int8 점수로 고른 후보 중 float32 로 다시 계산할 배수
+
+
+class VectorIndex:
+    def __init__(self, path: str, dim: int, encoder_name: str):
+        self.path = path
+        self.dim = dim
+        self.encoder_name = encoder_name
+        self.count = 0
+        self.capacity = 0
+        self._positions: dict[int, int] = {}
+        # IVF: (군집 중심, 군집별 벡터 행 번호). 검색 중 교체되어도 안전하도록 한 번에 바꿈
+        self._ivf: Optional[tuple[np.ndarray, List[np.ndarray]]] = None
+        self._trained_count = 0
+        # add/refresh(memmap 교체, count 갱신)와 search 를 직렬화 (add 안에서 refresh 를 부르므로 RLock)
+        self._lock = threading.RLock()
+
+        os.makedirs(path, exist_ok=True)
+        with self._locked():
+            meta = self._read_meta()
+            if meta and (meta.get("encoder") != encoder_name or meta.get("dim") != dim):
+                logger.info(f"인코더가 바뀌어 벡터 색인을 새로 만듭니다 ({meta.get('encoder')} -> {encoder_name})")
+                for file_name in os.listdir(path):
+                    if file_name != "lock":
+                        os.remove(os.path.join(path, file_name))
+                meta = None
+
+            self._open(max(INITIAL_CAPACITY, meta["count"] if meta else 0))
+            self.refresh(meta)
+            if self.count >= IVF_MIN_SIZE and self._ivf is None:
+                self.train()
+                self._write_meta()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, recipe_id: int) -> bool:
+        return recipe_id in self._positions
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self._file("lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> Optional[dict]:
+        try:
+            with open(self._file("meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_meta(self):
+        tmp_path = self._file("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "encoder": self.encoder_name,
+                "dim": self.dim,
+                "count": self.count,
+                "trained": self._trained_count
+            }, f)
+        os.replace(tmp_path, self._file("meta.json"))
+
+    def _memmap(self, name: str, dtype, shape: tuple) -> np.memmap:
+        """파일을 필요한 크기로 늘린 뒤 memmap 으로 엽니다 (기존 내용 유지)."""
+        file_path = self._file(name)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(file_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(file_path, dtype=dtype, mode="r+", shape=shape)
+
+    def _open(self, capacity: int):
+        self.capacity = capacity
+        self._vectors = self._memmap("vectors.f32", np.float32, (capacity, self.dim))
+        self._quantized = self._memmap("vectors.i8", np.int8, (capacity, self.dim))
+        self._scales = self._memmap("scales.f32", np.float32, (capacity,))
+        self._ids = self._memmap("ids.i64", np.int64, (capacity,))
+        self._assign = self._memmap("assign.i32", np.int32, (capacity,))
+
+    def _flush(self):
+        for array in (self._vectors, self._quantized, self._scales, self._ids, self._assign):
+            array.flush()
+
+    def refresh(self, meta: Optional[dict] = None):
+        """다른 프로세스가 디스크에 추가한 행과 새로 학습한 IVF 군집을 반영합니다."""
+        with self._lock:
+            self._refresh(meta)
+
+    def _refresh(self, meta: Optional[dict]):
+        meta = meta or self._read_meta()
+        if not meta or meta.get("encoder") != self.encoder_name:
+            return
+
+        count, trained = int(meta["count"]), int(meta.get("trained", 0))
+        if count > self.capacity:
+            self._open(count)
+        if trained != self._trained_count:
+            self._trained_count = trained
+            self._ivf = None
+            if trained:
+                self._build_ivf(np.load(self._file("centroids.npy")), np.asarray(self._assign[:count]))
+        elif count > self.count and self._ivf is not None:
+            self._extend_lists(self.count, count)
+
+        for i in range(self.count, count):
+            self._positions[int(self._ids[i])] = i
+        self.count = max(self.count, count)
+
+    def _extend_lists(self, begin: int, end: int):
+        lists = self._ivf[1]
+        assign = np.asarray(self._assign[begin:end])
+        for cluster in np.unique(assign):
+            positions = np.arange(begin, end)[assign == cluster]
+            lists[cluster] = np.concatenate([lists[cluster], positions])
+
+    def add(self, recipe_ids: List[int], vectors: np.ndarray):
+        """새 벡터를 추가합니다. 이미 있는 레시피 id 는 건너뜁니다."""
+        with self._lock, self._locked():
+            self._refresh(None)
+            self._add(recipe_ids, vectors)
+
+    def _add(self, recipe_ids: List[int], vectors: np.ndarray):
+        rows = [(rid, v) for rid, v in zip(recipe_ids, vectors) if rid not in self._positions]
+        if not rows:
+            return
+
+        needed = self.count + len(rows)
+        if needed > self.capacity:
+            self._flush()
+            self._open(max(needed, self.capacity * 2))
+
+        begin, end = self.count, needed
+        block = np.stack([v for _, v in rows]).astype(np.float32)
+        scales = np.maximum(np.abs(block).max(axis=1), 1e-12) / 127.0
+        self._vectors[begin:end] = block
+        self._quantized[begin:end] = np.round(block / scales[:, None]).astype(np.int8)
+        self._scales[begin:end] = scales
+        self._ids[begin:end] = [rid for rid, _ in rows]
+        for i, (rid, _) in enumerate(rows):
+            self._positions[rid] = begin + i
+
+        if self._ivf is not None:
+            self._assign[begin:end] = np.argmax(block @ self._ivf[0].T, axis=1)
+            self._extend_lists(begin, end)
+
+        self.count = end
+        # 학습 시점보다 두 배 이상 커지면 군집을 다시 학습
+        if self.count >= IVF_MIN_SIZE and self.count >= 2 * self._trained_count:
+            self.train()
+        self._flush()
+        self._write_meta()
+
+    def train(self):
+        """k-means 로 IVF 군집 중심을 학습하고 모든 벡터를 가장 가까운 군집에 배정합니다."""
+        n = self.count
+        n_lists = max(1, int(math.sqrt(n)))
+        rng = np.random.default_rng(0)
+        sample = self._vectors[rng.choice(n, size=min(n, IVF_TRAIN_SAMPLE), replace=False)]
+
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # 빈 군집은 기존 중심 유지 (정규화된 평균 = 구면 k-means)
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        assign = np.empty(n, dtype=np.int32)
+        for begin in range(0, n, 65536):
+            end = min(n, begin + 65536)
+            assign[begin:end] = np.argmax(self._vectors[begin:end] @ centroids.T, axis=1)
+        self._assign[:n] = assign
+        self._assign.flush()
+        centroids = centroids.astype(np.float32)
+        np.save(self._file("centroids.tmp.npy"), centroids)
+        os.replace(self._file("centroids.tmp.npy"), self._file("centroids.npy"))
+
+        self._build_ivf(centroids, assign)
+        self._trained_count = n
+        logger.info(f"벡터 색인 IVF 학습: 벡터 {n}개, 군집 {n_lists}개")
+
+    def _build_ivf(self, centroids: np.ndarray, assign: np.ndarray):
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(centroids) + 1))
+        self._ivf = (centroids, [order[bounds[i]:bounds[i + 1]] for i in range(len(centroids))])
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: int = IVF_NPROBE) -> List[tuple[int, float]]:
+        """코사인 유사도가 높은 순으로 (레시피 id, 점수) 를 반환합니다 (memmap 을 읽으므로 워커 스레드에서 호출)."""
+        with self._lock:
+            return self._search(query, k, nprobe)
+
+    def _search(self, query: np.ndarray, k: int, nprobe: int) -> List[tuple[int, float]]:
+        if self.count == 0 or k <= 0:
+            return []
+
+        query = query.astype(np.float32).reshape(-1)
+        ivf = self._ivf
+        if ivf is None:
+            candidates = np.arange(self.count)
+        else:
+            centroids, lists = ivf
+            nearest = np.argsort(-(centroids @ query))[:nprobe]
+            candidates = np.concatenate([lists[c] for c in nearest])
+            if len(candidates) == 0:
+                return []
+
+        # int8 벡터로 후보를 줄인 뒤 float32 원본으로 정확한 점수 계산
+        rough = (self._quantized[candidates].astype(np.float32) @ query) * self._scales[candidates]
+        n_rerank = min(len(candidates), k * RERANK_FACTOR)
+        if n_rerank < len(candidates):
+            candidates = candidates[np.argpartition(-rough, n_rerank - 1)[:n_rerank]]
+        candidates = np.sort(candidates)  # memmap 을 순서대로 읽도록 정렬
+
+        exact = self._vectors[candidates] @ query
+        top = np.argsort(-exact)[:k]
+        return [(int(self._ids[candidates[i]]), float(exact[i])) for i in top]
@@ -0,0 +1,25 @@
+"""YouTube 영상 URL 처리"""
+import re
+from urllib.parse import urlparse, parse_qs
+
+YOUTUBE_VIDEO_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def extract_video_id(video_url: str) -> str:
+    """YouTube URL(watch, shorts, youtu.be)에서 영상 ID를 추출합니다."""
+    parsed = urlparse(video_url.strip())
+    host = parsed.netloc.lower()
+    for prefix in ("www.", "m."):
+        host = host.removeprefix(prefix)
+
+    video_id = ""
+    if host == "youtube.com" and parsed.path == "/watch":
+        video_id = parse_qs(parsed.query).get("v", [""])[0]
+    elif host == "youtube.com" and parsed.path.startswith("/shorts/"):
+        video_id = parsed.path.split("/")[2]
+    elif host == "youtu.be":
+        video_id = parsed.path.lstrip("/").split("/")[0]
+
+    if not YOUTUBE_VIDEO_ID_PATTERN.fullmatch(video_id):
+        raise ValueError(f"지원하지 않는 YouTube URL 형식입니다: {video_url}")
+    return video_id